@@ -5,4 +5,54 @@ serial_device2.SerialDevice and adds methods to it to interface to
 Mettler Toledo balances and scales that use the Mettler Toledo
 Standard Interface Command Set (MT-SICS).
 '''
-from .mettler_toledo_device import MettlerToledoDevice, MettlerToledoDevices, MettlerToledoError, find_mettler_toledo_device_ports, find_mettler_toledo_device_port, __version__
+import importlib
+
+# names exported by the package and the module defining each one, the
+# modules are imported on first access so importing the package (and
+# starting the command line interface) stays fast
+_EXPORTS = {'MettlerToledoDevice': 'mettler_toledo_device',
+            'MettlerToledoDevices': 'mettler_toledo_device',
+            'MettlerToledoReading': 'mettler_toledo_device',
+            'MettlerToledoSnapshot': 'mettler_toledo_device',
+            'find_mettler_toledo_device_ports': 'mettler_toledo_device',
+            'find_mettler_toledo_device_port': 'mettler_toledo_device',
+            'get_detected_baudrate': 'mettler_toledo_device',
+            'MettlerToledoBaudrateReport': 'mettler_toledo_device',
+            '__version__': 'mettler_toledo_device',
+            'MettlerToledoError': 'response',
+            'MettlerToledoResponse': 'response',
+            'parse_response': 'response',
+            'MettlerToledoCommand': 'commands',
+            'COMMANDS': 'commands',
+            'MettlerToledoSample': 'stream',
+            'MettlerToledoRequestEvent': 'instrumentation',
+            'MettlerToledoPipeline': 'pipeline',
+            'MettlerToledoEvent': 'events',
+            'MettlerToledoSubscription': 'events',
+            'MettlerToledoSupervisor': 'supervisor',
+            'MettlerToledoSharedPublisher': 'shared',
+            'MettlerToledoSharedReader': 'shared',
+            'MettlerToledoStabilityDetector': 'stability',
+            'MettlerToledoStabilityError': 'stability',
+            'AsyncMettlerToledoDevice': 'asyncio_device',
+            'MettlerToledoRecorder': 'recorder',
+            'MettlerToledoStatistics': 'recorder',
+            'MettlerToledoLogWriter': 'weight_log',
+            'MettlerToledoLogReader': 'weight_log',
+            'MettlerToledoDosingController': 'dosing',
+            'MettlerToledoDosingResult': 'dosing',
+            }
+
+__all__ = [name for name in _EXPORTS if name != '__version__']
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__,name))
+    value = getattr(importlib.import_module('.' + module_name,__name__),name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division
+import asyncio
+import collections
+
+try:
+    import serial_asyncio
+except ImportError:
+    serial_asyncio = None
+
+from .response import (MettlerToledoError,
+                       parse_response,
+                       get_reply_id)
+from .commands import install_command_methods, _RAISE
+from .mettler_toledo_device import DEBUG, BAUDRATE
+
+
+_ERROR_REPLY_IDS = ('ES','ET','EL')
+
+
+class _PendingRequest(object):
+    __slots__ = ('reply_id','future','lines')
+
+    def __init__(self,reply_id,future):
+        self.reply_id = reply_id
+        self.future = future
+        self.lines = []
+
+
+class _MettlerToledoProtocol(asyncio.Protocol):
+    '''
+    Splits incoming bytes into lines and hands each line to the oldest
+    request waiting for that reply. Requests that timed out or were
+    cancelled stay queued so their late reply is consumed instead of
+    being handed to the next request, until a new request with the
+    same reply id is sent: the reply may have been lost and would
+    otherwise never stop being one reply behind. ES, ET and EL
+    replies go to the oldest request still waiting.
+    '''
+    def __init__(self,debug=DEBUG):
+        self.debug = debug
+        self.transport = None
+        self._buffer = bytearray()
+        self._pending = collections.deque()
+        self._connection_error = None
+
+    def _debug_print(self, *args):
+        if self.debug:
+            print(*args)
+
+    def connection_made(self,transport):
+        self.transport = transport
+
+    def data_received(self,data):
+        self._buffer += data
+        while True:
+            index = self._buffer.find(b'\n')
+            if index < 0:
+                break
+            line = bytes(self._buffer[:index+1])
+            del self._buffer[:index+1]
+            self._line_received(line)
+
+    def _line_received(self,line):
+        fields = line.split(None,2)
+        if not fields:
+            return
+        reply_id = fields[0].decode('ascii','replace')
+        error_reply = reply_id in _ERROR_REPLY_IDS
+        while self._pending:
+            pending = self._pending[0]
+            if error_reply and pending.future.done():
+                # error replies carry no command, give them to a
+                # request still waiting instead of an abandoned one
+                self._pending.popleft()
+            elif error_reply or (pending.reply_id == reply_id):
+                pending.lines.append(line)
+                if (len(fields) > 1) and (fields[1] == b'B'):
+                    # more lines of the same reply follow
+                    return
+                self._pending.popleft()
+                if not pending.future.done():
+                    pending.future.set_result(pending.lines)
+                return
+            elif pending.future.done():
+                # abandoned request whose reply never arrived
+                self._pending.popleft()
+            else:
+                break
+        self._debug_print('unsolicited response', line)
+
+    def connection_lost(self,exc):
+        if exc is None:
+            exc = MettlerToledoError('Connection closed!')
+        self._connection_error = exc
+        while self._pending:
+            pending = self._pending.popleft()
+            if not pending.future.done():
+                pending.future.set_exception(exc)
+
+    def send(self,data):
+        if self._connection_error is not None:
+            raise self._connection_error
+        self.transport.write(data)
+
+    def send_get_response(self,data,reply_id):
+        if self._connection_error is not None:
+            raise self._connection_error
+        future = asyncio.get_running_loop().create_future()
+        if any(pending.reply_id == reply_id for pending in self._pending):
+            # requests are sent one at a time, so these are abandoned
+            self._pending = collections.deque(pending for pending in self._pending
+                                              if not (pending.future.done() and (pending.reply_id == reply_id)))
+        self._pending.append(_PendingRequest(reply_id,future))
+        self.transport.write(data)
+        return future
+
+
+class AsyncMettlerToledoDevice(object):
+    '''
+    asyncio version of MettlerToledoDevice built on the non-blocking
+    pyserial-asyncio transport. Requests to one balance are sent one at
+    a time in call order, so a single event loop can drive many
+    balances without a thread per balance.
+
+    Example Usage:
+
+    dev = AsyncMettlerToledoDevice(port='/dev/ttyUSB0')
+    await dev.open()
+    await dev.get_serial_number()
+    '1126493049'
+    await dev.get_weight()
+    [-0.6800, 'g', 'S']
+    await dev.close()
+
+    async with AsyncMettlerToledoDevice(port='/dev/ttyUSB0') as dev:
+        await dev.zero()
+    '''
+    _TIMEOUT = 1.0
+    _WRITE_WRITE_DELAY = 0.05
+
+    def __init__(self,port,baudrate=BAUDRATE,timeout=None,write_write_delay=None,debug=DEBUG):
+        self.port = port
+        if (baudrate is None) or (str(baudrate).lower() == 'default'):
+            baudrate = BAUDRATE
+        self.baudrate = baudrate
+        if timeout is None:
+            timeout = self._TIMEOUT
+        self.timeout = timeout
+        if write_write_delay is None:
+            write_write_delay = self._WRITE_WRITE_DELAY
+        self.write_write_delay = write_write_delay
+        self.debug = debug
+        self._transport = None
+        self._protocol = None
+        self._lock = None
+        self._time_write_prev = None
+
+    def _debug_print(self, *args):
+        if self.debug:
+            print(*args)
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self,*exc_info):
+        await self.close()
+
+    async def open(self):
+        '''
+        Open the device serial port.
+        '''
+        if serial_asyncio is None:
+            raise ImportError('AsyncMettlerToledoDevice requires pyserial-asyncio, pip install pyserial-asyncio')
+        loop = asyncio.get_running_loop()
+        self._transport, self._protocol = await serial_asyncio.create_serial_connection(
+            loop,
+            lambda: _MettlerToledoProtocol(debug=self.debug),
+            self.port,
+            baudrate=self.baudrate)
+        # connection_made is only scheduled, requests may be sent before it runs
+        self._protocol.transport = self._transport
+        self._lock = asyncio.Lock()
+        self._time_write_prev = None
+
+    async def close(self):
+        '''
+        Close the device serial port.
+        '''
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+            self._protocol = None
+
+    def get_port(self):
+        return self.port
+
+    def _args_to_request(self,*args):
+        request = ''.join(map(str,args))
+        request = request + '\r\n';
+        return request.encode()
+
+    async def _delay_write(self):
+        loop = asyncio.get_running_loop()
+        if self._time_write_prev is not None:
+            delay = self.write_write_delay - (loop.time() - self._time_write_prev)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self._time_write_prev = loop.time()
+
+    def _check_open(self):
+        if self._protocol is None:
+            raise MettlerToledoError('Device is not open, call open() first.')
+
+    async def _send_request(self,*args):
+
+        '''Sends request to device over serial port and
+        returns number of bytes written'''
+
+        self._check_open()
+        request = self._args_to_request(*args)
+        self._debug_print('request', request)
+        async with self._lock:
+            await self._delay_write()
+            self._protocol.send(request)
+        return len(request)
+
+    async def _send_request_get_response(self,*args,**kwargs):
+
+        '''Sends request to device over serial port and
+        returns response'''
+
+        responses = await self._send_request_get_responses(*args,**kwargs)
+        return responses[-1]
+
+    async def _send_request_get_responses(self,*args,**kwargs):
+
+        '''Sends request to device over serial port and
+        returns the list of responses of a reply that continues over
+        several lines while the status is B'''
+
+        timeout = kwargs.get('timeout',self.timeout)
+        request = self._args_to_request(*args)
+        command = str(args[0])
+        return await self._exchange_request(command,request,get_reply_id(command),timeout)
+
+    async def _exchange_request(self,command,request,reply_id,timeout):
+        self._check_open()
+        self._debug_print('request', request)
+        async with self._lock:
+            await self._delay_write()
+            future = self._protocol.send_get_response(request,reply_id)
+            try:
+                lines = await asyncio.wait_for(future,timeout)
+            except asyncio.TimeoutError:
+                raise MettlerToledoError('Timeout waiting for response to {0}!'.format(command))
+        self._debug_print('response', lines)
+        return [parse_response(line) for line in lines]
+
+    async def _execute_command(self,command,args,timeout=None):
+        '''
+        Sends a command of the registry, see commands.py, and returns
+        its result.
+        '''
+        if timeout is None:
+            timeout = command.timeout
+        if timeout is None:
+            timeout = self.timeout
+        if args:
+            request = command.format_request(args).encode()
+        else:
+            request = command.request
+        try:
+            responses = await self._exchange_request(command.command,request,command.reply_id,timeout)
+            if command.multiline:
+                return command.handle(responses)
+            return command.handle(responses[-1])
+        except MettlerToledoError:
+            if command.error_result is _RAISE:
+                raise
+            return command.error_result
+
+    async def reset(self):
+        '''
+        Resets the balance to the condition found after switching on, but without a zero setting being performed.
+        '''
+        # the balance answers with I4 and its serial number
+        await self._send_request_get_response('@')
+
+
+def _make_command_method(command):
+    async def method(self,*args,timeout=None,**kwargs):
+        return await self._execute_command(command,command.bind(args,kwargs),timeout)
+    return method
+
+# get_commands(), get_weight(), tare() and the other MT-SICS commands,
+# each takes an optional timeout in seconds
+install_command_methods(AsyncMettlerToledoDevice,_make_command_method)
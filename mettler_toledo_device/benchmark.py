@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmarks for the mettler_toledo_device package.
+
+Without a port the benchmarks run against MettlerToledoSimulator
+balances on pseudo-terminals, so they can run on any Linux box.
+
+Usage:
+
+python -m mettler_toledo_device.benchmark
+python -m mettler_toledo_device.benchmark --port /dev/ttyUSB0 --number 500
+python -m mettler_toledo_device.benchmark --port /dev/ttyUSB0 --state-changes  # also zeros the balance
+python -m mettler_toledo_device.benchmark --parse
+'''
+from __future__ import print_function, division
+import argparse
+import collections
+import time
+import timeit
+
+from .response import MettlerToledoError, parse_response
+from .commands import get_command
+from .mettler_toledo_device import MettlerToledoDevice, find_mettler_toledo_device_ports
+from .simulator import MettlerToledoSimulator
+
+
+BenchmarkResult = collections.namedtuple('BenchmarkResult',['name','count','rate','p50','p95','p99'])
+
+def _uncached(method_name):
+    # identity inquiries are cached by the device, time the exchange
+    def call(dev):
+        dev.clear_device_info()
+        return getattr(dev,method_name)()
+    return call
+
+_COMMAND_METHODS = [('SI',lambda dev: dev.get_weight()),
+                    ('S',lambda dev: dev.get_weight_stable()),
+                    ('I2',_uncached('get_balance_data')),
+                    ('I4',_uncached('get_serial_number')),
+                    ]
+# commands that change the balance state, only run when asked for
+_STATE_COMMAND_METHODS = [('ZI',lambda dev: dev.zero()),
+                          ]
+
+
+_PARSE_LINES = [b'S S     100.0012 g\r\n',
+                b'S D      99.9871 g\r\n',
+                b'S +\r\n',
+                b'I4 A "1126493049"\r\n',
+                b'I2 A "XS204 Excellence 220.0090 g"\r\n',
+                ]
+
+
+def _legacy_parse(line):
+    # str based parsing used before parse_response, kept for comparison
+    response = line.decode().replace('"','')
+    response_list = response.split()
+    if 'ES' in response_list[0]:
+        raise MettlerToledoError('Syntax Error!')
+    elif 'ET' in response_list[0]:
+        raise MettlerToledoError('Transmission Error!')
+    elif 'EL' in response_list[0]:
+        raise MettlerToledoError('Logical Error!')
+    return response_list
+
+def _legacy_get_weight(line):
+    response = _legacy_parse(line)
+    if 'I' in response[1]:
+        raise MettlerToledoError('Command understood, not executable at present.')
+    elif '+' in response[1]:
+        raise MettlerToledoError('Balance in overload range.')
+    elif '-' in response[1]:
+        raise MettlerToledoError('Balance in underload range.')
+    response.append(response[1])
+    response[2] = float(response[2])
+    return response[2:]
+
+def _legacy_get_string(line):
+    response = _legacy_parse(line)
+    if 'I' in response[1]:
+        raise MettlerToledoError('Command understood, not executable at present.')
+    return response[2]
+
+def _legacy_get_strings(line):
+    response = _legacy_parse(line)
+    if 'I' in response[1]:
+        raise MettlerToledoError('Command understood, not executable at present.')
+    return response[2:]
+
+def _raising(function):
+    def call(line):
+        try:
+            return function(line)
+        except MettlerToledoError:
+            return None
+    return call
+
+# (name, line, legacy path, command method) of the full reply paths
+_HANDLE_LINES = [('SI -> get_weight',_PARSE_LINES[0],_legacy_get_weight,'get_weight'),
+                 ('SI overload -> get_weight',_PARSE_LINES[2],_legacy_get_weight,'get_weight'),
+                 ('I4 -> get_serial_number',_PARSE_LINES[3],_legacy_get_string,'get_serial_number'),
+                 ('I2 -> get_balance_data',_PARSE_LINES[4],_legacy_get_strings,'get_balance_data'),
+                 ]
+
+def _time_per_call(function,line,number,repeat=3):
+    # best of repeat runs, the others include scheduler noise
+    return min(timeit.repeat(lambda: function(line),number=number,repeat=repeat))/number
+
+def _parse_new_line(line):
+    return parse_response.__wrapped__(line)
+
+def benchmark_parse(number=100000):
+    '''
+    Returns a list of (line, legacy seconds, parser seconds, repeated
+    seconds) per reply line followed by one entry per full reply path,
+    from the reply line to the result of the command method, without
+    parser seconds. The parser column parses a line not seen before,
+    converting the value and building the MettlerToledoResponse, the
+    repeated column is the cost of a line parse_response() got
+    recently.
+    '''
+    results = []
+    for line in _PARSE_LINES:
+        results.append((line,
+                        _time_per_call(_raising(_legacy_parse),line,number),
+                        _time_per_call(_raising(_parse_new_line),line,number),
+                        _time_per_call(_raising(parse_response),line,number)))
+    for name, line, legacy, method in _HANDLE_LINES:
+        results.append((name,
+                        _time_per_call(_raising(legacy),line,number),
+                        None,
+                        _time_per_call(_raising(get_command(method).handle_line),line,number)))
+    return results
+
+def print_parse_benchmark(number=100000):
+    print('{0:<40} {1:>10} {2:>10} {3:>11}'.format('reply','legacy ns','parser ns','repeated ns'))
+    for line, legacy_time, parser_time, repeated_time in benchmark_parse(number):
+        if parser_time is None:
+            parser_ns = '-'
+        else:
+            parser_ns = '{0:.0f}'.format(parser_time*1e9)
+        print('{0:<40} {1:>10.0f} {2:>10} {3:>11.0f}'.format(repr(line),
+                                                            legacy_time*1e9,
+                                                            parser_ns,
+                                                            repeated_time*1e9))
+
+
+def _percentile(sorted_values,percent):
+    # nearest rank
+    if not sorted_values:
+        return None
+    index = int(round(percent/100.0*len(sorted_values) + 0.5)) - 1
+    index = min(max(index,0),len(sorted_values) - 1)
+    return sorted_values[index]
+
+def _summarize(name,durations,total_time=None):
+    durations = sorted(durations)
+    if total_time is None:
+        total_time = sum(durations)
+    if total_time > 0:
+        rate = len(durations)/total_time
+    else:
+        rate = None
+    return BenchmarkResult(name,
+                           len(durations),
+                           rate,
+                           _percentile(durations,50),
+                           _percentile(durations,95),
+                           _percentile(durations,99))
+
+def benchmark_commands(dev,number=200,command_methods=None):
+    '''
+    Calls each (command, function(dev)) number times back to back and
+    returns a BenchmarkResult with commands/s and latency percentiles
+    per command.
+    '''
+    if command_methods is None:
+        command_methods = _COMMAND_METHODS
+    results = []
+    for command, function in command_methods:
+        durations = []
+        t_start = time.monotonic()
+        for i in range(number):
+            t_request = time.monotonic()
+            function(dev)
+            durations.append(time.monotonic() - t_request)
+        results.append(_summarize(command,durations,time.monotonic() - t_start))
+    return results
+
+def benchmark_stream(dev,duration=1.0):
+    '''
+    Streams for duration seconds and returns a BenchmarkResult with
+    samples/s and the sample interval percentiles.
+    '''
+    intervals = []
+    previous = None
+    dev.start_stream()
+    try:
+        t_end = time.monotonic() + duration
+        for sample in dev.iter_samples(timeout=duration):
+            if previous is not None:
+                intervals.append(sample.timestamp - previous)
+            previous = sample.timestamp
+            if sample.timestamp >= t_end:
+                break
+    finally:
+        dev.stop_stream()
+    return _summarize('SIR',intervals)
+
+def benchmark_constructor(port,number=10,**kwargs):
+    '''
+    Returns a BenchmarkResult for opening port with MettlerToledoDevice
+    until the balance is ready.
+    '''
+    durations = []
+    for i in range(number):
+        t_start = time.monotonic()
+        dev = MettlerToledoDevice(port=port,**kwargs)
+        durations.append(time.monotonic() - t_start)
+        dev.close()
+    return _summarize('constructor',durations)
+
+def benchmark_discovery(ports,number=5,**kwargs):
+    '''
+    Returns a BenchmarkResult for probing ports with
+    find_mettler_toledo_device_ports.
+    '''
+    durations = []
+    for i in range(number):
+        t_start = time.monotonic()
+        find_mettler_toledo_device_ports(use_ports=ports,**kwargs)
+        durations.append(time.monotonic() - t_start)
+    return _summarize('discovery ({0} ports)'.format(len(ports)),durations)
+
+def run_benchmarks(port=None,number=200,simulator_count=4,latency=0.0,write_write_delay=None,stream_duration=1.0,
+                   state_changes=False):
+    '''
+    Runs the device benchmarks against port, or against
+    simulator_count simulated balances when port is None, and returns
+    a list of BenchmarkResult. Commands that change the balance state,
+    like zeroing, are only benchmarked with state_changes.
+    '''
+    simulators = []
+    try:
+        if port is None:
+            for i in range(simulator_count):
+                sim = MettlerToledoSimulator(serial_number=1126493049 + i,latency=latency)
+                sim.start()
+                simulators.append(sim)
+            ports = [sim.port for sim in simulators]
+        else:
+            ports = [port]
+        device_kwargs = {}
+        if write_write_delay is not None:
+            device_kwargs['write_write_delay'] = write_write_delay
+        results = []
+        results.append(benchmark_discovery(ports))
+        results.append(benchmark_constructor(ports[0],**device_kwargs))
+        dev = MettlerToledoDevice(port=ports[0],**device_kwargs)
+        try:
+            command_methods = list(_COMMAND_METHODS)
+            if state_changes:
+                command_methods.extend(_STATE_COMMAND_METHODS)
+            results.extend(benchmark_commands(dev,number,command_methods))
+            results.append(benchmark_stream(dev,stream_duration))
+        finally:
+            dev.close()
+        return results
+    finally:
+        for sim in simulators:
+            sim.stop()
+
+def print_benchmarks(results):
+    print('{0:<24} {1:>7} {2:>10} {3:>10} {4:>10} {5:>10}'.format('benchmark','count','per s','p50 ms','p95 ms','p99 ms'))
+    for result in results:
+        values = [result.rate] + [result.p50,result.p95,result.p99]
+        columns = []
+        for index, value in enumerate(values):
+            if value is None:
+                columns.append('-')
+            elif index == 0:
+                columns.append('{0:.1f}'.format(value))
+            else:
+                columns.append('{0:.2f}'.format(value*1000))
+        print('{0:<24} {1:>7} {2:>10} {3:>10} {4:>10} {5:>10}'.format(result.name,result.count,*columns))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Benchmark mettler_toledo_device.')
+    parser.add_argument('--port',help='balance serial port, simulated balances are used when omitted')
+    parser.add_argument('--number',type=int,default=200,help='requests per command')
+    parser.add_argument('--simulators',type=int,default=4,help='simulated balances for the discovery benchmark')
+    parser.add_argument('--latency',type=float,default=0.0,help='simulated balance response latency in seconds')
+    parser.add_argument('--write-write-delay',type=float,default=None,help='override the device write_write_delay')
+    parser.add_argument('--state-changes',action='store_true',help='also benchmark commands that change the balance state (ZI zeros it)')
+    parser.add_argument('--parse',action='store_true',help='only run the reply parser microbenchmark')
+    args = parser.parse_args(args)
+    if args.parse:
+        print_parse_benchmark()
+        return
+    print_benchmarks(run_benchmarks(port=args.port,
+                                    number=args.number,
+                                    simulator_count=args.simulators,
+                                    latency=args.latency,
+                                    write_write_delay=args.write_write_delay,
+                                    state_changes=args.state_changes))
+
+
+# -----------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+'''
+Command line interface of the mettler_toledo_device package.
+
+Usage:
+
+mettler-toledo discover
+mettler-toledo info --port /dev/ttyUSB0
+mettler-toledo read --stable
+mettler-toledo stream --rate 10 --format csv --duration 60
+mettler-toledo bench --number 500
+python -m mettler_toledo_device read
+
+Heavy modules are only imported by the subcommand that needs them, so
+the time to the first reading is spent on the balance.
+'''
+from __future__ import print_function, division
+import argparse
+import json
+import sys
+import time
+
+
+def _open_device(args):
+    from .mettler_toledo_device import MettlerToledoDevice
+    kwargs = {'debug': args.debug}
+    if args.port is not None:
+        kwargs['port'] = args.port
+    if args.baudrate is not None:
+        kwargs['baudrate'] = _get_baudrate(args.baudrate)
+    return MettlerToledoDevice(**kwargs)
+
+def _get_baudrate(baudrate):
+    if (baudrate is None) or (baudrate.lower() == 'auto'):
+        return baudrate
+    return int(baudrate)
+
+def _write_row(row,output_format,fields,out):
+    if output_format == 'jsonl':
+        out.write(json.dumps(dict(zip(fields,row))) + '\n')
+    elif output_format == 'csv':
+        out.write(','.join('' if value is None else str(value) for value in row) + '\n')
+    else:
+        out.write(' '.join('' if value is None else str(value) for value in row).strip() + '\n')
+    out.flush()
+
+def _discover(args):
+    from .mettler_toledo_device import find_mettler_toledo_device_ports
+    baudrate = _get_baudrate(args.baudrate)
+    ports = find_mettler_toledo_device_ports(baudrate=baudrate,use_ports=args.use_ports,debug=args.debug)
+    fields = ['port','serial_number']
+    if args.format == 'csv':
+        _write_row(fields,args.format,fields,sys.stdout)
+    for port, serial_number in sorted(ports.items()):
+        _write_row([port,serial_number],args.format,fields,sys.stdout)
+    return 0 if ports else 1
+
+def _info(args):
+    dev = _open_device(args)
+    try:
+        info = dev.get_device_info()
+        info['port'] = dev.get_port()
+        info['baudrate'] = dev.get_baudrate()
+    finally:
+        dev.close()
+    if args.format == 'jsonl':
+        print(json.dumps(info))
+    else:
+        for key in sorted(info):
+            print('{0}: {1}'.format(key,info[key]))
+    return 0
+
+def _read(args):
+    fields = ['time','weight','unit','status']
+    dev = _open_device(args)
+    try:
+        if args.format == 'csv':
+            _write_row(fields,args.format,fields,sys.stdout)
+        for i in range(args.count):
+            if args.stable:
+                weight, unit = dev.wait_for_stable_weight(args.tolerance,timeout=args.timeout)
+                status = 'S'
+            else:
+                weight, unit, status = dev.get_weight()
+            _write_row([time.time(),weight,unit,status],args.format,fields,sys.stdout)
+    finally:
+        dev.close()
+    return 0
+
+def _stream(args):
+    fields = ['time','weight','unit','status','sequence']
+    dev = _open_device(args)
+    count = 0
+    try:
+        if args.format == 'csv':
+            _write_row(fields,args.format,fields,sys.stdout)
+        dev.start_stream(repeat_on_change=args.on_change)
+        t_start = time.monotonic()
+        # wall time of a sample from its monotonic timestamp
+        wall_offset = time.time() - t_start
+        if args.rate:
+            period = 1.0/args.rate
+        else:
+            period = None
+        t_next = t_start
+        for sample in dev.iter_samples(timeout=args.timeout):
+            if (args.duration is not None) and ((sample.timestamp - t_start) >= args.duration):
+                break
+            if period is not None:
+                # the balance streams faster than the rate, keep the
+                # first sample of every period
+                if sample.timestamp < t_next:
+                    continue
+                t_next += period
+                if t_next < sample.timestamp:
+                    t_next = sample.timestamp + period
+            _write_row([sample.timestamp + wall_offset,sample.weight,sample.unit,sample.status,sample.sequence],
+                       args.format,fields,sys.stdout)
+            count += 1
+            if (args.count is not None) and (count >= args.count):
+                break
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        try:
+            dev.stop_stream()
+        finally:
+            dev.close()
+    return 0
+
+def _bench(args):
+    from . import benchmark
+    benchmark.main(args.benchmark_args)
+    return 0
+
+def _add_device_arguments(parser):
+    parser.add_argument('--port',help='balance serial port, found automatically when omitted')
+    parser.add_argument('--baudrate',help="baudrate or 'auto' to detect it")
+    parser.add_argument('--debug',action='store_true')
+
+def _get_parser():
+    parser = argparse.ArgumentParser(prog='mettler-toledo',description='Mettler Toledo MT-SICS balances.')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    discover = subparsers.add_parser('discover',help='list the ports with a balance and their serial numbers')
+    discover.add_argument('--baudrate',help="baudrate or 'auto' to detect it")
+    discover.add_argument('--use-ports',nargs='+',help='probe these ports instead of the enumerated ones')
+    discover.add_argument('--format',choices=['text','csv','jsonl'],default='text')
+    discover.add_argument('--debug',action='store_true')
+    discover.set_defaults(function=_discover)
+
+    info = subparsers.add_parser('info',help='print the balance identity')
+    _add_device_arguments(info)
+    info.add_argument('--format',choices=['text','jsonl'],default='text')
+    info.set_defaults(function=_info)
+
+    read = subparsers.add_parser('read',help='print weights read with SI')
+    _add_device_arguments(read)
+    read.add_argument('--count',type=int,default=1)
+    read.add_argument('--stable',action='store_true',help='wait for a stable weight')
+    read.add_argument('--tolerance',type=float,default=0.001,help='stability tolerance in the balance unit')
+    read.add_argument('--timeout',type=float,default=5.0,help='seconds to wait for a stable weight')
+    read.add_argument('--format',choices=['text','csv','jsonl'],default='text')
+    read.set_defaults(function=_read)
+
+    stream = subparsers.add_parser('stream',help='print streamed weights until interrupted')
+    _add_device_arguments(stream)
+    stream.add_argument('--rate',type=float,help='samples per second to print, every sample when omitted')
+    stream.add_argument('--duration',type=float,help='seconds to stream')
+    stream.add_argument('--count',type=int,help='samples to print')
+    stream.add_argument('--on-change',action='store_true',help='stream with SR, only changed weights')
+    stream.add_argument('--timeout',type=float,default=5.0,help='stop when no sample arrives for this many seconds')
+    stream.add_argument('--format',choices=['text','csv','jsonl'],default='csv')
+    stream.set_defaults(function=_stream)
+
+    # the remaining arguments are passed on to the benchmark
+    bench = subparsers.add_parser('bench',help='run the benchmarks, see python -m mettler_toledo_device.benchmark -h')
+    bench.set_defaults(function=_bench)
+    return parser
+
+def main(args=None):
+    parser = _get_parser()
+    args, extra_args = parser.parse_known_args(args)
+    if args.command == 'bench':
+        args.benchmark_args = extra_args
+    elif extra_args:
+        parser.error('unrecognized arguments: {0}'.format(' '.join(extra_args)))
+    return args.function(args)
+
+
+# -----------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    sys.exit(main())
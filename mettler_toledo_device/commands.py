@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+'''
+Table of the MT-SICS commands the package sends. Each entry holds the
+pre-encoded request, the reply schema and the status -> error message
+map of one command. The command methods of MettlerToledoDevice,
+AsyncMettlerToledoDevice and MettlerToledoPipeline are generated from
+this one table, see install_command_methods().
+'''
+from __future__ import print_function, division
+
+from .response import (MettlerToledoError,
+                       parse_response,
+                       get_reply_id,
+                       _NOT_EXECUTABLE_ERROR)
+
+
+# error_result of commands whose errors are raised
+_RAISE = object()
+
+_INQUIRY_STATUS_ERRORS = {'I': _NOT_EXECUTABLE_ERROR}
+_WEIGHT_STATUS_ERRORS = {'I': _NOT_EXECUTABLE_ERROR,
+                         '+': 'Balance in overload range.',
+                         '-': 'Balance in underload range.',
+                         }
+_ZERO_STATUS_ERRORS = {'I': 'Zero setting not performed (balance is currently executing another command, e.g. taring, or timeout as stability was not reached).',
+                       '+': 'Upper limit of zero setting range exceeded.',
+                       '-': 'Lower limit of zero setting range exceeded.',
+                       }
+_COMMANDS_STATUS_ERRORS = {'I': 'The list cannot be sent at present as another operation is taking place.'}
+_TARE_STATUS_ERRORS = {'I': 'Tare not performed (balance is currently executing another command, e.g. zero setting, or timeout as stability was not reached).',
+                       '+': 'Upper limit of taring range exceeded.',
+                       '-': 'Lower limit of taring range exceeded.',
+                       }
+_TARE_VALUE_STATUS_ERRORS = {'I': _NOT_EXECUTABLE_ERROR,
+                             'L': 'Taring not possible (e.g. negative tare value or tare value too large).',
+                             }
+_CALIBRATION_STATUS_ERRORS = {'I': 'Calibration not possible at present as another operation is taking place.',
+                              'L': 'Calibration aborted, e.g. as stability was not reached or the procedure was aborted.',
+                              }
+
+# seconds to wait for the final line of a calibration
+_CALIBRATION_TIMEOUT = 300.0
+
+
+def _commands_schema(responses):
+    # I0 B <level> "<command>"
+    commands = []
+    for response in responses:
+        fields = response.get_field_strings()
+        if len(fields) >= 2:
+            commands.append(fields[1])
+    return commands
+
+_SCHEMAS = {'weight': lambda response: [response.value,response.unit,response.status],
+            'weight_value': lambda response: [response.value,response.unit],
+            'strings': lambda response: response.get_field_strings(),
+            'string': lambda response: response.fields[0].decode('ascii','replace'),
+            'status': lambda response: response.status,
+            'done': lambda response: True,
+            'commands': _commands_schema,
+            }
+
+def _make_handler(schema,status_errors,multiline):
+    convert = _SCHEMAS[schema]
+    if multiline:
+        def handle(responses):
+            for response in responses:
+                error = status_errors.get(response.status)
+                if error is not None:
+                    raise MettlerToledoError(error,response.command,response.status)
+            if schema == 'commands':
+                return convert(responses)
+            return convert(responses[-1])
+    else:
+        def handle(response):
+            error = status_errors.get(response.status)
+            if error is not None:
+                raise MettlerToledoError(error,response.command,response.status)
+            return convert(response)
+    return handle
+
+def _make_line_handler(schema,reply_id,handle):
+    # S replies with a weight skip the status check
+    if (reply_id == 'S') and (schema in ('weight','weight_value')):
+        def handle_line(line):
+            response = parse_response(line)
+            if (response[0] != 'S') or (response[2] is None):
+                return handle(response)
+            if schema == 'weight_value':
+                return [response[2],response[3]]
+            return [response[2],response[3],response[1]]
+    else:
+        def handle_line(line):
+            return handle(parse_response(line))
+    return handle_line
+
+
+class MettlerToledoCommand(object):
+    '''
+    One registry entry. method is the name of the generated methods,
+    parameters the names of their arguments, which are appended to
+    the request separated by spaces. handle() turns the parsed reply (a
+    list of responses when multiline) into the method result or
+    raises MettlerToledoError, handle_line() does the same starting
+    from the raw reply line of a single line reply. cached results are kept until the
+    device info is cleared, error_result is returned instead of
+    raising when given and timeout is the seconds to wait for the
+    rest of a multiline reply.
+    '''
+    __slots__ = ('method','command','reply_id','parameters','schema','status_errors',
+                 'multiline','cached','error_result','timeout','doc',
+                 'request','request_text','handle','handle_line')
+
+    def __init__(self,method,command,schema,status_errors=None,parameters=(),
+                 multiline=False,cached=False,error_result=_RAISE,timeout=None,doc=''):
+        if status_errors is None:
+            status_errors = {}
+        self.method = method
+        self.command = command
+        self.reply_id = get_reply_id(command)
+        self.parameters = tuple(parameters)
+        self.schema = schema
+        self.status_errors = status_errors
+        self.multiline = multiline
+        self.cached = cached
+        self.error_result = error_result
+        self.timeout = timeout
+        self.doc = doc
+        self.request_text = command + '\r\n'
+        self.request = self.request_text.encode()
+        self.handle = _make_handler(schema,status_errors,multiline)
+        self.handle_line = _make_line_handler(schema,self.reply_id,self.handle)
+
+    def __repr__(self):
+        return 'MettlerToledoCommand({0!r}, {1!r})'.format(self.method,self.command)
+
+    def bind(self,args,kwargs):
+        '''
+        Returns the arguments of a call to the generated method in
+        parameter order.
+        '''
+        if not kwargs:
+            return args
+        args = list(args)
+        for name in self.parameters[len(args):]:
+            if name not in kwargs:
+                break
+            args.append(kwargs.pop(name))
+        if kwargs:
+            raise TypeError('{0}() got unexpected keyword arguments {1}'.format(self.method,', '.join(sorted(kwargs))))
+        return tuple(args)
+
+    def format_request(self,args):
+        '''
+        Returns the request text, the pre-encoded one without args.
+        '''
+        if not args:
+            return self.request_text
+        if len(args) != len(self.parameters):
+            raise TypeError('{0}() takes {1} arguments ({2} given)'.format(self.method,len(self.parameters),len(args)))
+        return ' '.join([self.command] + [str(arg) for arg in args]) + '\r\n'
+
+
+COMMANDS = [
+    MettlerToledoCommand('get_commands','I0','commands',_COMMANDS_STATUS_ERRORS,multiline=True,cached=True,
+                         doc='Inquiry of all implemented MT-SICS commands. Returns the command names, cached until reset() or clear_device_info().'),
+    MettlerToledoCommand('get_mtsics_level','I1','strings',_INQUIRY_STATUS_ERRORS,cached=True,
+                         doc='Inquiry of MT-SICS level and MT-SICS versions.'),
+    MettlerToledoCommand('get_balance_data','I2','strings',_INQUIRY_STATUS_ERRORS,cached=True,
+                         doc='Inquiry of balance data.'),
+    MettlerToledoCommand('get_software_version','I3','strings',_INQUIRY_STATUS_ERRORS,cached=True,
+                         doc='Inquiry of balance SW version and type definition number.'),
+    MettlerToledoCommand('get_serial_number','I4','string',_INQUIRY_STATUS_ERRORS,cached=True,
+                         doc='Inquiry of serial number.'),
+    MettlerToledoCommand('get_software_id','I5','string',_INQUIRY_STATUS_ERRORS,cached=True,
+                         doc='Inquiry of SW-Identification number.'),
+    MettlerToledoCommand('get_weight_stable','S','weight_value',_WEIGHT_STATUS_ERRORS,error_result=None,
+                         doc='Send the current stable net weight value.'),
+    MettlerToledoCommand('get_weight','SI','weight',_WEIGHT_STATUS_ERRORS,
+                         doc='Send the current net weight value, irrespective of balance stability.'),
+    MettlerToledoCommand('get_weight_display_unit','SIU','weight',_WEIGHT_STATUS_ERRORS,
+                         doc='Send the current net weight value in the currently displayed unit, irrespective of balance stability.'),
+    MettlerToledoCommand('zero_stable','Z','done',_ZERO_STATUS_ERRORS,error_result=False,
+                         doc='Zero the balance.'),
+    MettlerToledoCommand('zero','ZI','status',_ZERO_STATUS_ERRORS,
+                         doc='Zero the balance immediately regardless the stability of the balance.'),
+    MettlerToledoCommand('tare_stable','T','weight_value',_TARE_STATUS_ERRORS,
+                         doc='Tare the balance with the next stable weight value. Returns the tare weight.'),
+    MettlerToledoCommand('tare','TI','weight',_TARE_STATUS_ERRORS,
+                         doc='Tare the balance immediately regardless the stability of the balance. Returns the tare weight and its status.'),
+    MettlerToledoCommand('get_tare_weight','TA','weight_value',_TARE_VALUE_STATUS_ERRORS,
+                         doc='Inquiry of the tare weight value.'),
+    MettlerToledoCommand('set_tare_weight','TA','weight_value',_TARE_VALUE_STATUS_ERRORS,parameters=('value','unit'),
+                         doc='Preset the tare weight value in unit.'),
+    MettlerToledoCommand('clear_tare','TAC','done',_INQUIRY_STATUS_ERRORS,
+                         doc='Clear the tare weight value.'),
+    MettlerToledoCommand('get_calibration_setting','C0','strings',_INQUIRY_STATUS_ERRORS,
+                         doc='Inquiry of the calibration setting (mode, weight type, weight and unit).'),
+    MettlerToledoCommand('calibrate','C1','done',_CALIBRATION_STATUS_ERRORS,multiline=True,timeout=_CALIBRATION_TIMEOUT,
+                         doc='Calibrate according to the current calibration setting.'),
+    MettlerToledoCommand('calibrate_external','C2','done',_CALIBRATION_STATUS_ERRORS,multiline=True,timeout=_CALIBRATION_TIMEOUT,
+                         doc='Calibrate with external weights.'),
+    MettlerToledoCommand('calibrate_internal','C3','done',_CALIBRATION_STATUS_ERRORS,multiline=True,timeout=_CALIBRATION_TIMEOUT,
+                         doc='Calibrate with the internal weights.'),
+    ]
+
+COMMANDS_BY_METHOD = dict((command.method,command) for command in COMMANDS)
+
+
+def get_command(method):
+    return COMMANDS_BY_METHOD[method]
+
+def install_command_methods(cls,make_method,commands=None):
+    '''
+    Adds make_method(command) to cls as command.method for every
+    command, except where cls defines the method itself.
+    '''
+    if commands is None:
+        commands = COMMANDS
+    for command in commands:
+        if command.method in cls.__dict__:
+            continue
+        method = make_method(command)
+        method.__name__ = command.method
+        method.__qualname__ = '{0}.{1}'.format(cls.__name__,command.method)
+        if method.__doc__ is None:
+            method.__doc__ = command.doc
+        setattr(cls,command.method,method)
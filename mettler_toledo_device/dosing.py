@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division
+import collections
+import math
+import threading
+import time
+
+from .response import MettlerToledoError
+from .stability import MettlerToledoStabilityError, _get_slope
+
+
+MettlerToledoDosingResult = collections.namedtuple('MettlerToledoDosingResult',
+                                                   ['target','final_weight','overshoot','settled',
+                                                    'cutoff_weight','cutoff_flow','cutoff_delay','cutoff_time',
+                                                    'settle_time','duration','sample_count','sample_period',
+                                                    'in_flight_time','streamed'])
+MettlerToledoDosingResult.__doc__ = '''
+Returned by MettlerToledoDosingController.dose(). Weights are in the
+balance unit, times in seconds from the start of the run except
+cutoff_delay (age of the newest sample when cutoff was called) and
+sample_period (mean time between samples). overshoot is final_weight
+- target, negative when the run stopped short. in_flight_time is the
+correction used for this run.
+'''
+
+
+class MettlerToledoDosingController(object):
+    '''
+    Fills to a target weight by calling cutoff (closing a valve,
+    stopping a pump) early enough for the material still in flight to
+    land on the target. Reads the streamed samples when the balance
+    supports SIR, polls SI otherwise, estimates the flow rate from the
+    samples of the last flow_window seconds and calls cutoff when
+
+    weight + flow*(sample age + in_flight_time) >= target
+
+    waiting out the time to that point when it comes before the next
+    sample. in_flight_time starts at lead_time and is corrected by
+    learning_rate times the overshoot of every run, divided by the
+    flow at cutoff. The final weight is read with
+    wait_for_stable_weight(settle_tolerance).
+
+    Example Usage:
+
+    controller = MettlerToledoDosingController(dev,cutoff=valve.close,start=valve.open)
+    result = controller.dose(25.0)
+    result.overshoot
+    0.0031
+    controller.get_in_flight_time()
+    0.062
+    controller.stats()['overshoot_mean']
+    0.0012
+    '''
+    _FLOW_MIN_SAMPLES = 3
+    _READ_TIMEOUT = 1.0
+
+    def __init__(self,dev,cutoff,start=None,lead_time=0.0,learning_rate=0.5,flow_window=0.25,
+                 settle_tolerance=0.001,settle_window=0.3,settle_timeout=5.0,timeout=60.0,
+                 use_stream=None,history_size=100,debug=False):
+        self.device = dev
+        self.cutoff = cutoff
+        self.start = start
+        self.learning_rate = learning_rate
+        self.flow_window = flow_window
+        self.settle_tolerance = settle_tolerance
+        self.settle_window = settle_window
+        self.settle_timeout = settle_timeout
+        self.timeout = timeout
+        self.use_stream = use_stream
+        self.debug = debug
+        self._in_flight_time = lead_time
+        self._results = collections.deque(maxlen=history_size)
+        self._lock = threading.Lock()
+
+    def _debug_print(self, *args):
+        if self.debug:
+            print(*args)
+
+    def get_in_flight_time(self):
+        '''
+        Returns the seconds of flow still landing after cutoff, as
+        learned from the previous runs.
+        '''
+        return self._in_flight_time
+
+    def set_in_flight_time(self,in_flight_time):
+        self._in_flight_time = in_flight_time
+
+    def _use_stream(self):
+        dev = self.device
+        if dev.is_streaming():
+            return True
+        if self.use_stream is not None:
+            return self.use_stream
+        try:
+            return dev.supports_command('SIR')
+        except MettlerToledoError:
+            return False
+
+    def _iter_polled_samples(self):
+        dev = self.device
+        while True:
+            weight, unit, status = dev.get_weight()
+            yield weight, status, time.monotonic()
+
+    def _iter_streamed_samples(self):
+        for sample in self.device.iter_samples(timeout=self._READ_TIMEOUT):
+            yield sample.weight, sample.status, sample.timestamp
+
+    def dose(self,target):
+        '''
+        Calls start, reads the weight until it is predicted to land on
+        target (net weight in the balance unit), calls cutoff and waits
+        for the weight to settle. Returns a MettlerToledoDosingResult.
+        cutoff is also called when the balance reports overload, the
+        samples stop or timeout seconds pass, then MettlerToledoError
+        is raised.
+        '''
+        with self._lock:
+            return self._dose(target)
+
+    def _dose(self,target):
+        dev = self.device
+        streamed = self._use_stream()
+        started_stream = streamed and not dev.is_streaming()
+        if started_stream:
+            dev.start_stream()
+        try:
+            if streamed:
+                samples = self._iter_streamed_samples()
+            else:
+                samples = self._iter_polled_samples()
+            in_flight_time = self._in_flight_time
+            t_start = time.monotonic()
+            cutoff = self._run(target,samples,in_flight_time,t_start)
+            final_weight, settled = self._settle(cutoff[1])
+            t_end = time.monotonic()
+        finally:
+            if started_stream:
+                dev.stop_stream()
+        t_cutoff, cutoff_weight, cutoff_flow, cutoff_delay, sample_count, sample_period = cutoff
+        overshoot = final_weight - target
+        result = MettlerToledoDosingResult(target,
+                                           final_weight,
+                                           overshoot,
+                                           settled,
+                                           cutoff_weight,
+                                           cutoff_flow,
+                                           cutoff_delay,
+                                           t_cutoff - t_start,
+                                           t_end - t_cutoff,
+                                           t_end - t_start,
+                                           sample_count,
+                                           sample_period,
+                                           in_flight_time,
+                                           streamed)
+        self._learn(result)
+        self._results.append(result)
+        self._debug_print('dosing result', result)
+        return result
+
+    def _run(self,target,samples,in_flight_time,t_start):
+        '''
+        Reads samples until cutoff. Returns (cutoff time, newest
+        weight, flow, sample age at cutoff, sample count, mean sample
+        period). cutoff is called on every way out.
+        '''
+        window = collections.deque()
+        flow = 0.0
+        sample_count = 0
+        sample_period = 0.0
+        t_first = None
+        cut = False
+        try:
+            if self.start is not None:
+                self.start()
+            for weight, status, timestamp in samples:
+                if status in ('+','-'):
+                    raise MettlerToledoError('Balance out of range while dosing.')
+                if (timestamp - t_start) >= self.timeout:
+                    raise MettlerToledoError('Target not reached after {0} s.'.format(self.timeout))
+                if weight is None:
+                    continue
+                sample_count += 1
+                if t_first is None:
+                    t_first = timestamp
+                else:
+                    sample_period = (timestamp - t_first)/(sample_count - 1)
+                window.append((timestamp,weight))
+                while (timestamp - window[0][0]) > self.flow_window:
+                    window.popleft()
+                if len(window) >= self._FLOW_MIN_SAMPLES:
+                    flow = max(_get_slope([t for t, w in window],[w for t, w in window]),0.0)
+                landing = weight + flow*((time.monotonic() - timestamp) + in_flight_time)
+                if landing < target:
+                    if flow <= 0:
+                        continue
+                    # cut between samples when the next one would be too late
+                    remaining = (target - landing)/flow
+                    if remaining >= sample_period:
+                        continue
+                    time.sleep(remaining)
+                cut = True
+                self.cutoff()
+                t_cutoff = time.monotonic()
+                return t_cutoff, weight, flow, t_cutoff - timestamp, sample_count, sample_period
+            raise MettlerToledoError('Samples stopped while dosing.')
+        finally:
+            if not cut:
+                self.cutoff()
+
+    def _settle(self,weight):
+        try:
+            final_weight, unit = self.device.wait_for_stable_weight(self.settle_tolerance,
+                                                                    window=self.settle_window,
+                                                                    timeout=self.settle_timeout)
+            return final_weight, True
+        except MettlerToledoStabilityError as e:
+            self._debug_print('not settled', e)
+        try:
+            final_weight = self.device.get_weight()[0]
+        except MettlerToledoError:
+            final_weight = None
+        if final_weight is None:
+            final_weight = weight
+        return final_weight, False
+
+    def _learn(self,result):
+        if (not result.settled) or (result.cutoff_flow <= 0) or (self.learning_rate <= 0):
+            return
+        in_flight_time = result.in_flight_time + self.learning_rate*result.overshoot/result.cutoff_flow
+        self._in_flight_time = max(in_flight_time,0.0)
+
+    def get_results(self):
+        '''
+        Returns the MettlerToledoDosingResults of the recent runs.
+        '''
+        return list(self._results)
+
+    def stats(self):
+        '''
+        Returns a dict with the run count, overshoot mean/std/min/max,
+        absolute overshoot mean, mean cutoff time, settle time and
+        duration, mean sample period and cutoff delay of the recent
+        runs, and the learned in_flight_time. Returns None before the
+        first run.
+        '''
+        results = list(self._results)
+        if not results:
+            return None
+        count = len(results)
+        overshoots = [result.overshoot for result in results]
+        overshoot_mean = sum(overshoots)/count
+        if count > 1:
+            overshoot_std = math.sqrt(sum((o - overshoot_mean)**2 for o in overshoots)/(count - 1))
+        else:
+            overshoot_std = 0.0
+        def mean(field):
+            return sum(getattr(result,field) for result in results)/count
+        return {'count': count,
+                'overshoot_mean': overshoot_mean,
+                'overshoot_std': overshoot_std,
+                'overshoot_min': min(overshoots),
+                'overshoot_max': max(overshoots),
+                'overshoot_abs_mean': sum(abs(o) for o in overshoots)/count,
+                'cutoff_time_mean': mean('cutoff_time'),
+                'cutoff_delay_mean': mean('cutoff_delay'),
+                'settle_time_mean': mean('settle_time'),
+                'duration_mean': mean('duration'),
+                'sample_period_mean': mean('sample_period'),
+                'in_flight_time': self._in_flight_time,
+                }
+
+    def reset_stats(self):
+        self._results.clear()
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division
+import abc
+import collections
+
+
+MettlerToledoEvent = collections.namedtuple('MettlerToledoEvent',['kind','sample','reference'])
+MettlerToledoEvent.__doc__ = '''
+Passed to subscription callbacks. kind is 'rising' or 'falling' for
+thresholds, 'change' for deltas, 'overload', 'underload' or 'in range'
+for range changes and 'sample' for every sample. sample is the
+MettlerToledoSample that triggered the event, reference the threshold
+or the weight of the previous change event.
+'''
+
+
+class MettlerToledoSubscription(abc.ABC):
+    '''
+    Base class of the subscriptions added with the on_* methods of
+    MettlerToledoDevice. evaluate() is called with every streamed
+    sample from the reader thread and returns a MettlerToledoEvent
+    or None. A condition must hold for debounce seconds before its
+    event fires.
+    '''
+    def __init__(self,callback,debounce=0.0):
+        self.callback = callback
+        self.debounce = debounce
+        self._pending_since = None
+
+    def _debounced(self,condition,timestamp):
+        if not condition:
+            self._pending_since = None
+            return False
+        if self._pending_since is None:
+            self._pending_since = timestamp
+        return (timestamp - self._pending_since) >= self.debounce
+
+    def reset(self):
+        self._pending_since = None
+
+    @abc.abstractmethod
+    def evaluate(self,sample):
+        '''
+        Returns the MettlerToledoEvent triggered by sample or None.
+        '''
+
+
+class _SampleSubscription(MettlerToledoSubscription):
+    def evaluate(self,sample):
+        return MettlerToledoEvent('sample',sample,None)
+
+
+class _ThresholdSubscription(MettlerToledoSubscription):
+    def __init__(self,threshold,callback,direction='both',hysteresis=0.0,debounce=0.0):
+        if direction not in ('rising','falling','both'):
+            raise ValueError('direction must be rising, falling or both')
+        super(_ThresholdSubscription,self).__init__(callback,debounce)
+        self.threshold = threshold
+        self.direction = direction
+        self.hysteresis = abs(hysteresis)
+        self._above = None
+
+    def reset(self):
+        super(_ThresholdSubscription,self).reset()
+        self._above = None
+
+    def evaluate(self,sample):
+        weight = sample.weight
+        if weight is None:
+            self._pending_since = None
+            return None
+        if self._above is None:
+            # the first sample only sets the side, it is not a crossing
+            self._above = weight >= self.threshold
+            return None
+        if self._above:
+            crossed = weight < (self.threshold - self.hysteresis)
+        else:
+            crossed = weight >= (self.threshold + self.hysteresis)
+        if not self._debounced(crossed,sample.timestamp):
+            return None
+        self._pending_since = None
+        self._above = not self._above
+        if self._above:
+            kind = 'rising'
+        else:
+            kind = 'falling'
+        if self.direction in (kind,'both'):
+            return MettlerToledoEvent(kind,sample,self.threshold)
+        return None
+
+
+class _ChangeSubscription(MettlerToledoSubscription):
+    def __init__(self,delta,callback,debounce=0.0):
+        super(_ChangeSubscription,self).__init__(callback,debounce)
+        self.delta = abs(delta)
+        self._reference = None
+
+    def reset(self):
+        super(_ChangeSubscription,self).reset()
+        self._reference = None
+
+    def evaluate(self,sample):
+        weight = sample.weight
+        if weight is None:
+            self._pending_since = None
+            return None
+        if self._reference is None:
+            self._reference = weight
+            return None
+        if not self._debounced(abs(weight - self._reference) >= self.delta,sample.timestamp):
+            return None
+        self._pending_since = None
+        reference = self._reference
+        self._reference = weight
+        return MettlerToledoEvent('change',sample,reference)
+
+
+class _RangeSubscription(MettlerToledoSubscription):
+    _KINDS = {'+': 'overload',
+              '-': 'underload',
+              }
+
+    def __init__(self,callback,debounce=0.0,in_range=False):
+        super(_RangeSubscription,self).__init__(callback,debounce)
+        self.in_range = in_range
+        self._kind = None
+
+    def reset(self):
+        super(_RangeSubscription,self).reset()
+        self._kind = None
+
+    def evaluate(self,sample):
+        if sample.status == 'I':
+            return None
+        kind = self._KINDS.get(sample.status,'in range')
+        if self._kind is None:
+            self._kind = 'in range'
+        if not self._debounced(kind != self._kind,sample.timestamp):
+            return None
+        self._pending_since = None
+        self._kind = kind
+        if (kind == 'in range') and not self.in_range:
+            return None
+        return MettlerToledoEvent(kind,sample,None)
+
+
+class MettlerToledoSubscriptions(object):
+    '''
+    Subscriptions of one device, dispatched by the stream reader
+    thread. Adding and removing replaces the tuple so the reader
+    iterates without locking.
+    '''
+    def __init__(self,debug=False):
+        self.debug = debug
+        self._subscriptions = ()
+
+    def _debug_print(self, *args):
+        if self.debug:
+            print(*args)
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def add(self,subscription):
+        self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def remove(self,subscription):
+        self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+    def clear(self):
+        self._subscriptions = ()
+
+    def reset(self):
+        for subscription in self._subscriptions:
+            subscription.reset()
+
+    def dispatch(self,sample):
+        for subscription in self._subscriptions:
+            try:
+                event = subscription.evaluate(sample)
+                if event is not None:
+                    subscription.callback(event)
+            except Exception as e:
+                self._debug_print('subscription error', e)
@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+'''
+TCP gateway that shares MettlerToledoDevices with many clients.
+
+Each client connection speaks either line delimited JSON or raw
+MT-SICS, decided per line by whether it starts with '{'.
+
+JSON requests and replies:
+
+{"id": 1, "method": "get_weight"}
+{"id": 1, "result": [-0.68, "g", "S"]}
+{"id": 2, "method": "get_serial_number", "device": 1}
+{"id": 3, "method": "subscribe"}
+{"sample": {"device": 0, "weight": -0.68, "unit": "g", "status": "S", "timestamp": 1234.56, "sequence": 42}}
+
+Raw MT-SICS lines are answered with the reply lines of the balance,
+SIR and SR subscribe to the shared stream and any other command
+unsubscribes. @ resets the balance through reset(), COM and the other
+commands that change the serial link are rejected with EL.
+
+Concurrent JSON weight reads are coalesced with get_weight(max_age)
+and all subscribers share one stream per balance, so the serial
+traffic does not grow with the number of clients. While a balance is
+streaming, weight reads are answered from the stream and other
+commands pause it.
+
+Usage:
+
+mettler-toledo-gateway --port /dev/ttyUSB0 --listen-port 8001
+python -m mettler_toledo_device.gateway --listen-host 0.0.0.0
+'''
+from __future__ import print_function, division
+import argparse
+import json
+import queue
+import socketserver
+import threading
+
+from .response import MettlerToledoError
+from .commands import COMMANDS
+from .mettler_toledo_device import MettlerToledoDevice, MettlerToledoDevices
+
+
+DEFAULT_PORT = 8001
+# seconds a weight read for one client is reused for the others
+DEFAULT_MAX_AGE = 0.05
+CLIENT_QUEUE_SIZE = 1024
+
+# methods JSON clients may call, with the method called on the device:
+# the MT-SICS commands of the registry and a few device methods
+_METHODS = dict((command.method,command.method) for command in COMMANDS)
+_METHODS.update({'get_device_info': 'get_device_info',
+                 'wait_for_stable_weight': 'wait_for_stable_weight',
+                 })
+# device methods that read the stream instead of pausing it
+_STREAM_METHODS = frozenset(['get_weight','wait_for_stable_weight'])
+
+# raw commands that would change the serial link or the repeat mode
+# under the other clients
+_LINK_COMMANDS = frozenset(['COM','PWR','SIRU','SRU','SNR','SNRU'])
+
+
+def _decode_line(line):
+    return line.decode('ascii','replace').rstrip('\r\n')
+
+
+class _GatewayRequestHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        socketserver.StreamRequestHandler.setup(self)
+        self.gateway = self.server.gateway
+        self.outgoing = queue.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.dropped = 0
+        self.raw_subscription = False
+        self.subscriptions = set()
+        self._writer = threading.Thread(target=self._write_outgoing)
+        self._writer.daemon = True
+        self._writer.start()
+
+    def send(self,line):
+        try:
+            self.outgoing.put_nowait(line)
+        except queue.Full:
+            # a slow client loses samples instead of slowing the others
+            self.dropped += 1
+
+    def send_sample(self,index,sample,line):
+        if self.raw_subscription:
+            self.send(_decode_line(line))
+        else:
+            message = sample._asdict()
+            message['device'] = index
+            self.send(json.dumps({'sample': message}))
+
+    def _write_outgoing(self):
+        while True:
+            line = self.outgoing.get()
+            if line is None:
+                return
+            try:
+                self.wfile.write((line + '\r\n').encode())
+                self.wfile.flush()
+            except (OSError, ValueError):
+                return
+
+    def handle(self):
+        try:
+            self._handle_lines()
+        except (OSError, ValueError):
+            # the client went away
+            pass
+
+    def _handle_lines(self):
+        for line in self.rfile:
+            line = line.decode('ascii','replace').strip()
+            if not line:
+                continue
+            self.gateway._debug_print('client', self.client_address, line)
+            if line.startswith('{'):
+                self.send(self.gateway._handle_json(self,line))
+            else:
+                for reply in self.gateway._handle_raw(self,line):
+                    self.send(reply)
+
+    def finish(self):
+        for index in list(self.subscriptions):
+            self.gateway._unsubscribe(self,index)
+        self.outgoing.put(None)
+        self._writer.join(1.0)
+        socketserver.StreamRequestHandler.finish(self)
+
+
+class _GatewayServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class MettlerToledoGateway(object):
+    '''
+    Serves one MettlerToledoDevice, or every device of a
+    MettlerToledoDevices, to many TCP clients. See the module
+    docstring for the protocol.
+
+    Example Usage:
+
+    dev = MettlerToledoDevice()
+    gateway = MettlerToledoGateway(dev,port=8001)
+    gateway.start()  # serves from a background thread
+    gateway.stop()
+    '''
+    def __init__(self,devices,host='127.0.0.1',port=DEFAULT_PORT,max_age=DEFAULT_MAX_AGE,debug=False):
+        if isinstance(devices,MettlerToledoDevice):
+            devices = [devices]
+        self.devices = list(devices)
+        self.max_age = max_age
+        self.debug = debug
+        self._lock = threading.Lock()
+        # held while a device stream is started, stopped or paused,
+        # taken before _lock when both are needed
+        self._device_locks = [threading.Lock() for dev in self.devices]
+        self._subscribers = {}
+        self._fanouts = {}
+        # indexes of the devices the gateway started streaming
+        self._started_streams = set()
+        self._server = _GatewayServer((host,port),_GatewayRequestHandler)
+        self._server.gateway = self
+        self._thread = None
+        self._serving = False
+
+    def _debug_print(self, *args):
+        if self.debug:
+            print(*args)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self,*exc_info):
+        self.stop()
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def serve_forever(self):
+        self._serving = True
+        try:
+            self._server.serve_forever()
+        finally:
+            self._serving = False
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self.address
+
+    def stop(self):
+        if self._serving:
+            self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            fanouts = [(index,self._fanouts.pop(index)) for index in list(self._fanouts)]
+            self._subscribers.clear()
+        for index, subscription in fanouts:
+            self._stop_fanout(index,subscription)
+
+    def _get_device_index(self,device):
+        if device is None:
+            return 0
+        if isinstance(device,int):
+            if 0 <= device < len(self.devices):
+                return device
+        else:
+            for index, dev in enumerate(self.devices):
+                if dev.get_serial_number() == str(device):
+                    return index
+        raise MettlerToledoError('Unknown device: {0}'.format(device))
+
+    def _subscribe(self,client,index):
+        dev = self.devices[index]
+        with self._lock:
+            subscribers = self._subscribers.setdefault(index,set())
+            subscribers.add(client)
+            client.subscriptions.add(index)
+            if index in self._fanouts:
+                return
+            def fanout(event):
+                line = dev.latest_line()
+                for subscriber in tuple(self._subscribers.get(index,())):
+                    subscriber.send_sample(index,event.sample,line)
+            subscription = self._fanouts[index] = dev.on_sample(fanout)
+        # the balance is not waited for with _lock held, other clients
+        # keep being served meanwhile
+        try:
+            with self._device_locks[index]:
+                if self._fanouts.get(index) is not subscription:
+                    # every subscriber left meanwhile
+                    return
+                if not dev.is_streaming():
+                    dev.start_stream()
+                    with self._lock:
+                        self._started_streams.add(index)
+        except Exception:
+            with self._lock:
+                if self._fanouts.get(index) is subscription:
+                    del self._fanouts[index]
+                    for subscriber in self._subscribers.pop(index,()):
+                        subscriber.subscriptions.discard(index)
+            dev.remove_subscription(subscription)
+            raise
+
+    def _unsubscribe(self,client,index):
+        with self._lock:
+            client.subscriptions.discard(index)
+            subscribers = self._subscribers.get(index)
+            if subscribers is None:
+                return
+            subscribers.discard(client)
+            if subscribers:
+                return
+            del self._subscribers[index]
+            subscription = self._fanouts.pop(index,None)
+        self._stop_fanout(index,subscription)
+
+    def _stop_fanout(self,index,subscription):
+        if subscription is None:
+            return
+        dev = self.devices[index]
+        dev.remove_subscription(subscription)
+        with self._device_locks[index]:
+            with self._lock:
+                if (index in self._fanouts) or (index not in self._started_streams):
+                    # subscribed again meanwhile, or streaming was
+                    # started by the device owner
+                    return
+                self._started_streams.discard(index)
+            try:
+                dev.stop_stream()
+            except Exception as e:
+                self._debug_print('stop stream error', e)
+
+    def _call_paused(self,index,function,*args,**kwargs):
+        '''
+        Calls function(*args,**kwargs) with the stream of device index
+        stopped and started again afterwards, so commands are served
+        while clients are subscribed.
+        '''
+        dev = self.devices[index]
+        with self._device_locks[index]:
+            stream_config = dev.get_stream_config()
+            if not dev.is_streaming():
+                return function(*args,**kwargs)
+            dev.stop_stream()
+            try:
+                return function(*args,**kwargs)
+            finally:
+                if stream_config is not None:
+                    dev.start_stream(*stream_config)
+
+    def _get_weight(self,dev,max_age=None):
+        if max_age is None:
+            max_age = self.max_age
+        return dev.get_weight(max_age=max_age)
+
+    def _call(self,client,method,params,device):
+        index = self._get_device_index(device)
+        dev = self.devices[index]
+        if method == 'get_weight':
+            return self._get_weight(dev,**params)
+        elif method == 'subscribe':
+            self._subscribe(client,index)
+            return True
+        elif method == 'unsubscribe':
+            self._unsubscribe(client,index)
+            return True
+        elif method == 'list_devices':
+            return [dev.get_port() for dev in self.devices]
+        name = _METHODS.get(method)
+        if name is None:
+            raise MettlerToledoError('Unknown method: {0}'.format(method))
+        if name in _STREAM_METHODS:
+            return getattr(dev,name)(**params)
+        return self._call_paused(index,getattr(dev,name),**params)
+
+    def _handle_json(self,client,line):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            result = self._call(client,
+                                request.get('method'),
+                                request.get('params') or {},
+                                request.get('device'))
+            return json.dumps({'id': request_id,'result': result})
+        except MettlerToledoError as e:
+            error = e.value
+        except Exception as e:
+            error = '{0}: {1}'.format(type(e).__name__,e)
+        return json.dumps({'id': request_id,'error': error})
+
+    def _handle_raw(self,client,line):
+        '''
+        Returns the reply lines to one raw MT-SICS command, sent to the
+        first device.
+        '''
+        command = line.split()[0]
+        if client.raw_subscription:
+            client.raw_subscription = False
+            self._unsubscribe(client,0)
+        dev = self.devices[0]
+        try:
+            if command in ('SIR','SR'):
+                client.raw_subscription = True
+                self._subscribe(client,0)
+                return []
+            elif command in _LINK_COMMANDS:
+                return ['EL']
+            elif command == '@':
+                # through reset() so the cached device info is cleared
+                def reset():
+                    dev.reset()
+                    return dev.get_serial_number()
+                return ['I4 A "{0}"'.format(self._call_paused(0,reset))]
+            elif (command == 'SI') and dev.is_streaming():
+                line = dev.latest_line()
+                if line is not None:
+                    return [_decode_line(line)]
+            lines = self._call_paused(0,dev._send_request_get_lines,line)
+            return [_decode_line(line) for line in lines]
+        except MettlerToledoError as e:
+            if e.reply_id in ('ES','ET','EL'):
+                return [e.reply_id]
+            return ['EL']
+        except Exception as e:
+            self._debug_print('raw request error', e)
+            return ['ET']
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Share Mettler Toledo balances over TCP.')
+    parser.add_argument('--port',action='append',help='balance serial port, may be repeated, all balances found are used when omitted')
+    parser.add_argument('--listen-host',default='127.0.0.1',help='address to listen on')
+    parser.add_argument('--listen-port',type=int,default=DEFAULT_PORT,help='TCP port to listen on')
+    parser.add_argument('--max-age',type=float,default=DEFAULT_MAX_AGE,help='seconds a weight is shared between clients')
+    parser.add_argument('--debug',action='store_true')
+    args = parser.parse_args(args)
+    if args.port:
+        devices = MettlerToledoDevices(use_ports=args.port,debug=args.debug)
+    else:
+        devices = MettlerToledoDevices(debug=args.debug)
+    gateway = MettlerToledoGateway(devices,
+                                   host=args.listen_host,
+                                   port=args.listen_port,
+                                   max_age=args.max_age,
+                                   debug=args.debug)
+    print('Serving {0} balance(s) on {1}:{2}'.format(len(devices),*gateway.address))
+    try:
+        gateway.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        devices.close()
+
+
+# -----------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division
+import bisect
+import threading
+import collections
+
+
+MettlerToledoRequestEvent = collections.namedtuple('MettlerToledoRequestEvent',
+                                                   ['port','command','latency','throttle','bytes_out','bytes_in','error'])
+MettlerToledoRequestEvent.__doc__ = '''
+Passed to request hooks after every request. latency is the seconds
+from writing the request until the reply was read, throttle the part
+of it spent waiting for write_write_delay, error the exception raised
+by the exchange or None.
+'''
+
+# upper bounds in seconds, the last bucket counts everything slower
+LATENCY_BUCKETS = (0.001,0.002,0.005,0.01,0.02,0.05,0.1,0.2,0.5,1.0,2.0,5.0)
+
+
+class _CommandStats(object):
+    __slots__ = ('count','error_count','timeout_count','errors',
+                 'latency_total','latency_min','latency_max','histogram',
+                 'throttled_count','throttle_total','bytes_out','bytes_in')
+
+    def __init__(self):
+        self.count = 0
+        self.error_count = 0
+        self.timeout_count = 0
+        self.errors = {}
+        self.latency_total = 0.0
+        self.latency_min = None
+        self.latency_max = None
+        self.histogram = [0]*(len(LATENCY_BUCKETS) + 1)
+        self.throttled_count = 0
+        self.throttle_total = 0.0
+        self.bytes_out = 0
+        self.bytes_in = 0
+
+    def as_dict(self):
+        if self.count > 0:
+            latency_mean = self.latency_total/self.count
+        else:
+            latency_mean = None
+        return {'count': self.count,
+                'error_count': self.error_count,
+                'timeout_count': self.timeout_count,
+                'errors': dict(self.errors),
+                'latency_mean': latency_mean,
+                'latency_min': self.latency_min,
+                'latency_max': self.latency_max,
+                'latency_histogram': list(zip(LATENCY_BUCKETS + (None,),self.histogram)),
+                'throttled_count': self.throttled_count,
+                'throttle_total': self.throttle_total,
+                'bytes_out': self.bytes_out,
+                'bytes_in': self.bytes_in,
+                }
+
+
+class MettlerToledoStats(object):
+    '''
+    Per command request counters, latency histogram, error counts by
+    error class, write_write_delay throttling and bytes in/out.
+    '''
+    def __init__(self,timeout_errors=()):
+        self._timeout_errors = tuple(timeout_errors)
+        self._lock = threading.Lock()
+        self._commands = {}
+
+    def record(self,event):
+        with self._lock:
+            stats = self._commands.get(event.command)
+            if stats is None:
+                stats = self._commands[event.command] = _CommandStats()
+            stats.count += 1
+            latency = event.latency
+            stats.latency_total += latency
+            if (stats.latency_min is None) or (latency < stats.latency_min):
+                stats.latency_min = latency
+            if (stats.latency_max is None) or (latency > stats.latency_max):
+                stats.latency_max = latency
+            stats.histogram[bisect.bisect_left(LATENCY_BUCKETS,latency)] += 1
+            if event.throttle > 0:
+                stats.throttled_count += 1
+                stats.throttle_total += event.throttle
+            stats.bytes_out += event.bytes_out
+            stats.bytes_in += event.bytes_in
+            if event.error is not None:
+                stats.error_count += 1
+                error_class = type(event.error).__name__
+                stats.errors[error_class] = stats.errors.get(error_class,0) + 1
+                if isinstance(event.error,self._timeout_errors):
+                    stats.timeout_count += 1
+
+    def reset(self):
+        with self._lock:
+            self._commands = {}
+
+    def as_dict(self):
+        '''
+        Returns a dict mapping each command to a dict of its counters.
+        '''
+        with self._lock:
+            return dict((command,stats.as_dict()) for command, stats in self._commands.items())
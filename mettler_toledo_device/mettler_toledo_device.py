@@ -5,36 +5,100 @@ import time
 import atexit
 import platform
 import os
-try:
-    from exceptions import Exception
-except ImportError:
-    pass
+import concurrent.futures
+import threading
+import collections
+from timeit import default_timer
 
-from serial_interface import SerialInterface, SerialInterfaces, find_serial_interface_ports, WriteFrequencyError
+from serial_interface import SerialInterface, find_serial_interface_ports, WriteError, ReadError
 
-try:
-    from pkg_resources import get_distribution, DistributionNotFound
-    _dist = get_distribution('mettler_toledo_device')
+from .response import (MettlerToledoError,
+                       parse_response,
+                       COM_BAUDRATE_CODES,
+                       _handle_inquiry_response)
+from .commands import get_command, install_command_methods, _RAISE
+from .stream import MettlerToledoStreamReader, MettlerToledoSample
+from .instrumentation import MettlerToledoStats, MettlerToledoRequestEvent
+from .pipeline import MettlerToledoPipeline, _PipelineResponseError
+from .stability import MettlerToledoStabilityDetector, MettlerToledoStabilityError
+from .events import (MettlerToledoSubscriptions,
+                     _SampleSubscription,
+                     _ThresholdSubscription,
+                     _ChangeSubscription,
+                     _RangeSubscription)
+
+def _get_version():
+    # looked up on first access, see __getattr__, importing
+    # pkg_resources takes longer than the rest of the package
+    try:
+        from importlib import metadata
+    except ImportError:
+        metadata = None
+    try:
+        if metadata is not None:
+            try:
+                _dist = metadata.distribution('mettler_toledo_device')
+            except metadata.PackageNotFoundError:
+                return None
+            dist_loc = os.path.normcase(str(_dist.locate_file('')))
+        else:
+            from pkg_resources import get_distribution, DistributionNotFound
+            try:
+                _dist = get_distribution('mettler_toledo_device')
+            except DistributionNotFound:
+                return None
+            dist_loc = os.path.normcase(_dist.location)
+    except ImportError:
+        return None
     # Normalize case for Windows systems
-    dist_loc = os.path.normcase(_dist.location)
     here = os.path.normcase(__file__)
     if not here.startswith(os.path.join(dist_loc, 'mettler_toledo_device')):
         # not installed, but there is another version that *is*
-        raise DistributionNotFound
-except (ImportError,DistributionNotFound):
-    __version__ = None
-else:
-    __version__ = _dist.version
+        return None
+    return _dist.version
+
+def __getattr__(name):
+    if name == '__version__':
+        global __version__
+        __version__ = _get_version()
+        return __version__
+    raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__,name))
 
 
 DEBUG = False
 BAUDRATE = 9600
+# tried in this order when baudrate is 'auto', most common settings first
+BAUDRATES = (9600,19200,38400,4800,2400,57600,115200,1200,600,300)
+AUTO_BAUDRATE_READY_TIMEOUT = 0.25
+DISCOVERY_MAX_WORKERS = 16
+DISCOVERY_TIMEOUT = 5.0
+
+# port -> baudrate found by auto detection or negotiation, tried first
+# the next time the port is opened with baudrate 'auto'
+_detected_baudrates = {}
+
+def _is_auto_baudrate(baudrate):
+    return str(baudrate).lower() == 'auto'
+
+def _get_baudrate_candidates(port):
+    baudrate = _detected_baudrates.get(port)
+    if baudrate is None:
+        return list(BAUDRATES)
+    return [baudrate] + [b for b in BAUDRATES if b != baudrate]
+
+def get_detected_baudrate(port):
+    '''
+    Returns the baudrate last detected or negotiated on port or None.
+    '''
+    return _detected_baudrates.get(port)
+
 
-class MettlerToledoError(Exception):
-    def __init__(self,value):
-        self.value = value
-    def __str__(self):
-        return repr(self.value)
+MettlerToledoBaudrateReport = collections.namedtuple('MettlerToledoBaudrateReport',
+                                                     ['port','baudrate_before','baudrate_after','latency_before','latency_after'])
+MettlerToledoBaudrateReport.__doc__ = '''
+Returned by MettlerToledoDevice.negotiate_baudrate(). latency_before
+and latency_after are the median SI exchange times in seconds.
+'''
 
 class MettlerToledoDevice(object):
     '''
@@ -51,26 +115,62 @@ class MettlerToledoDevice(object):
     dev = MettlerToledoDevice(port='/dev/ttyUSB0') # Linux specific port
     dev = MettlerToledoDevice(port='/dev/tty.usbmodem262471') # Mac OS X specific port
     dev = MettlerToledoDevice(port='COM3') # Windows specific port
-    dev.get_serial_number()
+    dev.ready_time  # seconds until the balance answered after opening the port
+    0.021
+    dev.get_serial_number()  # identity inquiries are cached until reset()
     1126493049
+    dev.supports_command('SIR')
+    True
     dev.get_balance_data()
     ['XS204', 'Excellence', '220.0090', 'g']
     dev.get_weight_stable()
     [-0.0082, 'g'] #if weight is stable
     None  #if weight is dynamic
+    dev.wait_for_stable_weight(tolerance=0.0005,window=0.2,timeout=2.0)
+    [-0.0082, 'g'] # as soon as the last 200 ms are within tolerance
     dev.get_weight()
     [-0.6800, 'g', 'S'] #if weight is stable
     [-0.6800, 'g', 'D'] #if weight is dynamic
+    dev.get_weight(max_age=0.1) # reuses a weight read in the last 100 ms
+    [-0.6800, 'g', 'S']
     dev.zero_stable()
     True  #zeros if weight is stable
     False  #does not zero if weight is not stable
     dev.zero()
     'S'   #zeros if weight is stable
     'D'   #zeros if weight is dynamic
+    dev.tare_stable()
+    [12.5004, 'g']  # tare weight, the net weight is now 0
+    dev.set_tare_weight(2.5,'g')
+    [2.5, 'g']
+    dev.clear_tare()
+    True
+    dev.calibrate_internal()  # blocks until the calibration is done
+    True
+    dev.enable_stats()  # or MettlerToledoDevice(stats=True)
+    dev.stats()['SI']['latency_mean']
+    0.0521
+    dev.pipeline().zero().get_weight().get_serial_number().execute()  # one batch, replies matched in order
+    ['S', [0.0, 'g', 'S'], '1126493049']
+    dev.start_stream()  # balance pushes every weight value (SIR)
+    dev.latest()
+    MettlerToledoSample(weight=-0.68, unit='g', status='D', timestamp=1234.56, sequence=42)
+    for sample in dev.iter_samples(timeout=1.0):
+        print(sample.weight)
+    dev.on_threshold(50.0,lambda event: print(event.kind),hysteresis=0.5,debounce=0.02)
+    dev.on_overload(lambda event: print(event.kind))  # callbacks run for each streamed sample
+    dev.stop_stream()
     '''
     _TIMEOUT = 0.05
     _WRITE_WRITE_DELAY = 0.05
-    _RESET_DELAY = 2.0
+    _READY_TIMEOUT = 2.0
+    _READY_RETRY_DELAY = 0.05
+    _READY_READ_ATTEMPTS = 4
+    _STREAM_BUFFER_SIZE = 1024
+    _READ_ATTEMPTS = 100
+    _PIPELINE_DEPTH = 4
+    _PIPELINE_MIN_SPACING = 0.0
+    _PIPELINE_MAX_SPACING = 0.2
 
     def __init__(self,*args,**kwargs):
         if 'debug' in kwargs:
@@ -82,6 +182,12 @@ class MettlerToledoDevice(object):
             try_ports = kwargs.pop('try_ports')
         else:
             try_ports = None
+        ready_timeout = kwargs.pop('ready_timeout',self._READY_TIMEOUT)
+        stats = kwargs.pop('stats',False)
+        cache_device_info = kwargs.pop('cache_device_info',False)
+        model_number = kwargs.pop('model_number',None)
+        serial_number = kwargs.pop('serial_number',None)
+        auto_baudrate = _is_auto_baudrate(kwargs.get('baudrate'))
         if 'baudrate' not in kwargs:
             kwargs.update({'baudrate': BAUDRATE})
         elif (kwargs['baudrate'] is None) or (str(kwargs['baudrate']).lower() == 'default'):
@@ -92,23 +198,219 @@ class MettlerToledoDevice(object):
             kwargs.update({'write_write_delay': self._WRITE_WRITE_DELAY})
         if ('port' not in kwargs) or (kwargs['port'] is None):
             port =  find_mettler_toledo_device_port(baudrate=kwargs['baudrate'],
+                                                    model_number=model_number,
+                                                    serial_number=serial_number,
                                                     try_ports=try_ports,
                                                     debug=kwargs['debug'])
             kwargs.update({'port': port})
+        if auto_baudrate:
+            kwargs.update({'baudrate': _get_baudrate_candidates(kwargs['port'])[0]})
 
         t_start = time.time()
+        self._stream = None
+        self._lock = threading.RLock()
+        self._weight_condition = threading.Condition()
+        self._weight_cache = None
+        self._weight_cache_time = None
+        self._weight_in_flight = False
+        self._weight_generation = 0
+        self._weight_error = None
+        self._device_info = {}
+        self._subscriptions = MettlerToledoSubscriptions(debug=self.debug)
+        self._stats = None
+        self._request_hooks = []
+        self._instrumented = False
+        self._write_write_delay = kwargs['write_write_delay']
+        self._pipeline_spacing = self._write_write_delay
+        self._time_write_prev = None
+        self._request_time = None
+        # COM settings and baudrate to go back to, see restore_baudrate()
+        self._baudrate_restore = None
+        if stats:
+            self.enable_stats()
+        self._serial_args = args
+        self._serial_kwargs = kwargs
+        self._stream_config = None
         self._serial_device = SerialInterface(*args,**kwargs)
         atexit.register(self._exit_mettler_toledo_device)
-        time.sleep(self._RESET_DELAY)
+        if auto_baudrate:
+            self.ready_time = self._detect_baudrate(ready_timeout)
+        else:
+            self.ready_time = self._wait_until_ready(ready_timeout)
+        if cache_device_info and (self.ready_time is not None):
+            self.refresh_device_info()
         t_end = time.time()
         self._debug_print('Initialization time =', (t_end - t_start))
+        self._debug_print('Ready time =', self.ready_time)
 
     def _debug_print(self, *args):
         if self.debug:
             print(*args)
 
     def _exit_mettler_toledo_device(self):
-        pass
+        if self.is_streaming():
+            try:
+                self.stop_stream()
+            except Exception:
+                # the port may already be gone at exit
+                pass
+
+    def _wait_until_ready(self,timeout):
+        '''
+        Sends the serial number inquiry until the balance answers with a
+        valid reply or timeout seconds have passed. Returns the seconds
+        it took or None if the balance did not become ready.
+        '''
+        if (timeout is None) or (timeout <= 0):
+            return None
+        request = self._args_to_request('I4')
+        t_start = time.monotonic()
+        while True:
+            try:
+                response = self._serial_device.write_read(request,
+                                                          use_readline=True,
+                                                          check_write_freq=False,
+                                                          max_read_attempts=self._READY_READ_ATTEMPTS)
+                if response.startswith(b'I4 A'):
+                    # the reply carries the serial number, keep it
+                    self._device_info['I4'] = get_command('get_serial_number').handle(parse_response(response))
+                    return time.monotonic() - t_start
+                self._debug_print('not ready', response)
+            except (ReadError, WriteError, serial.SerialTimeoutException):
+                pass
+            if (time.monotonic() - t_start) >= timeout:
+                self._debug_print('Balance not ready after', timeout)
+                return None
+            time.sleep(self._READY_RETRY_DELAY)
+            # drop partial or late replies before retrying
+            self._serial_device.reset_input_buffer()
+
+    def _detect_baudrate(self,timeout):
+        '''
+        Switches the port through the candidate baudrates until the
+        balance answers or timeout seconds have passed in total.
+        Returns the seconds it took or None.
+        '''
+        if (timeout is None) or (timeout <= 0):
+            return None
+        t_start = time.monotonic()
+        for baudrate in _get_baudrate_candidates(self.get_port()):
+            remaining = timeout - (time.monotonic() - t_start)
+            if remaining <= 0:
+                break
+            self._serial_device.baudrate = baudrate
+            self._serial_device.reset_input_buffer()
+            if self._wait_until_ready(min(remaining,AUTO_BAUDRATE_READY_TIMEOUT)) is not None:
+                _detected_baudrates[self.get_port()] = baudrate
+                self._debug_print('Detected baudrate', baudrate)
+                return time.monotonic() - t_start
+        self._debug_print('No baudrate detected')
+        return None
+
+    def get_baudrate(self):
+        return self._serial_device.baudrate
+
+    def _measure_latency(self,count):
+        durations = []
+        for i in range(count):
+            # let write_write_delay pass so only the exchange is timed
+            time.sleep(self._write_write_delay)
+            t_start = time.monotonic()
+            self._get_weight()
+            durations.append(time.monotonic() - t_start)
+        durations.sort()
+        return durations[len(durations)//2]
+
+    def negotiate_baudrate(self,baudrates=None,measure_count=10):
+        '''
+        Switches the balance and the port to the highest of baudrates
+        (all COM baudrates above the current one by default) that the
+        balance accepts with the MT-SICS COM command and answers at.
+        Returns a MettlerToledoBaudrateReport with the SI latency before
+        and after.
+
+        COM changes the interface setting of the balance itself, which
+        keeps it after the port is closed and across power cycles, so
+        other software opening the balance at its old baudrate no longer
+        reaches it. Call restore_baudrate() before close() to switch it
+        back.
+        '''
+        if baudrates is None:
+            baudrates = COM_BAUDRATE_CODES.keys()
+        with self._lock:
+            self._check_not_streaming()
+            baudrate_before = self.get_baudrate()
+            latency_before = self._measure_latency(measure_count)
+            com_settings = self._get_com_settings()
+            candidates = sorted([b for b in baudrates if (b in COM_BAUDRATE_CODES) and (b > baudrate_before)],reverse=True)
+            baudrate_after = baudrate_before
+            for baudrate in candidates:
+                if self._switch_baudrate(com_settings,baudrate):
+                    baudrate_after = baudrate
+                    if self._baudrate_restore is None:
+                        self._baudrate_restore = (com_settings,baudrate_before)
+                    break
+            _detected_baudrates[self.get_port()] = baudrate_after
+            latency_after = self._measure_latency(measure_count)
+        return MettlerToledoBaudrateReport(self.get_port(),baudrate_before,baudrate_after,latency_before,latency_after)
+
+    def restore_baudrate(self):
+        '''
+        Switches the balance and the port back to the baudrate found
+        before the first negotiate_baudrate(). Returns the baudrate in
+        use afterwards.
+        '''
+        with self._lock:
+            self._check_not_streaming()
+            if self._baudrate_restore is None:
+                return self.get_baudrate()
+            com_settings, baudrate = self._baudrate_restore
+            if not self._switch_baudrate(com_settings,baudrate):
+                raise MettlerToledoError('Balance did not switch back to {0} baud.'.format(baudrate))
+            self._baudrate_restore = None
+            _detected_baudrates[self.get_port()] = baudrate
+        return baudrate
+
+    def _get_com_settings(self):
+        # COM A <port> <baudrate code> <bit/parity> <handshake>
+        fields = _handle_inquiry_response(self._send_request_get_response('COM'))
+        if len(fields) < 4:
+            raise MettlerToledoError('Unexpected COM response: {0}'.format(fields))
+        return fields[:4]
+
+    def _switch_baudrate(self,com_settings,baudrate):
+        '''
+        Sends COM with baudrate and follows the balance to it. Returns
+        True if the balance answers at baudrate, otherwise the port is
+        back at the previous baudrate and False is returned.
+        '''
+        com_port, baudrate_code, parity, handshake = com_settings
+        baudrate_before = self.get_baudrate()
+        try:
+            response = self._send_request_get_response('COM',' {0} {1} {2} {3}'.format(com_port,
+                                                                                     COM_BAUDRATE_CODES[baudrate],
+                                                                                     parity,
+                                                                                     handshake))
+        except (MettlerToledoError, ReadError) as e:
+            self._debug_print('COM', baudrate, e)
+            return False
+        if response.status != 'A':
+            return False
+        # the balance switches after sending its reply
+        time.sleep(self._serial_device.timeout)
+        self._serial_device.baudrate = baudrate
+        self._serial_device.reset_input_buffer()
+        if self._wait_until_ready(self._READY_TIMEOUT) is not None:
+            return True
+        self._serial_device.baudrate = baudrate_before
+        self._serial_device.reset_input_buffer()
+        if self._wait_until_ready(self._READY_TIMEOUT) is None:
+            raise MettlerToledoError('Balance lost after switching to {0} baud.'.format(baudrate))
+        return False
+
+    def _check_not_streaming(self):
+        if self.is_streaming():
+            raise MettlerToledoError('Device is streaming, call stop_stream() first.')
 
     def _args_to_request(self,*args):
         request = ''.join(map(str,args))
@@ -122,7 +424,12 @@ class MettlerToledoDevice(object):
 
         request = self._args_to_request(*args)
         self._debug_print('request', request)
-        bytes_written = self._serial_device.write_check_freq(request,delay_write=True)
+        if self._instrumented:
+            return self._exchange_instrumented(args[0],request,None)
+        with self._lock:
+            self._check_not_streaming()
+            self._begin_write()
+            bytes_written = self._serial_device.write(request.encode())
         return bytes_written
 
     def _send_request_get_response(self,*args):
@@ -130,148 +437,753 @@ class MettlerToledoDevice(object):
         '''Sends request to device over serial port and
         returns response'''
 
-        request = self._args_to_request(*args)
+        return self._exchange_request(args[0],self._args_to_request(*args))
+
+    def _exchange_request(self,command,request,parse=parse_response):
+        '''
+        Sends request and returns parse(reply line).
+        '''
+        self._debug_print('request', request)
+        if self._instrumented:
+            return self._exchange_instrumented(command,request,parse)
+        with self._lock:
+            self._check_not_streaming()
+            self._begin_write()
+            response = self._serial_device.write_read(request,use_readline=True,check_write_freq=False)
+        return parse(response)
+
+    def _get_write_delay(self,spacing=None):
+        '''
+        Returns the seconds left until spacing (write_write_delay by
+        default) has passed since the last write.
+        '''
+        if spacing is None:
+            spacing = self._write_write_delay
+        # serial_interface times its own writes with timeit.default_timer
+        delay = spacing - (default_timer() - self._serial_device._time_write_prev)
+        if self._time_write_prev is not None:
+            delay = max(delay,spacing - (time.monotonic() - self._time_write_prev))
+        return delay
+
+    def _mark_write(self):
+        '''
+        Records a write made around SerialInterface.write_check_freq()
+        on both clocks, so the next request waits out
+        write_write_delay whichever way it writes. Returns its
+        time.monotonic().
+        '''
+        self._serial_device._time_write_prev = default_timer()
+        self._time_write_prev = time.monotonic()
+        return self._time_write_prev
+
+    def _wait_write_delay(self):
+        delay = max(0.0,self._get_write_delay())
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def _begin_write(self):
+        '''
+        Waits out write_write_delay and records the write that follows
+        as the request time. Returns the seconds waited.
+        '''
+        throttle = self._wait_write_delay()
+        self._request_time = self._mark_write()
+        return throttle
+
+    def _read_line(self,timeout=None):
+        '''
+        Reads one more reply line, used for replies that span several
+        lines. Returns None if nothing arrives within timeout seconds
+        or _READ_ATTEMPTS serial timeouts.
+        '''
+        t_start = time.monotonic()
+        attempts = 0
+        line = b''
+        while True:
+            line += self._serial_device.readline()
+            if line.endswith(b'\n'):
+                return line
+            attempts += 1
+            if timeout is None:
+                if attempts >= self._READ_ATTEMPTS:
+                    break
+            elif (time.monotonic() - t_start) >= timeout:
+                break
+        return None
+
+    def _send_request_get_responses(self,*args):
+
+        '''Sends request to device over serial port and
+        returns the list of responses of a reply that continues over
+        several lines while the status is B'''
+
+        return self._exchange_request_responses(args[0],self._args_to_request(*args))
+
+    def _send_request_get_lines(self,*args):
+
+        '''Sends request to device over serial port and
+        returns the reply lines as received, like
+        _send_request_get_responses()'''
+
+        return self._exchange_request_responses(args[0],self._args_to_request(*args),raw=True)
+
+    def _exchange_request_responses(self,command,request,timeout=None,raw=False):
         self._debug_print('request', request)
-        response = self._serial_device.write_read(request,use_readline=True,check_write_freq=True)
-        response = response.decode().replace('"','')
-        response_list = response.split()
-        if 'ES' in response_list[0]:
-            raise MettlerToledoError('Syntax Error!')
-        elif 'ET' in response_list[0]:
-            raise MettlerToledoError('Transmission Error!')
-        elif 'EL' in response_list[0]:
-            raise MettlerToledoError('Logical Error!')
-        return response_list
+        if self._instrumented:
+            return self._exchange_instrumented(command,request,None,timeout,True,raw)
+        with self._lock:
+            self._check_not_streaming()
+            self._begin_write()
+            line = self._serial_device.write_read(request,use_readline=True,check_write_freq=False)
+            responses, bytes_in = self._read_responses(command,line,timeout,raw)
+        return responses
+
+    def _read_responses(self,command,line,timeout,raw=False):
+        '''
+        Returns the responses of the reply starting with line, read
+        while the status is B, or the lines themselves when raw is
+        True, and the number of bytes read.
+        '''
+        response = parse_response(line)
+        responses = [line if raw else response]
+        bytes_in = len(line)
+        while response.status == 'B':
+            line = self._read_line(timeout)
+            if line is None:
+                raise MettlerToledoError('Incomplete response to {0}!'.format(command))
+            bytes_in += len(line)
+            response = parse_response(line)
+            responses.append(line if raw else response)
+        return responses, bytes_in
+
+    def _execute_command(self,command,args=()):
+        '''
+        Sends a command of the registry, see commands.py, and returns
+        its result. Results of cached commands are kept until
+        clear_device_info().
+        '''
+        value = self._get_cached_result(command)
+        if value is not None:
+            return value
+        request = command.format_request(args)
+        # raised even when the command returns error_result
+        self._check_not_streaming()
+        try:
+            if command.multiline:
+                value = command.handle(self._exchange_request_responses(command.command,request,command.timeout))
+            else:
+                value = self._exchange_request(command.command,request,command.handle_line)
+        except (MettlerToledoError, ReadError):
+            if command.error_result is _RAISE:
+                raise
+            return command.error_result
+        return self._store_result(command,value)
+
+    def _get_cached_result(self,command):
+        if command.cached:
+            value = self._device_info.get(command.command)
+            if value is not None:
+                return _copy_result(value)
+        return None
+
+    def _store_result(self,command,value):
+        if command.cached:
+            self._device_info[command.command] = value
+        return _copy_result(value)
+
+    def _get_error_result(self,command,error):
+        # the error itself for commands that raise
+        if command.error_result is _RAISE:
+            return error
+        return command.error_result
+
+    def pipeline(self,depth=None):
+        '''
+        Returns a MettlerToledoPipeline that sends a batch of commands
+        back to back, with up to depth (default 4) commands in flight.
+        The spacing between writes adapts to what the balance
+        tolerates, starting from write_write_delay.
+        '''
+        return MettlerToledoPipeline(self,depth)
+
+    def get_pipeline_spacing(self):
+        '''
+        Returns the seconds currently left between pipelined writes.
+        '''
+        return self._pipeline_spacing
+
+    def _adapt_pipeline_spacing(self,pacing_error):
+        spacing = self._pipeline_spacing
+        if pacing_error:
+            spacing = min(max(2*spacing,0.005),self._PIPELINE_MAX_SPACING)
+        else:
+            spacing = spacing/2
+            if spacing < 0.001:
+                spacing = 0.0
+        self._pipeline_spacing = max(spacing,self._PIPELINE_MIN_SPACING)
+        self._debug_print('pipeline spacing', self._pipeline_spacing)
+
+    def _read_pipeline_responses(self,command):
+        responses = []
+        bytes_in = 0
+        while True:
+            line = self._read_line(command.timeout)
+            if line is None:
+                raise ReadError('No response to {0}!'.format(command.command))
+            bytes_in += len(line)
+            response = parse_response(line)
+            if response.command != command.reply_id:
+                raise _PipelineResponseError('Unexpected response to {0}: {1}'.format(command.command,line))
+            responses.append(response)
+            if response.status != 'B':
+                return responses, bytes_in
+
+    def _execute_pipeline(self,steps,depth=None):
+        '''
+        Writes the steps of a MettlerToledoPipeline back to back and
+        returns their results, or exceptions, in order. Results are
+        cached and errors turned into error_result like
+        _execute_command() does.
+        '''
+        if depth is None:
+            depth = self._PIPELINE_DEPTH
+        depth = max(int(depth),1)
+        results = [None]*len(steps)
+        pending = collections.deque()
+        for index, step in enumerate(steps):
+            value = self._get_cached_result(step.command)
+            if value is None:
+                pending.append(index)
+            else:
+                results[index] = value
+        pacing_error = False
+        aborted = None
+        with self._lock:
+            self._check_not_streaming()
+            in_flight = collections.deque()
+            while (pending and (aborted is None)) or in_flight:
+                if pending and (aborted is None) and (len(in_flight) < depth):
+                    index = pending.popleft()
+                    step = steps[index]
+                    throttle = max(0.0,self._get_write_delay(self._pipeline_spacing))
+                    if throttle > 0:
+                        time.sleep(throttle)
+                    self._debug_print('request', step.request)
+                    t_write = self._mark_write()
+                    self._serial_device.write(step.request)
+                    in_flight.append((index,t_write,throttle))
+                    continue
+                index, t_write, throttle = in_flight.popleft()
+                command = steps[index].command
+                if aborted is not None:
+                    results[index] = self._get_error_result(command,aborted)
+                    continue
+                error = None
+                bytes_in = 0
+                try:
+                    responses, bytes_in = self._read_pipeline_responses(command)
+                    if command.multiline:
+                        value = command.handle(responses)
+                    else:
+                        value = command.handle(responses[-1])
+                    results[index] = self._store_result(command,value)
+                except ReadError as e:
+                    # the balance dropped a command, replies can no longer be matched
+                    error = e
+                    pacing_error = True
+                    aborted = MettlerToledoError('Pipeline aborted after no response to {0}.'.format(command.command))
+                except _PipelineResponseError as e:
+                    error = e
+                    pacing_error = True
+                    aborted = MettlerToledoError('Pipeline aborted after unexpected response to {0}.'.format(command.command))
+                except MettlerToledoError as e:
+                    error = e
+                    if e.reply_id == 'ET':
+                        # the balance garbled a request, writes came too fast
+                        pacing_error = True
+                if error is not None:
+                    results[index] = self._get_error_result(command,error)
+                if self._instrumented:
+                    self._record_request(MettlerToledoRequestEvent(self.get_port(),
+                                                                   command.command,
+                                                                   time.monotonic() - t_write,
+                                                                   throttle,
+                                                                   len(steps[index].request),
+                                                                   bytes_in,
+                                                                   error))
+            for index in pending:
+                results[index] = self._get_error_result(steps[index].command,aborted)
+            if aborted is not None:
+                time.sleep(self._serial_device.timeout)
+                self._serial_device.reset_input_buffer()
+            self._adapt_pipeline_spacing(pacing_error)
+        return results
+
+    def _exchange_instrumented(self,command,request,parse,timeout=None,multiline=False,raw=False):
+        response = None
+        bytes_in = 0
+        error = None
+        throttle = 0.0
+        t_start = t_end = time.monotonic()
+        try:
+            with self._lock:
+                try:
+                    self._check_not_streaming()
+                    # wait for write_write_delay here so the wait can be
+                    # reported separately from the exchange latency
+                    throttle = self._begin_write()
+                    t_start = self._request_time
+                    if multiline:
+                        response = self._serial_device.write_read(request,use_readline=True,check_write_freq=False)
+                        bytes_in = len(response)
+                        responses, bytes_in = self._read_responses(command,response,timeout,raw)
+                        return responses
+                    elif parse is not None:
+                        response = self._serial_device.write_read(request,use_readline=True,check_write_freq=False)
+                        bytes_in = len(response)
+                        return parse(response)
+                    else:
+                        return self._serial_device.write(request.encode())
+                finally:
+                    t_end = time.monotonic()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._record_request(MettlerToledoRequestEvent(self.get_port(),
+                                                           str(command),
+                                                           t_end - t_start,
+                                                           throttle,
+                                                           len(request),
+                                                           bytes_in,
+                                                           error))
+
+    def _record_request(self,event):
+        stats = self._stats
+        if stats is not None:
+            stats.record(event)
+        for hook in self._request_hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                self._debug_print('request hook error', e)
+
+    def _update_instrumented(self):
+        self._instrumented = (self._stats is not None) or (len(self._request_hooks) > 0)
+
+    def enable_stats(self):
+        '''
+        Start collecting per command request statistics.
+        '''
+        if self._stats is None:
+            self._stats = MettlerToledoStats(timeout_errors=(ReadError,serial.SerialTimeoutException))
+        self._update_instrumented()
+
+    def disable_stats(self):
+        '''
+        Stop collecting request statistics and discard them.
+        '''
+        self._stats = None
+        self._update_instrumented()
+
+    def reset_stats(self):
+        if self._stats is not None:
+            self._stats.reset()
+
+    def stats(self):
+        '''
+        Returns a dict mapping each command sent to its request count,
+        latency mean/min/max and histogram, error counts by error
+        class, timeout count, write_write_delay throttling and bytes
+        in/out. Returns None when stats are not enabled.
+        '''
+        if self._stats is None:
+            return None
+        return self._stats.as_dict()
+
+    def add_request_hook(self,hook):
+        '''
+        Call hook with a MettlerToledoRequestEvent after every
+        request. Requests take the uninstrumented path when no hooks
+        are added and stats are disabled.
+        '''
+        self._request_hooks = self._request_hooks + [hook]
+        self._update_instrumented()
+
+    def remove_request_hook(self,hook):
+        self._request_hooks = [h for h in self._request_hooks if h != hook]
+        self._update_instrumented()
 
     def close(self):
         '''
         Close the device serial port.
         '''
+        if self.is_streaming():
+            self.stop_stream()
+        self._close_serial_device()
+        # a closed device is not kept alive by its exit hooks
+        atexit.unregister(self._exit_mettler_toledo_device)
+
+    def _close_serial_device(self):
+        atexit.unregister(self._serial_device._exit_serial_interface)
         self._serial_device.close()
 
     def get_port(self):
         return self._serial_device.port
 
-    def get_commands(self):
+    def reopen(self,port=None,ready_timeout=None):
         '''
-        Inquiry of all implemented MT-SICS commands.
+        Closes the serial port and opens port (the same port by
+        default) with the original settings, at the baudrate in use,
+        without creating a new MettlerToledoDevice. A stream that was
+        started and not stopped is restarted, subscriptions are kept.
+        Returns the seconds until the balance was ready or None.
         '''
-        response = self._send_request_get_response('I0')
-        if 'I' in response[1]:
-            raise MettlerToledoError('The list cannot be sent at present as another operation is taking place.')
-        return response[2:]
+        if ready_timeout is None:
+            ready_timeout = self._READY_TIMEOUT
+        with self._lock:
+            stream = self._stream
+            self._stream = None
+            if stream is not None:
+                # the port may be gone, do not try to end repeat mode
+                stream.stop(self._serial_device.timeout)
+            try:
+                baudrate = self._serial_device.baudrate
+                self._close_serial_device()
+            except Exception as e:
+                self._debug_print('close error', e)
+            kwargs = dict(self._serial_kwargs)
+            kwargs['baudrate'] = baudrate
+            if port is not None:
+                kwargs['port'] = port
+            self._serial_device = SerialInterface(*self._serial_args,**kwargs)
+            self._serial_kwargs = kwargs
+            # registered again in case close() was called before
+            atexit.unregister(self._exit_mettler_toledo_device)
+            atexit.register(self._exit_mettler_toledo_device)
+            self._time_write_prev = None
+            self.clear_device_info()
+            with self._weight_condition:
+                self._weight_cache = None
+                self._weight_cache_time = None
+            self.ready_time = self._wait_until_ready(ready_timeout)
+            if (self.ready_time is not None) and (self._stream_config is not None):
+                repeat_on_change, buffer_size = self._stream_config
+                self.start_stream(repeat_on_change,buffer_size)
+        return self.ready_time
 
-    def get_mtsics_level(self):
+    def get_stream_config(self):
         '''
-        Inquiry of MT-SICS level and MT-SICS versions.
+        Returns (repeat_on_change, buffer_size) of the stream started
+        and not stopped, even if it died, or None.
         '''
-        response = self._send_request_get_response('I1')
-        if 'I' in response[1]:
-            raise MettlerToledoError('Command understood, not executable at present.')
-        return response[2:]
+        return self._stream_config
 
-    def get_balance_data(self):
+    def supports_command(self,command):
         '''
-        Inquiry of balance data.
+        Returns True if command is in the cached I0 command list.
         '''
-        response = self._send_request_get_response('I2')
-        if 'I' in response[1]:
-            raise MettlerToledoError('Command understood, not executable at present.')
-        return response[2:]
+        return command in self.get_commands()
 
-    def get_software_version(self):
+    def get_device_info(self):
         '''
-        Inquiry of balance SW version and type definition number.
+        Returns a dict with the results of all identity and capability
+        inquiries (I0-I5), asking the balance only for values that are
+        not cached yet.
         '''
-        response = self._send_request_get_response('I3')
-        if 'I' in response[1]:
-            raise MettlerToledoError('Command understood, not executable at present.')
-        return response[2:]
+        return {'commands': self.get_commands(),
+                'mtsics_level': self.get_mtsics_level(),
+                'balance_data': self.get_balance_data(),
+                'software_version': self.get_software_version(),
+                'serial_number': self.get_serial_number(),
+                'software_id': self.get_software_id(),
+                }
 
-    def get_serial_number(self):
+    def refresh_device_info(self):
         '''
-        Inquiry of serial number.
+        Clears the cached inquiries and reads them all again in one
+        pass.
         '''
-        response = self._send_request_get_response('I4')
-        if 'I' in response[1]:
-            raise MettlerToledoError('Command understood, not executable at present.')
-        return response[2]
+        with self._lock:
+            self.clear_device_info()
+            return self.get_device_info()
 
-    def get_software_id(self):
+    def clear_device_info(self):
         '''
-        Inquiry of SW-Identification number.
+        Forget the cached inquiry results so the next calls ask the
+        balance again.
         '''
-        response = self._send_request_get_response('I5')
-        if 'I' in response[1]:
-            raise MettlerToledoError('Command understood, not executable at present.')
-        return response[2]
+        self._device_info = {}
 
-    def get_weight_stable(self):
+    def wait_for_stable_weight(self,tolerance,window=0.3,timeout=5.0,slope_tolerance=None,use_balance_status=True):
         '''
-        Send the current stable net weight value.
+        Returns [weight, unit] as soon as the weight is stable by the
+        client side criterion of MettlerToledoStabilityDetector, instead
+        of waiting for the balance to declare stability like
+        get_weight_stable(). Uses the streamed samples while streaming,
+        SI polling otherwise. Raises MettlerToledoStabilityError with a
+        reason when the weight is not stable within timeout seconds or
+        the balance is out of range.
         '''
-        try:
-            response = self._send_request_get_response('S')
-            if 'I' in response[1]:
-                raise MettlerToledoError('Command understood, not executable at present.')
-            elif '+' in response[1]:
-                raise MettlerToledoError('Balance in overload range.')
-            elif '-' in response[1]:
-                raise MettlerToledoError('Balance in underload range.')
-            response[2] = float(response[2])
-            return response[2:]
-        except:
-            pass
+        detector = MettlerToledoStabilityDetector(tolerance,
+                                                  window=window,
+                                                  slope_tolerance=slope_tolerance,
+                                                  use_balance_status=use_balance_status)
+        t_end = time.monotonic() + timeout
+        streaming = self.is_streaming()
+        if streaming:
+            samples = self._stream.iter_samples(timeout)
+        else:
+            samples = self._iter_polled_samples(t_end)
+        for sample in samples:
+            detector.check_status(sample)
+            if detector.add(sample):
+                return detector.get_weight()
+            if time.monotonic() >= t_end:
+                break
+        else:
+            if streaming and not self.is_streaming():
+                raise MettlerToledoStabilityError('Weight not stable, stream ended.','stream ended',detector.std,detector.slope)
+        raise MettlerToledoStabilityError('Weight not stable after {0} s.'.format(timeout),
+                                          'timeout',
+                                          detector.std,
+                                          detector.slope)
+
+    def _iter_polled_samples(self,t_end):
+        sequence = 0
+        while time.monotonic() < t_end:
+            response = self._send_request_get_response('SI')
+            sequence += 1
+            if response.status == 'I':
+                continue
+            yield MettlerToledoSample(response.value,response.unit,response.status,time.monotonic(),sequence)
 
-    def get_weight(self):
+    def get_weight(self,max_age=None):
         '''
         Send the current net weight value, irrespective of balance stability.
+
+        With max_age (seconds) a weight read no longer ago than max_age
+        is returned without asking the balance again, and concurrent
+        callers that need a new weight share one SI exchange.
+        '''
+        if max_age is None:
+            return self._get_weight()
+        with self._weight_condition:
+            while True:
+                if (self._weight_cache is not None) and ((time.monotonic() - self._weight_cache_time) <= max_age):
+                    return list(self._weight_cache)
+                if not self._weight_in_flight:
+                    break
+                # wait for the exchange another thread already started
+                generation = self._weight_generation
+                while self._weight_generation == generation:
+                    self._weight_condition.wait()
+                if self._weight_error is not None:
+                    raise self._weight_error
+                if self._weight_cache is not None:
+                    return list(self._weight_cache)
+                # cleared by reopen() in the meantime, read a new one
+            self._weight_in_flight = True
+        error = None
+        try:
+            weight = self._get_weight()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            with self._weight_condition:
+                self._weight_in_flight = False
+                self._weight_error = error
+                self._weight_generation += 1
+                self._weight_condition.notify_all()
+        return weight
+
+    def _get_weight(self):
+        stream = self._stream
+        if (stream is not None) and stream.is_alive():
+            # the balance is already pushing weights, use the latest one
+            sample = stream.latest()
+            if (sample is None) or (sample.weight is None):
+                raise MettlerToledoError('No streamed weight available.')
+            weight = [sample.weight,sample.unit,sample.status]
+            weight_time = sample.timestamp
+        else:
+            weight = self._execute_command(get_command('get_weight'))
+            weight_time = time.monotonic()
+        with self._weight_condition:
+            self._weight_cache = weight
+            self._weight_cache_time = weight_time
+        return list(weight)
+
+    def reset(self):
+        '''
+        Resets the balance to the condition found after switching on, but without a zero setting being performed.
         '''
-        response = self._send_request_get_response('SI')
-        if 'I' in response[1]:
-            raise MettlerToledoError('Command understood, not executable at present.')
-        elif '+' in response[1]:
-            raise MettlerToledoError('Balance in overload range.')
-        elif '-' in response[1]:
-            raise MettlerToledoError('Balance in underload range.')
-        response.append(response[1])
-        response[2] = float(response[2])
-        return response[2:]
+        with self._lock:
+            self._send_request('@')
+            self.clear_device_info()
+            # the balance answers @ with I4 and its serial number, read
+            # it so it is not taken as the reply to the next command
+            t_start = time.monotonic()
+            while (time.monotonic() - t_start) < self._READY_TIMEOUT:
+                line = self._read_line(timeout=self._READY_TIMEOUT)
+                if (line is None) or line.startswith(b'I4'):
+                    break
 
-    def zero_stable(self):
+    def start_stream(self,repeat_on_change=False,buffer_size=None):
         '''
-        Zero the balance.
+        Put the balance in repeat mode and read the weight values it
+        pushes in a background thread. Uses SIR (send every value
+        immediately) or, when repeat_on_change is True, SR (send on
+        weight change). The most recent buffer_size samples are kept.
+        Other commands cannot be sent until stop_stream() is called.
         '''
-        try:
-            response = self._send_request_get_response('Z')
-            if 'I' in response[1]:
-                raise MettlerToledoError('Zero setting not performed (balance is currently executing another command, e.g. taring, or timeout as stability was not reached).')
-            elif '+' in response[1]:
-                raise MettlerToledoError('Upper limit of zero setting range exceeded.')
-            elif '-' in response[1]:
-                raise MettlerToledoError('Lower limit of zero setting range exceeded.')
-            return True
-        except:
-            return False
+        if buffer_size is None:
+            buffer_size = self._STREAM_BUFFER_SIZE
+        if repeat_on_change:
+            command = 'SR'
+        else:
+            command = 'SIR'
+        with self._lock:
+            if self.is_streaming():
+                raise MettlerToledoError('Device is already streaming.')
+            self._serial_device.reset_input_buffer()
+            self._send_request(command)
+            self._subscriptions.reset()
+            self._stream_config = (repeat_on_change,buffer_size)
+            self._stream = MettlerToledoStreamReader(self._serial_device,
+                                                     buffer_size=buffer_size,
+                                                     subscriptions=self._subscriptions,
+                                                     debug=self.debug)
+            self._stream.start()
 
-    def zero(self):
+    def stop_stream(self):
         '''
-        Zero the balance immediately regardless the stability of the balance.
+        Stop repeat mode and the background reader thread.
         '''
-        response = self._send_request_get_response('ZI')
-        if 'I' in response[1]:
-            raise MettlerToledoError('Zero setting not performed (balance is currently executing another command, e.g. taring, or timeout as stability was not reached).')
-        elif '+' in response[1]:
-            raise MettlerToledoError('Upper limit of zero setting range exceeded.')
-        elif '-' in response[1]:
-            raise MettlerToledoError('Lower limit of zero setting range exceeded.')
-        return response[1]
+        with self._lock:
+            self._stream_config = None
+            stream = self._stream
+            if stream is None:
+                return
+            try:
+                if stream.is_alive():
+                    # any weight command ends SIR/SR repeat mode
+                    self._serial_device.write_check_freq(self._args_to_request('SI'),delay_write=True)
+                    time.sleep(self._serial_device.timeout)
+            finally:
+                stream.stop()
+                self._stream = None
+                if self._serial_device.is_open:
+                    self._serial_device.reset_input_buffer()
 
-    def reset(self):
+    def is_streaming(self):
         '''
-        Resets the balance to the condition found after switching on, but without a zero setting being performed.
+        Returns True while the background reader thread is running.
+        '''
+        return (self._stream is not None) and self._stream.is_alive()
+
+    def latest(self):
+        '''
+        Returns the most recent streamed MettlerToledoSample or None.
+        '''
+        if self._stream is None:
+            raise MettlerToledoError('Device is not streaming, call start_stream() first.')
+        return self._stream.latest()
+
+    def latest_line(self):
+        '''
+        Returns the reply line, as received, of the most recent
+        streamed sample or None.
+        '''
+        if self._stream is None:
+            raise MettlerToledoError('Device is not streaming, call start_stream() first.')
+        return self._stream.latest_line()
+
+    def iter_samples(self,timeout=None):
+        '''
+        Generator yielding each new streamed MettlerToledoSample as it
+        arrives. Samples that drop out of the ring buffer before they
+        are consumed are skipped. Ends when the stream stops or when no
+        sample arrives within timeout seconds.
+        '''
+        if self._stream is None:
+            raise MettlerToledoError('Device is not streaming, call start_stream() first.')
+        return self._stream.iter_samples(timeout)
+
+    def on_sample(self,callback):
+        '''
+        Call callback with a MettlerToledoEvent for every streamed
+        sample. Subscription callbacks run in the stream reader thread
+        and only while streaming, so they should return quickly.
+        Returns the subscription for remove_subscription().
+        '''
+        return self._subscriptions.add(_SampleSubscription(callback))
+
+    def on_threshold(self,threshold,callback,direction='both',hysteresis=0.0,debounce=0.0):
+        '''
+        Call callback when the streamed weight crosses threshold,
+        direction is 'rising', 'falling' or 'both'. After a crossing
+        the weight has to move back past threshold by hysteresis before
+        the next one, and a crossing has to persist for debounce
+        seconds.
+        '''
+        return self._subscriptions.add(_ThresholdSubscription(threshold,callback,direction,hysteresis,debounce))
+
+    def on_change(self,delta,callback,debounce=0.0):
+        '''
+        Call callback when the streamed weight has changed by at least
+        delta since the last change event.
+        '''
+        return self._subscriptions.add(_ChangeSubscription(delta,callback,debounce))
+
+    def on_overload(self,callback,debounce=0.0,in_range=False):
+        '''
+        Call callback when the balance goes into overload or underload,
+        and with in_range True also when it returns into range.
         '''
-        self._send_request('@')
+        return self._subscriptions.add(_RangeSubscription(callback,debounce,in_range))
+
+    def remove_subscription(self,subscription):
+        self._subscriptions.remove(subscription)
+
+
+def _copy_result(value):
+    # callers may modify the lists returned, not the cached ones
+    if isinstance(value,list):
+        return list(value)
+    return value
+
+def _make_command_method(command):
+    def method(self,*args,**kwargs):
+        return self._execute_command(command,command.bind(args,kwargs))
+    return method
+
+# get_serial_number(), get_weight_stable(), zero(), tare() and the other
+# MT-SICS commands of the registry, methods defined in the class above
+# (get_weight) take precedence
+install_command_methods(MettlerToledoDevice,_make_command_method)
+
+
+class MettlerToledoReading(collections.namedtuple('MettlerToledoReading',
+                                                  ['port','weight','unit','status','send_time','receive_time','error'])):
+    '''
+    Weight read from one device during MettlerToledoDevices.read_all().
+
+    send_time and receive_time are time.monotonic() just before the
+    request was written and just after the reply was parsed. When the
+    read failed weight, unit and status are None and error holds the
+    exception.
+    '''
+    __slots__ = ()
+
+    @property
+    def stable(self):
+        return self.status == 'S'
+
+
+MettlerToledoSnapshot = collections.namedtuple('MettlerToledoSnapshot',['cycle','timestamp','readings'])
 
 
 class MettlerToledoDevices(list):
@@ -287,47 +1199,191 @@ class MettlerToledoDevices(list):
     devs = MettlerToledoDevices(use_ports=['/dev/tty.usbmodem262471','/dev/tty.usbmodem262472']) # Mac OS X
     devs = MettlerToledoDevices(use_ports=['COM3','COM4']) # Windows
     dev = devs[0]
+    snapshot = devs.read_all()  # all devices read concurrently
+    snapshot.readings[0].weight
+    -0.68
+    for snapshot in devs.stream_all(period=0.1):
+        print([reading.weight for reading in snapshot.readings])
     '''
+    _BARRIER_TIMEOUT = 1.0
+
     def __init__(self,*args,**kwargs):
-        if ('use_ports' not in kwargs) or (kwargs['use_ports'] is None):
-            mettler_toledo_device_ports = find_mettler_toledo_device_ports(*args,**kwargs)
+        use_ports = kwargs.pop('use_ports',None)
+        if use_ports is None:
+            find_kwargs = dict((key,kwargs[key]) for key in ('baudrate','model_number','serial_number','try_ports','debug')
+                               if key in kwargs)
+            mettler_toledo_device_ports = find_mettler_toledo_device_ports(**find_kwargs)
         else:
             mettler_toledo_device_ports = use_ports
+        for key in ('model_number','serial_number','try_ports'):
+            kwargs.pop(key,None)
 
         for port in mettler_toledo_device_ports:
+            kwargs.update({'port': port})
             dev = MettlerToledoDevice(*args,**kwargs)
             self.append(dev)
+        self._executor = None
+        self._executor_size = 0
+        self._cycle = 0
 
+    def _get_executor(self):
+        if (self._executor is None) or (self._executor_size != len(self)):
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(self))
+            self._executor_size = len(self)
+        return self._executor
 
-def find_mettler_toledo_device_ports(baudrate=None, try_ports=None, debug=DEBUG):
-    serial_device_ports = find_serial_interface_ports(try_ports=try_ports, debug=debug)
-    os_type = platform.system()
-    if os_type == 'Darwin':
-        serial_device_ports = [x for x in serial_device_ports if 'tty.usbmodem' in x or 'tty.usbserial' in x]
-
-    mettler_toledo_device_ports = []
-    for port in serial_device_ports:
+    def _read_device(self,dev,barrier):
+        # wait out write_write_delay first so it does not stagger the
+        # writes released together by the barrier
+        dev._wait_write_delay()
         try:
-            dev = MettlerToledoDevice(port=port,baudrate=baudrate,debug=debug)
-            try:
-                serial_number = dev.get_serial_number()
-                mettler_toledo_device_ports.append(port)
-            except:
-                continue
-            dev.close()
-        except (serial.SerialException, IOError):
+            # release all requests at the same moment
+            barrier.wait(self._BARRIER_TIMEOUT)
+        except threading.BrokenBarrierError:
             pass
+        dev._request_time = None
+        call_time = time.monotonic()
+        try:
+            weight, unit, status = dev.get_weight()
+            error = None
+        except Exception as e:
+            weight = unit = status = None
+            error = e
+        receive_time = time.monotonic()
+        # when the request was written, the call time for streamed weights
+        send_time = dev._request_time
+        if send_time is None:
+            send_time = call_time
+        return MettlerToledoReading(dev.get_port(),weight,unit,status,send_time,receive_time,error)
+
+    def read_all(self):
+        '''
+        Sends SI to every device concurrently and returns a
+        MettlerToledoSnapshot with one MettlerToledoReading per device,
+        in list order.
+        '''
+        self._cycle += 1
+        timestamp = time.monotonic()
+        if len(self) == 0:
+            return MettlerToledoSnapshot(self._cycle,timestamp,[])
+        executor = self._get_executor()
+        barrier = threading.Barrier(len(self))
+        futures = [executor.submit(self._read_device,dev,barrier) for dev in self]
+        readings = [future.result() for future in futures]
+        return MettlerToledoSnapshot(self._cycle,timestamp,readings)
+
+    def stream_all(self,period=None,count=None):
+        '''
+        Generator yielding read_all() snapshots, one every period
+        seconds or back to back when period is None, until count
+        snapshots have been yielded or the generator is closed.
+        '''
+        t_start = time.monotonic()
+        n = 0
+        while (count is None) or (n < count):
+            yield self.read_all()
+            n += 1
+            if period is not None:
+                delay = (t_start + n*period) - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+    def close(self):
+        '''
+        Close every device serial port.
+        '''
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        for dev in self:
+            dev.close()
+
+
+def _probe_mettler_toledo_device_port(port, baudrate, model_number, debug, ready_timeout):
+    dev = MettlerToledoDevice(port=port,baudrate=baudrate,debug=debug,ready_timeout=ready_timeout)
+    try:
+        if dev.ready_time is None:
+            raise MettlerToledoError('No balance answered on {0}.'.format(port))
+        # cached by the readiness check
+        serial_number = dev.get_serial_number()
+        if model_number is not None:
+            model = dev.get_balance_data()[0]
+        else:
+            model = None
+    finally:
+        dev.close()
+    return serial_number, model
+
+def find_mettler_toledo_device_ports(baudrate=None, model_number=None, serial_number=None, try_ports=None, debug=DEBUG,
+                                     max_workers=DISCOVERY_MAX_WORKERS, timeout=DISCOVERY_TIMEOUT, use_ports=None):
+    '''
+    Probes the candidate serial ports concurrently and returns a dict
+    mapping each port with a responding balance to its serial
+    number. Ports that fail, or that have not answered within timeout
+    seconds, are left out. When model_number and/or serial_number are
+    given only matching balances are returned. use_ports probes exactly
+    the given ports instead of the enumerated serial ports. With
+    baudrate 'auto' each port is tried at the baudrate detected last
+    time, then at BAUDRATES in order, see get_detected_baudrate().
+    '''
+    if use_ports is not None:
+        serial_device_ports = list(use_ports)
+    else:
+        serial_device_ports = find_serial_interface_ports(try_ports=try_ports, debug=debug)
+        os_type = platform.system()
+        if os_type == 'Darwin':
+            serial_device_ports = [x for x in serial_device_ports if 'tty.usbmodem' in x or 'tty.usbserial' in x]
+
+    mettler_toledo_device_ports = {}
+    if len(serial_device_ports) == 0:
+        return mettler_toledo_device_ports
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers,len(serial_device_ports)))
+    try:
+        # probes that miss the deadline still close their port soon after
+        ready_timeout = MettlerToledoDevice._READY_TIMEOUT
+        if timeout is not None:
+            ready_timeout = min(ready_timeout,timeout)
+        futures = [executor.submit(_probe_mettler_toledo_device_port,port,baudrate,model_number,debug,ready_timeout)
+                   for port in serial_device_ports]
+        done, not_done = concurrent.futures.wait(futures,timeout=timeout)
+        for future in not_done:
+            future.cancel()
+    finally:
+        # do not wait for probes that missed the deadline
+        executor.shutdown(wait=False)
+    for port, future in zip(serial_device_ports,futures):
+        if future not in done:
+            if debug:
+                print('probe timed out', port)
+            continue
+        try:
+            port_serial_number, port_model_number = future.result()
+        except Exception as e:
+            if debug:
+                print('probe failed', port, e)
+            continue
+        if (serial_number is not None) and (str(serial_number) != str(port_serial_number)):
+            continue
+        if (model_number is not None) and (str(model_number) != str(port_model_number)):
+            continue
+        mettler_toledo_device_ports[port] = port_serial_number
     return mettler_toledo_device_ports
 
 def find_mettler_toledo_device_port(baudrate=None, model_number=None, serial_number=None, try_ports=None, debug=DEBUG):
     mettler_toledo_device_ports = find_mettler_toledo_device_ports(baudrate=baudrate,
+                                                                   model_number=model_number,
+                                                                   serial_number=serial_number,
                                                                    try_ports=try_ports,
                                                                    debug=debug)
     if len(mettler_toledo_device_ports) == 1:
-        return mettler_toledo_device_ports[0]
+        return list(mettler_toledo_device_ports.keys())[0]
     elif len(mettler_toledo_device_ports) == 0:
         serial_device_ports = find_serial_interface_ports(try_ports)
         err_string = 'Could not find any MettlerToledo devices. Check connections and permissions.\n'
+        if (model_number is not None) or (serial_number is not None):
+            err_string += 'Looking for model_number: ' + str(model_number) + ', serial_number: ' + str(serial_number) + '\n'
         err_string += 'Tried ports: ' + str(serial_device_ports)
         raise RuntimeError(err_string)
     else:
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division
+import collections
+
+from .response import MettlerToledoError
+from .commands import install_command_methods
+
+
+class _PipelineResponseError(MettlerToledoError):
+    '''
+    Raised when a reply does not belong to the command it was read
+    for, after which the remaining replies can no longer be matched.
+    '''
+    pass
+
+
+_PipelineStep = collections.namedtuple('_PipelineStep',['command','request'])
+_PipelineStep.__doc__ = '''
+One command of a pipeline, command is its registry entry (see
+commands.py) and request the encoded request.
+'''
+
+
+class MettlerToledoPipeline(object):
+    '''
+    Batch of commands written back to back, up to depth commands in
+    flight, with the replies matched to the commands in order. Create
+    one with MettlerToledoDevice.pipeline().
+
+    Example Usage:
+
+    dev.pipeline().zero().get_weight().get_serial_number().execute()
+    ['S', [0.0, 'g', 'S'], '1126493049']
+    '''
+    def __init__(self,dev,depth=None):
+        self._device = dev
+        self.depth = depth
+        self._steps = []
+
+    def __len__(self):
+        return len(self._steps)
+
+    def _add(self,command,args=()):
+        if args:
+            request = command.format_request(args).encode()
+        else:
+            request = command.request
+        self._steps.append(_PipelineStep(command,request))
+        return self
+
+    def execute(self,raise_errors=True):
+        '''
+        Sends the commands and returns their results in order. When
+        raise_errors is True the first error is raised after all
+        replies have been read, otherwise errors are returned in place
+        of the results.
+        '''
+        results = self._device._execute_pipeline(self._steps,self.depth)
+        if raise_errors:
+            for result in results:
+                if isinstance(result,Exception):
+                    raise result
+        return results
+
+
+def _make_command_method(command):
+    def method(self,*args,**kwargs):
+        return self._add(command,command.bind(args,kwargs))
+    return method
+
+install_command_methods(MettlerToledoPipeline,_make_command_method)
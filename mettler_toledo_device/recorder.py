@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division
+import threading
+import collections
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .stability import _get_slope
+
+
+MettlerToledoStatistics = collections.namedtuple('MettlerToledoStatistics',
+                                                 ['count','mean','std','min','max','slope','stable_count'])
+
+
+class MettlerToledoRecorder(object):
+    '''
+    Fixed capacity ring of weight samples stored in preallocated NumPy
+    arrays. Every sample is written twice, at index and at index +
+    capacity, so the most recent samples are always one contiguous
+    slice and can be returned as views without copying.
+
+    Example Usage:
+
+    recorder = MettlerToledoRecorder(capacity=100000)
+    dev.start_stream()
+    for sample in dev.iter_samples(timeout=1.0):
+        recorder.append_sample(sample)
+    recorder.get_weights(100)  # view of the last 100 weights
+    recorder.get_statistics(duration=5.0)
+    MettlerToledoStatistics(count=213, mean=10.0012, std=0.0004, min=10.0004, max=10.0021, slope=-1.2e-05, stable_count=198)
+    '''
+    _CAPACITY = 65536
+
+    def __init__(self,capacity=None):
+        if numpy is None:
+            raise ImportError('MettlerToledoRecorder requires numpy, pip install numpy')
+        if capacity is None:
+            capacity = self._CAPACITY
+        self.capacity = int(capacity)
+        if self.capacity <= 0:
+            raise ValueError('capacity must be > 0')
+        self._timestamps = numpy.zeros(2*self.capacity,dtype=numpy.float64)
+        self._weights = numpy.zeros(2*self.capacity,dtype=numpy.float64)
+        self._stable = numpy.zeros(2*self.capacity,dtype=numpy.bool_)
+        self._index = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._count,self.capacity)
+
+    def get_count(self):
+        '''
+        Returns the number of samples appended since the last clear,
+        including those that have been overwritten.
+        '''
+        return self._count
+
+    def clear(self):
+        with self._lock:
+            self._index = 0
+            self._count = 0
+
+    def append(self,timestamp,weight,stable=False):
+        with self._lock:
+            i = self._index
+            j = i + self.capacity
+            self._timestamps[i] = self._timestamps[j] = timestamp
+            self._weights[i] = self._weights[j] = weight
+            self._stable[i] = self._stable[j] = stable
+            self._index = (i + 1) % self.capacity
+            self._count += 1
+
+    def append_sample(self,sample):
+        '''
+        Appends a MettlerToledoSample or MettlerToledoReading. Samples
+        without a weight (overload, underload, failed reads) are
+        skipped.
+        '''
+        if sample.weight is None:
+            return False
+        if hasattr(sample,'timestamp'):
+            timestamp = sample.timestamp
+        else:
+            timestamp = sample.receive_time
+        self.append(timestamp,sample.weight,sample.status == 'S')
+        return True
+
+    def extend(self,samples):
+        for sample in samples:
+            self.append_sample(sample)
+
+    def _get_slice(self,n=None):
+        length = len(self)
+        if (n is None) or (n > length):
+            n = length
+        if self._count >= self.capacity:
+            end = self._index + self.capacity
+        else:
+            end = self._index
+        return slice(end - n,end)
+
+    def get_timestamps(self,n=None):
+        '''
+        Returns a view of the last n timestamps, oldest first. Views are
+        overwritten in place as new samples are appended.
+        '''
+        return self._timestamps[self._get_slice(n)]
+
+    def get_weights(self,n=None):
+        '''
+        Returns a view of the last n weights, oldest first.
+        '''
+        return self._weights[self._get_slice(n)]
+
+    def get_stable(self,n=None):
+        '''
+        Returns a view of the last n stability flags, oldest first.
+        '''
+        return self._stable[self._get_slice(n)]
+
+    def get_statistics(self,n=None,duration=None):
+        '''
+        Returns MettlerToledoStatistics over the last n samples, or over
+        the samples received in the last duration seconds. slope is the
+        least squares drift in weight units per second.
+        '''
+        with self._lock:
+            window = self._get_slice(n)
+            timestamps = self._timestamps[window]
+            weights = self._weights[window]
+            stable = self._stable[window]
+            if (duration is not None) and (len(timestamps) > 0):
+                start = numpy.searchsorted(timestamps,timestamps[-1] - duration,side='left')
+                timestamps = timestamps[start:]
+                weights = weights[start:]
+                stable = stable[start:]
+            count = len(weights)
+            if count == 0:
+                return MettlerToledoStatistics(0,None,None,None,None,None,0)
+            return MettlerToledoStatistics(count,
+                                           float(weights.mean()),
+                                           float(weights.std()),
+                                           float(weights.min()),
+                                           float(weights.max()),
+                                           _get_slope(timestamps,weights),
+                                           int(numpy.count_nonzero(stable)))
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division
+import collections
+import functools
+
+
+class MettlerToledoError(Exception):
+    '''
+    value is the error message. reply_id and status are set when the
+    error comes from a reply: reply_id 'ES', 'ET' or 'EL' for the
+    error replies, otherwise the reply identifier and the status the
+    command failed with.
+    '''
+    def __init__(self,value,reply_id=None,status=None):
+        self.value = value
+        self.reply_id = reply_id
+        self.status = status
+    def __str__(self):
+        return repr(self.value)
+
+
+class MettlerToledoResponse(collections.namedtuple('MettlerToledoResponse',
+                                                   ['command','status','value','unit','fields'])):
+    '''
+    One parsed MT-SICS reply line.
+
+    command is the reply identifier ('S', 'I4', 'ZI', ...), status the
+    single character status ('A', 'B', 'S', 'D', 'I', '+', '-', 'L')
+    or None. For weight replies (S, T, TI, TA) with status 'S', 'D'
+    or 'A' value is the weight as a float and unit its unit, otherwise
+    both are None.
+    fields holds the remaining raw byte fields with quotes removed.
+    '''
+    __slots__ = ()
+
+    @property
+    def stable(self):
+        return self.status == 'S'
+
+    def get_field_strings(self):
+        return [field.decode('ascii','replace') for field in self.fields]
+
+
+# lookup tables so the common replies need no decoding
+_ERROR_REPLIES = {b'ES': 'Syntax Error!',
+                  b'ET': 'Transmission Error!',
+                  b'EL': 'Logical Error!',
+                  }
+_ERROR_REPLY_IDS = dict((reply_id,reply_id.decode()) for reply_id in _ERROR_REPLIES)
+_COMMANDS = dict((command.encode(),command) for command in
+                 ('@','I0','I1','I2','I3','I4','I5','S','SI','SIU','SIR','SR',
+                  'Z','ZI','T','TI','TA','TAC','C0','C1','C2','C3','COM'))
+_STATUSES = dict((status.encode(),status) for status in ('A','B','S','D','I','+','-','L'))
+_UNITS = dict((unit.encode(),unit) for unit in ('g','kg','mg','ug','ct','lb','oz','ozt','dwt','GN','N','%'))
+_new_response = tuple.__new__
+
+# baudrate codes of the COM command
+COM_BAUDRATE_CODES = {150: 0,
+                      300: 1,
+                      600: 2,
+                      1200: 3,
+                      2400: 4,
+                      4800: 5,
+                      9600: 6,
+                      19200: 7,
+                      38400: 8,
+                      57600: 9,
+                      115200: 10,
+                      }
+
+# first field of the reply when it differs from the request command
+_REPLY_IDS = {'SI': 'S',
+              'SIU': 'S',
+              'SIR': 'S',
+              'SR': 'S',
+              '@': 'I4',
+              }
+
+# replies carrying a weight value and unit, parsed when the status is
+# 'S', 'D' or 'A' (TA and TAC), keyed by the raw fields so weight
+# lines are parsed without decoding
+_VALUE_REPLIES = dict((command.encode(),command) for command in ('S','T','TI','TA'))
+_VALUE_STATUSES = dict((status.encode(),status) for status in ('S','D','A'))
+
+
+# reply lines parsed most recently, repeated lines (stable weights,
+# status and inquiry replies) are answered without parsing
+PARSE_CACHE_SIZE = 256
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_response(line):
+    '''
+    Parses one raw reply line (bytes) into a MettlerToledoResponse.
+    Raises MettlerToledoError for empty lines and the ES, ET and EL
+    error replies. Responses are immutable and shared between callers
+    receiving the same line.
+    '''
+    tokens = line.split()
+    if len(tokens) == 4:
+        # weight replies, the hot path
+        command = _VALUE_REPLIES.get(tokens[0])
+        status = _VALUE_STATUSES.get(tokens[1])
+        if (command is not None) and (status is not None):
+            value_field = tokens[2]
+            unit_field = tokens[3]
+            try:
+                value = float(value_field)
+            except ValueError:
+                raise MettlerToledoError('Invalid weight value: {0}'.format(value_field))
+            unit = _UNITS.get(unit_field)
+            if unit is None:
+                unit = unit_field.decode('ascii','replace')
+            return _new_response(MettlerToledoResponse,(command,status,value,unit,(value_field,unit_field)))
+    return _parse_other_response(line,tokens)
+
+def _parse_other_response(line,tokens):
+    if not tokens:
+        raise MettlerToledoError('No response received!')
+    reply_id = tokens[0]
+    command = _COMMANDS.get(reply_id)
+    if command is None:
+        error = _ERROR_REPLIES.get(reply_id)
+        if error is not None:
+            raise MettlerToledoError(error,_ERROR_REPLY_IDS[reply_id])
+        command = reply_id.decode('ascii','replace')
+    if len(tokens) == 1:
+        return _new_response(MettlerToledoResponse,(command,None,None,None,()))
+    status = _STATUSES.get(tokens[1])
+    if status is None:
+        status = tokens[1].decode('ascii','replace')
+    if line.find(b'"') >= 0:
+        # quoted strings may hold spaces, split them as separate fields
+        tokens = line.replace(b'"',b'').split()
+    return _new_response(MettlerToledoResponse,(command,status,None,None,tuple(tokens[2:])))
+
+def get_reply_id(command):
+    '''
+    Returns the identifier the reply to command starts with.
+    '''
+    return _REPLY_IDS.get(command,command)
+
+
+_NOT_EXECUTABLE_ERROR = 'Command understood, not executable at present.'
+
+def _handle_inquiry_response(response):
+    if response.status == 'I':
+        raise MettlerToledoError(_NOT_EXECUTABLE_ERROR)
+    return response.get_field_strings()
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division
+import struct
+import time
+
+try:
+    from multiprocessing import shared_memory
+    from multiprocessing import resource_tracker
+except ImportError:
+    shared_memory = None
+    resource_tracker = None
+
+from .response import MettlerToledoError
+from .stream import MettlerToledoSample
+
+
+DEFAULT_NAME = 'mettler_toledo_device'
+
+# magic, layout version, seqlock counter, then the sample: sequence
+# (counted by the publisher, so it keeps growing when the stream is
+# restarted), timestamp (time.monotonic(), shared by all processes on the host),
+# weight (NaN when None), status and unit
+_HEADER = struct.Struct('<4sI')
+_COUNTER = struct.Struct('<Q')
+_SAMPLE = struct.Struct('<Qdd1s7s')
+_MAGIC = b'MTSM'
+_VERSION = 1
+_COUNTER_OFFSET = _HEADER.size
+_SAMPLE_OFFSET = _COUNTER_OFFSET + _COUNTER.size
+_SIZE = _SAMPLE_OFFSET + _SAMPLE.size
+_NAN = float('nan')
+_READ_ATTEMPTS = 1000
+
+# names published from this process, their readers must stay tracked
+_published_names = set()
+
+
+def _check_shared_memory():
+    if shared_memory is None:
+        raise MettlerToledoError('Shared memory requires Python 3.8 or later.')
+
+
+class MettlerToledoSharedPublisher(object):
+    '''
+    Publishes the latest MettlerToledoSample into a named shared memory
+    block protected by a seqlock, for MettlerToledoSharedReader in other
+    processes on the same host. Only one process may publish to a name.
+
+    Example Usage:
+
+    publisher = MettlerToledoSharedPublisher('balance0')
+    publisher.attach(dev)  # publishes every streamed sample
+    dev.start_stream()
+    publisher.close()
+    '''
+    def __init__(self,name=DEFAULT_NAME):
+        _check_shared_memory()
+        try:
+            self._shm = shared_memory.SharedMemory(name=name,create=True,size=_SIZE)
+        except FileExistsError:
+            # left behind by a publisher that did not unlink
+            self._shm = shared_memory.SharedMemory(name=name)
+            if self._shm.size < _SIZE:
+                self._shm.close()
+                raise MettlerToledoError('Shared memory {0} is too small.'.format(name))
+        self.name = name
+        _published_names.add(name)
+        self._buf = self._shm.buf
+        self._counter = 0
+        self._sequence = 0
+        _COUNTER.pack_into(self._buf,_COUNTER_OFFSET,0)
+        _SAMPLE.pack_into(self._buf,_SAMPLE_OFFSET,0,0.0,_NAN,b'',b'')
+        _HEADER.pack_into(self._buf,0,_MAGIC,_VERSION)
+        self._device = None
+        self._subscription = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc_info):
+        self.close()
+
+    def publish(self,sample):
+        weight = sample.weight
+        if weight is None:
+            weight = _NAN
+        unit = sample.unit or ''
+        buf = self._buf
+        self._sequence += 1
+        # odd while writing, readers retry until it is even and unchanged
+        self._counter += 1
+        _COUNTER.pack_into(buf,_COUNTER_OFFSET,self._counter)
+        _SAMPLE.pack_into(buf,_SAMPLE_OFFSET,
+                          self._sequence,
+                          sample.timestamp,
+                          weight,
+                          sample.status.encode(),
+                          unit.encode())
+        self._counter += 1
+        _COUNTER.pack_into(buf,_COUNTER_OFFSET,self._counter)
+
+    def attach(self,dev):
+        '''
+        Publish every sample dev streams, see MettlerToledoDevice.on_sample().
+        '''
+        self.detach()
+        self._device = dev
+        self._subscription = dev.on_sample(lambda event: self.publish(event.sample))
+
+    def detach(self):
+        if self._subscription is not None:
+            self._device.remove_subscription(self._subscription)
+        self._device = None
+        self._subscription = None
+
+    def close(self,unlink=True):
+        self.detach()
+        if self._shm is None:
+            return
+        self._buf = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+        self._shm = None
+        _published_names.discard(self.name)
+
+
+class MettlerToledoSharedReader(object):
+    '''
+    Reads the latest sample published by a MettlerToledoSharedPublisher
+    in another process, without locks or system calls.
+
+    Example Usage:
+
+    reader = MettlerToledoSharedReader('balance0')
+    reader.read()
+    MettlerToledoSample(weight=-0.68, unit='g', status='S', timestamp=1234.56, sequence=42)
+    '''
+    def __init__(self,name=DEFAULT_NAME):
+        _check_shared_memory()
+        self._shm = shared_memory.SharedMemory(name=name)
+        # the publisher owns the block, do not unlink it when this
+        # process exits
+        if name not in _published_names:
+            resource_tracker.unregister(self._shm._name,'shared_memory')
+        self.name = name
+        self._buf = self._shm.buf
+        magic, version = _HEADER.unpack_from(self._buf,0)
+        if (magic != _MAGIC) or (version != _VERSION):
+            self.close()
+            raise MettlerToledoError('Shared memory {0} has no published samples.'.format(name))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc_info):
+        self.close()
+
+    def read(self):
+        '''
+        Returns the latest MettlerToledoSample or None if nothing was
+        published yet.
+        '''
+        buf = self._buf
+        for attempt in range(_READ_ATTEMPTS):
+            counter, = _COUNTER.unpack_from(buf,_COUNTER_OFFSET)
+            if counter & 1:
+                continue
+            sequence, timestamp, weight, status, unit = _SAMPLE.unpack_from(buf,_SAMPLE_OFFSET)
+            if _COUNTER.unpack_from(buf,_COUNTER_OFFSET)[0] != counter:
+                continue
+            if counter == 0:
+                return None
+            if weight != weight:
+                weight = None
+                unit = None
+            else:
+                unit = unit.rstrip(b'\x00').decode()
+            return MettlerToledoSample(weight,unit,status.decode(),timestamp,sequence)
+        raise MettlerToledoError('Shared memory {0} is being written continuously.'.format(self.name))
+
+    def wait(self,sequence=0,timeout=None,poll_period=0.0005):
+        '''
+        Returns the first sample with a sequence greater than sequence,
+        or None after timeout seconds.
+        '''
+        t_end = None
+        if timeout is not None:
+            t_end = time.monotonic() + timeout
+        while True:
+            sample = self.read()
+            if (sample is not None) and (sample.sequence > sequence):
+                return sample
+            if (t_end is not None) and (time.monotonic() >= t_end):
+                return None
+            time.sleep(poll_period)
+
+    def close(self):
+        if self._shm is None:
+            return
+        self._buf = None
+        self._shm.close()
+        self._shm = None
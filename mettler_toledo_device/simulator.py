@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division
+import os
+import tty
+import termios
+import time
+import math
+import random
+import select
+import threading
+
+from .response import COM_BAUDRATE_CODES
+
+
+class MettlerToledoSimulator(object):
+    '''
+    Software balance that speaks MT-SICS over a pseudo-terminal, so the
+    package can be exercised and benchmarked without a physical
+    balance. Linux and Mac OS X only.
+
+    The displayed weight approaches the load set with set_load()
+    exponentially with time constant settling_time, with gaussian
+    noise added, and is reported stable once the remaining transient
+    and the noise are both within stability_tolerance.
+
+    Commands are only understood when the port is opened at baudrate,
+    which the COM command changes up to max_baudrate. With wire_time
+    the replies are delayed by their transmission time at baudrate.
+
+    Example Usage:
+
+    sim = MettlerToledoSimulator(latency=0.005,noise=0.00005,settling_time=0.2)
+    sim.start()
+    dev = MettlerToledoDevice(port=sim.port)
+    sim.set_load(12.5)
+    dev.get_weight()
+    [12.4871, 'g', 'D']
+    sim.stop()
+    '''
+    _COMMAND_LEVELS = [(0,'I0'),(0,'I1'),(0,'I2'),(0,'I3'),(0,'I4'),(0,'I5'),
+                       (0,'S'),(0,'SI'),(0,'SIR'),(0,'Z'),(0,'@'),
+                       (1,'SR'),(1,'ZI'),(1,'T'),(1,'TI'),(2,'TA'),(2,'TAC'),(2,'SIU'),
+                       (2,'C0'),(2,'C3'),(2,'COM')]
+    _STABLE_TIMEOUT = 3.0
+    _REPEAT_PERIOD = 0.01
+
+    def __init__(self,
+                 serial_number='1126493049',
+                 model='XS204',
+                 balance_type='Excellence',
+                 capacity=220.0,
+                 resolution=0.0001,
+                 unit='g',
+                 latency=0.0,
+                 noise=0.0,
+                 settling_time=0.0,
+                 stability_tolerance=None,
+                 stable_timeout=None,
+                 repeat_period=None,
+                 seed=None,
+                 baudrate=9600,
+                 max_baudrate=115200,
+                 wire_time=False,
+                 debug=False):
+        self.serial_number = str(serial_number)
+        self.model = model
+        self.balance_type = balance_type
+        self.capacity = capacity
+        self.resolution = resolution
+        self.unit = unit
+        self.latency = latency
+        self.noise = noise
+        self.settling_time = settling_time
+        if stability_tolerance is None:
+            stability_tolerance = 2*resolution
+        self.stability_tolerance = stability_tolerance
+        if stable_timeout is None:
+            stable_timeout = self._STABLE_TIMEOUT
+        self.stable_timeout = stable_timeout
+        if repeat_period is None:
+            repeat_period = self._REPEAT_PERIOD
+        self.repeat_period = repeat_period
+        self.baudrate = baudrate
+        self.max_baudrate = max_baudrate
+        self.wire_time = wire_time
+        self.debug = debug
+        self.port = None
+        self._pending_baudrate = None
+        self._decimals = max(0,int(round(-math.log10(resolution))))
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._load = 0.0
+        self._load_previous = 0.0
+        self._load_time = time.monotonic()
+        self._zero_offset = 0.0
+        self._tare = 0.0
+        self._injected_errors = []
+        self._repeat_command = None
+        self._repeat_last = None
+        self._master_fd = None
+        self._slave_fd = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.command_counts = {}
+
+    def _debug_print(self, *args):
+        if self.debug:
+            print(*args)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self,*exc_info):
+        self.stop()
+
+    def start(self):
+        '''
+        Open the pseudo-terminal and start answering commands. The
+        serial port name to open is available as self.port.
+        '''
+        self._master_fd, self._slave_fd = os.openpty()
+        tty.setraw(self._master_fd)
+        tty.setraw(self._slave_fd)
+        self.port = os.ttyname(self._slave_fd)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master_fd,self._slave_fd):
+            if fd is not None:
+                os.close(fd)
+        self._master_fd = None
+        self._slave_fd = None
+
+    def set_load(self,load):
+        '''
+        Put load (in unit) on the pan. The displayed weight settles
+        towards it.
+        '''
+        with self._lock:
+            now = time.monotonic()
+            self._load_previous = self._get_gross(now,noise=False)
+            self._load = float(load)
+            self._load_time = now
+
+    def get_load(self):
+        return self._load
+
+    def inject_error(self,reply):
+        '''
+        Answer the next command with reply instead, for example 'ES',
+        'ET' or 'EL'.
+        '''
+        with self._lock:
+            self._injected_errors.append(reply)
+
+    def drop_reply(self):
+        '''
+        Do not answer the next command, like a reply lost on the line.
+        '''
+        with self._lock:
+            self._injected_errors.append(None)
+
+    def _get_port_baudrate(self):
+        speed = termios.tcgetattr(self._slave_fd)[5]
+        for baudrate in COM_BAUDRATE_CODES:
+            if getattr(termios,'B{0}'.format(baudrate),None) == speed:
+                return baudrate
+        return None
+
+    def _get_gross(self,now,noise=True):
+        gross = self._load
+        if self.settling_time > 0:
+            transient = (self._load_previous - self._load)*math.exp(-(now - self._load_time)/self.settling_time)
+            gross += transient
+        if noise and (self.noise > 0):
+            gross += self._random.gauss(0.0,self.noise)
+        return gross
+
+    def _is_stable(self,now):
+        if self.noise > self.stability_tolerance:
+            return False
+        if self.settling_time <= 0:
+            return True
+        transient = abs(self._load_previous - self._load)*math.exp(-(now - self._load_time)/self.settling_time)
+        return transient <= self.stability_tolerance
+
+    def _read_weight(self):
+        '''
+        Returns (status, displayed weight) where status is 'S', 'D',
+        '+' or '-'.
+        '''
+        with self._lock:
+            now = time.monotonic()
+            gross = self._get_gross(now)
+            stable = self._is_stable(now)
+            zero_offset = self._zero_offset
+            tare = self._tare
+        if gross > self.capacity:
+            return '+', None
+        if gross < -0.01*self.capacity:
+            return '-', None
+        weight = round(gross - zero_offset - tare,self._decimals)
+        if stable:
+            return 'S', weight
+        return 'D', weight
+
+    def _wait_stable(self):
+        t_end = time.monotonic() + self.stable_timeout
+        while True:
+            status, weight = self._read_weight()
+            if (status != 'D') or (time.monotonic() >= t_end) or self._stop_event.is_set():
+                return status, weight
+            time.sleep(self.repeat_period)
+
+    def _format_weight(self,command,status,weight):
+        if weight is None:
+            return '{0} {1}'.format(command,status)
+        return '{0} {1} {2:>10.{3}f} {4}'.format(command,status,weight,self._decimals,self.unit)
+
+    def _zero(self,command,status,weight):
+        if status in ('+','-'):
+            return '{0} {1}'.format(command,status)
+        with self._lock:
+            gross = self._get_gross(time.monotonic(),noise=False)
+            if abs(gross) > 0.02*self.capacity:
+                if gross > 0:
+                    return '{0} +'.format(command)
+                return '{0} -'.format(command)
+            self._zero_offset = gross
+        return None
+
+    def _set_tare(self,command,status,weight):
+        if status in ('+','-'):
+            return '{0} {1}'.format(command,status)
+        with self._lock:
+            tare = round(self._get_gross(time.monotonic(),noise=False) - self._zero_offset,self._decimals)
+            if tare < 0:
+                return '{0} -'.format(command)
+            self._tare = tare
+        return self._format_weight(command,status,tare)
+
+    def _preset_tare(self,fields):
+        try:
+            tare = float(fields[1])
+        except ValueError:
+            return 'ES'
+        if (len(fields) != 3) or (fields[2] != self.unit) or (tare < 0) or (tare > self.capacity):
+            return 'TA L'
+        with self._lock:
+            self._tare = round(tare,self._decimals)
+        return self._format_weight('TA','A',self._tare)
+
+    def _handle_command(self,line):
+        fields = line.split()
+        if not fields:
+            return []
+        command = fields[0]
+        self.command_counts[command] = self.command_counts.get(command,0) + 1
+        # any command ends repeat mode
+        self._repeat_command = None
+        with self._lock:
+            if self._injected_errors:
+                reply = self._injected_errors.pop(0)
+                if reply is None:
+                    return []
+                return [reply]
+        if command == '@':
+            with self._lock:
+                self._injected_errors = []
+                self._tare = 0.0
+            return ['I4 A "{0}"'.format(self.serial_number)]
+        if (len(fields) > 1) and (command not in ('COM','TA')):
+            if command in [c for level, c in self._COMMAND_LEVELS]:
+                return ['EL']
+            return ['ES']
+        if command == 'COM':
+            return self._com(fields)
+        if command == 'I0':
+            replies = []
+            for index, (level, name) in enumerate(self._COMMAND_LEVELS):
+                if index < (len(self._COMMAND_LEVELS) - 1):
+                    status = 'B'
+                else:
+                    status = 'A'
+                replies.append('I0 {0} {1} "{2}"'.format(status,level,name))
+            return replies
+        elif command == 'I1':
+            return ['I1 A "01" "2.20" "1.00" "1.00" "1.00"']
+        elif command == 'I2':
+            return ['I2 A "{0} {1} {2:.{3}f} {4}"'.format(self.model,self.balance_type,self.capacity,self._decimals,self.unit)]
+        elif command == 'I3':
+            return ['I3 A "2.10 10.28.0.493.142"']
+        elif command == 'I4':
+            return ['I4 A "{0}"'.format(self.serial_number)]
+        elif command == 'I5':
+            return ['I5 A "12121306C"']
+        elif command in ('SI','SIU'):
+            status, weight = self._read_weight()
+            return [self._format_weight('S',status,weight)]
+        elif command == 'S':
+            status, weight = self._wait_stable()
+            if status == 'D':
+                return ['S I']
+            return [self._format_weight('S',status,weight)]
+        elif command in ('SIR','SR'):
+            status, weight = self._read_weight()
+            self._repeat_command = command
+            self._repeat_last = weight
+            return [self._format_weight('S',status,weight)]
+        elif command == 'Z':
+            status, weight = self._wait_stable()
+            if status == 'D':
+                return ['Z I']
+            return [self._zero('Z',status,weight) or 'Z A']
+        elif command == 'ZI':
+            status, weight = self._read_weight()
+            return [self._zero('ZI',status,weight) or 'ZI {0}'.format(status)]
+        elif command == 'T':
+            status, weight = self._wait_stable()
+            if status == 'D':
+                return ['T I']
+            return [self._set_tare('T',status,weight)]
+        elif command == 'TI':
+            status, weight = self._read_weight()
+            return [self._set_tare('TI',status,weight)]
+        elif command == 'TA':
+            if len(fields) > 1:
+                return [self._preset_tare(fields)]
+            return [self._format_weight('TA','A',self._tare)]
+        elif command == 'TAC':
+            with self._lock:
+                self._tare = 0.0
+            return ['TAC A']
+        elif command == 'C0':
+            return ['C0 A 0 0 "{0:.{1}f} {2}"'.format(self.capacity/2,self._decimals,self.unit)]
+        elif command == 'C3':
+            status, weight = self._wait_stable()
+            if status == 'D':
+                return ['C3 I']
+            return ['C3 B','C3 A']
+        return ['ES']
+
+    def _com(self,fields):
+        codes = dict((code,baudrate) for baudrate, code in COM_BAUDRATE_CODES.items())
+        if len(fields) == 1:
+            return ['COM A 0 {0} 3 0'.format(COM_BAUDRATE_CODES[self.baudrate])]
+        try:
+            baudrate = codes[int(fields[2])]
+        except (IndexError, ValueError, KeyError):
+            return ['ES']
+        if (fields[1] != '0') or (baudrate > self.max_baudrate):
+            return ['EL']
+        # switch after the reply went out at the old baudrate
+        self._pending_baudrate = baudrate
+        return ['COM A']
+
+    def _write_replies(self,replies):
+        for reply in replies:
+            self._debug_print('reply', reply)
+            data = (reply + '\r\n').encode()
+            if self.wire_time:
+                # 10 bits per character with 8N1 framing
+                time.sleep(10.0*len(data)/self.baudrate)
+            os.write(self._master_fd,data)
+        if self._pending_baudrate is not None:
+            self.baudrate = self._pending_baudrate
+            self._pending_baudrate = None
+
+    def _write_garbage(self,length):
+        # what a balance at another baudrate looks like: framing noise
+        # without line endings
+        data = bytes(self._random.choice(b'\x00\x80\xf0\xf8\xfe\xff') for i in range(max(length//2,1)))
+        os.write(self._master_fd,data)
+
+    def _repeat(self):
+        status, weight = self._read_weight()
+        if (self._repeat_command == 'SR') and (weight == self._repeat_last):
+            return
+        self._repeat_last = weight
+        self._write_replies([self._format_weight('S',status,weight)])
+
+    def _run(self):
+        buffer = b''
+        next_repeat = time.monotonic()
+        while not self._stop_event.is_set():
+            timeout = 0.05
+            if self._repeat_command is not None:
+                timeout = max(0.0,min(timeout,next_repeat - time.monotonic()))
+            try:
+                readable, _, _ = select.select([self._master_fd],[],[],timeout)
+            except (OSError, ValueError):
+                break
+            if readable:
+                try:
+                    data = os.read(self._master_fd,1024)
+                except OSError:
+                    break
+                buffer += data
+                while b'\n' in buffer:
+                    line, buffer = buffer.split(b'\n',1)
+                    if self._get_port_baudrate() != self.baudrate:
+                        self._debug_print('baudrate mismatch', self._get_port_baudrate())
+                        self._write_garbage(len(line))
+                        continue
+                    line = line.decode('ascii','replace').strip()
+                    self._debug_print('command', line)
+                    replies = self._handle_command(line)
+                    if replies and (self.latency > 0):
+                        time.sleep(self.latency)
+                    self._write_replies(replies)
+                    next_repeat = time.monotonic() + self.repeat_period
+            if (self._repeat_command is not None) and (time.monotonic() >= next_repeat):
+                self._repeat()
+                next_repeat += self.repeat_period
+                if next_repeat < time.monotonic():
+                    next_repeat = time.monotonic() + self.repeat_period
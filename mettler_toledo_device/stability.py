@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division
+import collections
+import math
+
+from .response import MettlerToledoError
+
+
+class MettlerToledoStabilityError(MettlerToledoError):
+    '''
+    Raised when a weight does not become stable. reason is 'timeout',
+    'overload', 'underload' or 'stream ended', std and slope are the
+    last values the detector computed (None before a full window).
+    '''
+    def __init__(self,value,reason,std=None,slope=None):
+        super(MettlerToledoStabilityError,self).__init__(value)
+        self.reason = reason
+        self.std = std
+        self.slope = slope
+
+
+class MettlerToledoStabilityDetector(object):
+    '''
+    Decides stability on the client from a sequence of samples. A
+    weight is stable once the samples of the last window seconds have a
+    standard deviation of at most tolerance and a least squares slope
+    of at most slope_tolerance (unit per second, tolerance/window by
+    default). With use_balance_status a sample the balance itself
+    reports as stable is accepted immediately.
+
+    Example Usage:
+
+    detector = MettlerToledoStabilityDetector(tolerance=0.0005,window=0.2)
+    for sample in dev.iter_samples(timeout=1.0):
+        if detector.add(sample):
+            break
+    detector.get_weight()
+    [10.0012, 'g']
+    '''
+    _MIN_SAMPLES = 3
+
+    def __init__(self,tolerance,window=0.3,slope_tolerance=None,min_samples=None,use_balance_status=True):
+        self.tolerance = tolerance
+        self.window = window
+        if slope_tolerance is None:
+            slope_tolerance = tolerance/window
+        self.slope_tolerance = slope_tolerance
+        if min_samples is None:
+            min_samples = self._MIN_SAMPLES
+        self.min_samples = min_samples
+        self.use_balance_status = use_balance_status
+        self.reset()
+
+    def reset(self):
+        self._samples = collections.deque()
+        self._unit = None
+        self._weight = None
+        self.std = None
+        self.slope = None
+
+    def get_weight(self):
+        '''
+        Returns [weight, unit] of the sample that completed the last
+        stable window or None.
+        '''
+        if self._weight is None:
+            return None
+        return [self._weight,self._unit]
+
+    def add(self,sample):
+        '''
+        Adds a MettlerToledoSample (or anything with weight, unit,
+        status and timestamp) and returns True if the weight is stable.
+        Samples without a weight or with a changed unit restart the
+        window.
+        '''
+        self._weight = None
+        if sample.weight is None:
+            self.reset()
+            return False
+        if sample.unit != self._unit:
+            self.reset()
+            self._unit = sample.unit
+        if self.use_balance_status and (sample.status == 'S'):
+            self._weight = sample.weight
+            return True
+        samples = self._samples
+        samples.append((sample.timestamp,sample.weight))
+        t_start = sample.timestamp - self.window
+        # keep one sample at or before the window start so the window
+        # is known to be covered
+        while (len(samples) > 1) and (samples[1][0] <= t_start):
+            samples.popleft()
+        if (len(samples) < self.min_samples) or (samples[0][0] > t_start):
+            return False
+        count = len(samples)
+        timestamps = [t for t, w in samples]
+        weights = [w for t, w in samples]
+        w_mean = sum(weights)/count
+        self.std = math.sqrt(sum((w - w_mean)**2 for w in weights)/count)
+        self.slope = _get_slope(timestamps,weights)
+        if (self.std <= self.tolerance) and (abs(self.slope) <= self.slope_tolerance):
+            self._weight = sample.weight
+            return True
+        return False
+
+    def check_status(self,sample):
+        '''
+        Raises MettlerToledoStabilityError for overload and underload
+        samples, which can never become stable.
+        '''
+        if sample.status == '+':
+            raise MettlerToledoStabilityError('Balance in overload range.','overload',self.std,self.slope)
+        elif sample.status == '-':
+            raise MettlerToledoStabilityError('Balance in underload range.','underload',self.std,self.slope)
+
+
+def _get_slope(timestamps,weights):
+    '''
+    Returns the least squares slope of weights over timestamps, 0.0
+    when the timestamps are all equal. Takes lists or numpy arrays,
+    arrays are reduced without a Python loop.
+    '''
+    if hasattr(timestamps,'dot'):
+        t = timestamps - timestamps.mean()
+        numerator = float(t.dot(weights - weights.mean()))
+        denominator = float(t.dot(t))
+    else:
+        count = len(timestamps)
+        t_mean = sum(timestamps)/count
+        w_mean = sum(weights)/count
+        numerator = 0.0
+        denominator = 0.0
+        for t, w in zip(timestamps,weights):
+            dt = t - t_mean
+            numerator += dt*(w - w_mean)
+            denominator += dt*dt
+    if denominator <= 0:
+        return 0.0
+    return numerator/denominator
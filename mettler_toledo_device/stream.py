@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division
+import serial
+import threading
+import time
+import collections
+import itertools
+
+from .response import MettlerToledoError, parse_response
+
+
+class MettlerToledoSample(collections.namedtuple('MettlerToledoSample',
+                                                 ['weight','unit','status','timestamp','sequence'])):
+    '''
+    Single weight value pushed by the balance while streaming.
+
+    status is 'S' (stable), 'D' (dynamic), '+' (overload), '-'
+    (underload) or 'I' (not executable at present). weight and unit are
+    None unless status is 'S' or 'D'. timestamp is time.monotonic() at
+    the moment the line was received and sequence counts samples since
+    the stream started.
+    '''
+    __slots__ = ()
+
+    @property
+    def stable(self):
+        return self.status == 'S'
+
+
+def _parse_sample_line(line):
+    '''
+    Parses one repeat reply line ('S S     100.00 g') into [weight,
+    unit, status], returns None for lines that are not weight replies.
+    '''
+    try:
+        response = parse_response(line)
+    except MettlerToledoError:
+        return None
+    if response.command != 'S':
+        return None
+    if response.value is not None:
+        return [response.value,response.unit,response.status]
+    elif response.status in ('+','-','I'):
+        return [None,None,response.status]
+    return None
+
+
+class MettlerToledoStreamReader(threading.Thread):
+    '''
+    Background thread that reads the lines a balance pushes in repeat
+    mode (SIR/SR) and keeps the most recent samples in a bounded ring
+    buffer. Each sample is dispatched to subscriptions, if given, as
+    soon as it is read.
+    '''
+    def __init__(self,serial_device,buffer_size=1024,subscriptions=None,debug=False):
+        super(MettlerToledoStreamReader,self).__init__()
+        self.daemon = True
+        self.debug = debug
+        self._serial_device = serial_device
+        self._buffer = collections.deque(maxlen=buffer_size)
+        self._subscriptions = subscriptions
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._sequence = 0
+        self._latest_line = None
+        self._error = None
+
+    def _debug_print(self, *args):
+        if self.debug:
+            print(*args)
+
+    def run(self):
+        partial = b''
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    line = self._serial_device.readline()
+                except (serial.SerialException, IOError, TypeError) as e:
+                    if not self._stop_event.is_set():
+                        self._error = e
+                        self._debug_print('stream error', e)
+                    break
+                if not line:
+                    continue
+                if not line.endswith(b'\n'):
+                    # readline timed out in the middle of a line
+                    partial += line
+                    continue
+                line = partial + line
+                partial = b''
+                self._handle_line(line,time.monotonic())
+        finally:
+            with self._condition:
+                self._condition.notify_all()
+
+    def _handle_line(self,line,timestamp):
+        weight = _parse_sample_line(line)
+        if weight is None:
+            self._debug_print('stream ignored', line)
+            return None
+        with self._condition:
+            self._sequence += 1
+            sample = MettlerToledoSample(weight[0],weight[1],weight[2],timestamp,self._sequence)
+            self._buffer.append(sample)
+            self._latest_line = line
+            self._condition.notify_all()
+        subscriptions = self._subscriptions
+        if subscriptions:
+            subscriptions.dispatch(sample)
+        return sample
+
+    def stop(self,timeout=None):
+        self._stop_event.set()
+        if self.is_alive() and (threading.current_thread() is not self):
+            self.join(timeout)
+
+    def get_error(self):
+        return self._error
+
+    def latest(self):
+        with self._condition:
+            if self._buffer:
+                return self._buffer[-1]
+            return None
+
+    def latest_line(self):
+        with self._condition:
+            return self._latest_line
+
+    def samples(self):
+        with self._condition:
+            return list(self._buffer)
+
+    def iter_samples(self,timeout=None):
+        with self._condition:
+            sequence = self._sequence
+        while True:
+            with self._condition:
+                if not self._condition.wait_for(lambda: (self._sequence > sequence) or (not self.is_alive()),timeout):
+                    return
+                new_count = self._sequence - sequence
+                if new_count == 0:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                start = max(len(self._buffer) - new_count,0)
+                new_samples = list(itertools.islice(self._buffer,start,None))
+                sequence = self._sequence
+            for sample in new_samples:
+                yield sample
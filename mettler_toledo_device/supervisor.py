@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division
+import os
+import threading
+
+import serial
+try:
+    from serial.tools import list_ports
+except ImportError:
+    list_ports = None
+
+from serial_interface import ReadError
+
+from .response import MettlerToledoError
+from .mettler_toledo_device import find_mettler_toledo_device_ports
+
+
+def get_port_fingerprints(try_ports=None):
+    '''
+    Returns a dict mapping each serial port to a value that changes
+    when a different adapter appears under the same name: the USB
+    hardware id for enumerated ports, the device number and change
+    time for the other paths in try_ports.
+    '''
+    fingerprints = {}
+    if list_ports is not None:
+        for port_info in list_ports.comports():
+            fingerprints[port_info.device] = port_info.hwid
+    for port in try_ports or []:
+        if port in fingerprints:
+            continue
+        try:
+            stat = os.stat(port)
+        except OSError:
+            continue
+        fingerprints[port] = (stat.st_rdev,stat.st_ctime)
+    return fingerprints
+
+
+class MettlerToledoSupervisor(object):
+    '''
+    Watches a MettlerToledoDevice from a background thread and
+    reconnects it in place when its adapter drops out: on a
+    SerialException, max_timeouts consecutive timeouts, the port
+    disappearing or the stream dying. The balance is looked for on its
+    port first, then on the ports that are new or changed since the
+    last scan, matched by its serial number, retrying with backoff
+    doubling from backoff_min to backoff_max seconds. Streams and
+    subscriptions resume on the same device object.
+
+    Example Usage:
+
+    supervisor = MettlerToledoSupervisor(dev,on_reconnect=lambda dev: print(dev.get_port()))
+    supervisor.start()
+    supervisor.stop()
+    '''
+    def __init__(self,dev,backoff_min=0.1,backoff_max=5.0,check_period=0.5,max_timeouts=3,
+                 try_ports=None,on_disconnect=None,on_reconnect=None,debug=False):
+        self.device = dev
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.check_period = check_period
+        self.max_timeouts = max_timeouts
+        self.try_ports = try_ports
+        self.on_disconnect = on_disconnect
+        self.on_reconnect = on_reconnect
+        self.debug = debug
+        self.serial_number = dev.get_serial_number()
+        self.reconnect_count = 0
+        self._timeouts = 0
+        self._lost = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._fingerprints = get_port_fingerprints(self._get_try_ports())
+
+    def _debug_print(self, *args):
+        if self.debug:
+            print(*args)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self,*exc_info):
+        self.stop()
+
+    def _get_try_ports(self):
+        ports = list(self.try_ports or [])
+        port = self.device.get_port()
+        if port not in ports:
+            ports.append(port)
+        return ports
+
+    def start(self):
+        self._stop_event.clear()
+        self.device.add_request_hook(self._request_hook)
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._lost.set()
+        self.device.remove_request_hook(self._request_hook)
+        if (self._thread is not None) and (threading.current_thread() is not self._thread):
+            self._thread.join()
+        self._thread = None
+
+    def is_connected(self):
+        return not self._lost.is_set()
+
+    def _request_hook(self,event):
+        error = event.error
+        if error is None:
+            self._timeouts = 0
+        elif isinstance(error,(ReadError,serial.SerialTimeoutException)):
+            self._timeouts += 1
+            if self._timeouts >= self.max_timeouts:
+                self._set_lost('{0} timeouts'.format(self._timeouts))
+        elif isinstance(error,(serial.SerialException,OSError)):
+            self._set_lost(error)
+
+    def _set_lost(self,reason):
+        if not self._lost.is_set():
+            self._debug_print('connection lost', self.device.get_port(), reason)
+            self._lost.set()
+
+    def _check(self):
+        dev = self.device
+        port = dev.get_port()
+        if (os.sep in port) and not os.path.exists(port):
+            self._set_lost('port removed')
+        elif (dev.get_stream_config() is not None) and not dev.is_streaming():
+            self._set_lost('stream stopped')
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._check()
+            if not self._lost.wait(self.check_period):
+                continue
+            if self._stop_event.is_set():
+                return
+            if self.on_disconnect is not None:
+                self.on_disconnect(self.device)
+            self._reconnect()
+
+    def _reopen(self,port):
+        try:
+            ready_time = self.device.reopen(port)
+        except (serial.SerialException, OSError) as e:
+            self._debug_print('reopen failed', port, e)
+            return False
+        if ready_time is None:
+            return False
+        try:
+            return self.device.get_serial_number() == self.serial_number
+        except (MettlerToledoError, ReadError, serial.SerialException) as e:
+            self._debug_print('identify failed', port, e)
+            return False
+
+    def _find_port(self):
+        '''
+        Probes only the ports that appeared or changed since the last
+        scan for the balance serial number. Every port probed is
+        remembered with its fingerprint, so ports that do not answer
+        are probed again only when their fingerprint changes.
+        '''
+        fingerprints = get_port_fingerprints(self._get_try_ports())
+        port = self.device.get_port()
+        changed = [p for p, fingerprint in fingerprints.items()
+                   if (p != port) and (self._fingerprints.get(p) != fingerprint)]
+        self._fingerprints = fingerprints
+        if not changed:
+            return None
+        self._debug_print('probing', changed)
+        ports = find_mettler_toledo_device_ports(baudrate=self.device.get_baudrate(),
+                                                 use_ports=changed,
+                                                 debug=self.debug)
+        for p, serial_number in ports.items():
+            if str(serial_number) == str(self.serial_number):
+                return p
+        return None
+
+    def _reconnect(self):
+        backoff = self.backoff_min
+        while not self._stop_event.is_set():
+            port = self.device.get_port()
+            found = self._reopen(port)
+            if not found:
+                new_port = self._find_port()
+                if new_port is not None:
+                    port = new_port
+                    found = self._reopen(port)
+            if found:
+                self._timeouts = 0
+                self.reconnect_count += 1
+                self._fingerprints = get_port_fingerprints(self._get_try_ports())
+                self._lost.clear()
+                self._debug_print('reconnected', port)
+                if self.on_reconnect is not None:
+                    self.on_reconnect(self.device)
+                return
+            if self._stop_event.wait(backoff):
+                return
+            backoff = min(2*backoff,self.backoff_max)
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function, division
+import os
+import glob
+import struct
+import threading
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# unit codes stored in the records, 0 when a sample has no weight
+UNITS = ('','g','kg','mg','ug','ct','lb','oz','ozt','dwt','GN','N','%')
+_UNIT_CODES = dict((unit,code) for code, unit in enumerate(UNITS))
+
+# file header: magic, version, header size, record size, creation wall time
+_HEADER = struct.Struct('<4sIIId')
+_HEADER_SIZE = 64
+_MAGIC = b'MTWL'
+_VERSION = 1
+# record: monotonic time, wall time, weight (NaN when None), unit code,
+# status character, padding to 32 bytes
+_RECORD = struct.Struct('<dddBc6x')
+_EXTENSION = '.mtwl'
+
+if numpy is not None:
+    RECORD_DTYPE = numpy.dtype([('timestamp','<f8'),
+                                ('wall_time','<f8'),
+                                ('weight','<f8'),
+                                ('unit','u1'),
+                                ('status','S1'),
+                                ('padding','V6')])
+else:
+    RECORD_DTYPE = None
+
+
+class MettlerToledoLogWriter(object):
+    '''
+    Appends fixed size binary weight records to chunk files in
+    directory, starting a new file every chunk_records records and
+    deleting the oldest files beyond max_files. Read them back with
+    MettlerToledoLogReader.
+
+    Example Usage:
+
+    writer = MettlerToledoLogWriter('/data/balance0')
+    writer.attach(dev)  # logs every streamed sample
+    dev.start_stream()
+    writer.close()
+    '''
+    _CHUNK_RECORDS = 1048576
+
+    def __init__(self,directory,prefix='weights',chunk_records=None,max_files=None,buffer_size=65536):
+        if chunk_records is None:
+            chunk_records = self._CHUNK_RECORDS
+        self.directory = directory
+        self.prefix = prefix
+        self.chunk_records = int(chunk_records)
+        self.max_files = max_files
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_records = 0
+        self._file_index = 0
+        self._device = None
+        self._subscription = None
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        existing = _list_log_files(directory,prefix)
+        if existing:
+            self._file_index = _get_file_index(existing[-1]) + 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc_info):
+        self.close()
+
+    def _open_file(self):
+        wall_time = time.time()
+        name = '{0}-{1:08d}-{2}{3}'.format(self.prefix,
+                                           self._file_index,
+                                           time.strftime('%Y%m%dT%H%M%S',time.localtime(wall_time)),
+                                           _EXTENSION)
+        self._file_index += 1
+        self._file = open(os.path.join(self.directory,name),'wb',buffering=self.buffer_size)
+        header = _HEADER.pack(_MAGIC,_VERSION,_HEADER_SIZE,_RECORD.size,wall_time)
+        self._file.write(header.ljust(_HEADER_SIZE,b'\x00'))
+        self._file_records = 0
+        self._remove_old_files()
+
+    def _remove_old_files(self):
+        if self.max_files is None:
+            return
+        files = _list_log_files(self.directory,self.prefix)
+        for path in files[:max(len(files) - self.max_files,0)]:
+            os.remove(path)
+
+    def append(self,timestamp,weight,unit,status,wall_time=None):
+        '''
+        Appends one record. timestamp is time.monotonic() when the
+        weight was read, wall_time defaults to now.
+        '''
+        if wall_time is None:
+            wall_time = time.time()
+        if weight is None:
+            weight = float('nan')
+        record = _RECORD.pack(timestamp,wall_time,weight,_UNIT_CODES.get(unit or '',0),status.encode()[:1])
+        with self._lock:
+            if (self._file is None) or (self._file_records >= self.chunk_records):
+                if self._file is not None:
+                    self._file.close()
+                self._open_file()
+            self._file.write(record)
+            self._file_records += 1
+
+    def append_sample(self,sample):
+        '''
+        Appends a MettlerToledoSample.
+        '''
+        self.append(sample.timestamp,sample.weight,sample.unit,sample.status)
+
+    def attach(self,dev):
+        '''
+        Log every sample dev streams, see MettlerToledoDevice.on_sample().
+        '''
+        self.detach()
+        self._device = dev
+        self._subscription = dev.on_sample(lambda event: self.append_sample(event.sample))
+
+    def detach(self):
+        if self._subscription is not None:
+            self._device.remove_subscription(self._subscription)
+        self._device = None
+        self._subscription = None
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        self.detach()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _list_log_files(directory,prefix):
+    # the zero padded file index keeps the names in write order
+    return sorted(glob.glob(os.path.join(glob.escape(directory),glob.escape(prefix) + '-*' + _EXTENSION)))
+
+def _get_file_index(path):
+    return int(os.path.basename(path).split('-')[-2])
+
+
+class MettlerToledoLogReader(object):
+    '''
+    Memory maps the files written by MettlerToledoLogWriter and returns
+    NumPy structured array views (fields timestamp, wall_time, weight,
+    unit, status) for time range queries without parsing or copying.
+    Units are codes into UNITS.
+
+    Example Usage:
+
+    reader = MettlerToledoLogReader('/data/balance0')
+    for records in reader.get_range(t_start=time.time() - 3600):
+        records['weight'].mean()
+    reader.get_weights(t_start=time.time() - 60)
+    array([10.0012, 10.0013, ...])
+    '''
+    def __init__(self,directory,prefix='weights'):
+        if numpy is None:
+            raise ImportError('MettlerToledoLogReader requires numpy, pip install numpy')
+        self.directory = directory
+        self.prefix = prefix
+        self._maps = {}
+
+    def _get_records(self,path):
+        size = os.path.getsize(path)
+        # the last record of a file being written may be incomplete
+        count = max((size - _HEADER_SIZE)//_RECORD.size,0)
+        cached = self._maps.get(path)
+        if (cached is not None) and (len(cached) == count):
+            return cached
+        with open(path,'rb') as f:
+            magic, version, header_size, record_size, wall_time = _HEADER.unpack(f.read(_HEADER.size))
+        if (magic != _MAGIC) or (version != _VERSION) or (record_size != _RECORD.size):
+            raise ValueError('{0} is not a weight log file'.format(path))
+        if count == 0:
+            records = numpy.zeros(0,dtype=RECORD_DTYPE)
+        else:
+            records = numpy.memmap(path,dtype=RECORD_DTYPE,mode='r',offset=header_size,shape=(count,))
+        self._maps[path] = records
+        return records
+
+    def get_files(self):
+        return _list_log_files(self.directory,self.prefix)
+
+    def get_range(self,t_start=None,t_end=None,field='wall_time'):
+        '''
+        Returns a list of record array views, one per file, with
+        t_start <= field < t_end. field is 'wall_time' (time.time(),
+        comparable across restarts) or 'timestamp' (time.monotonic()).
+        '''
+        views = []
+        files = self.get_files()
+        self._maps = dict((path,records) for path, records in self._maps.items() if path in files)
+        for path in files:
+            records = self._get_records(path)
+            if len(records) == 0:
+                continue
+            times = records[field]
+            if (t_start is not None) and (times[-1] < t_start):
+                continue
+            if (t_end is not None) and (times[0] >= t_end):
+                continue
+            start = 0
+            end = len(records)
+            if t_start is not None:
+                start = numpy.searchsorted(times,t_start,side='left')
+            if t_end is not None:
+                end = numpy.searchsorted(times,t_end,side='left')
+            if end > start:
+                views.append(records[start:end])
+        return views
+
+    def get_weights(self,t_start=None,t_end=None,field='wall_time'):
+        '''
+        Returns the weights in the time range as one array, a view when
+        they are all in one file.
+        '''
+        views = self.get_range(t_start,t_end,field)
+        if len(views) == 1:
+            return views[0]['weight']
+        if not views:
+            return numpy.zeros(0,dtype=numpy.float64)
+        return numpy.concatenate([view['weight'] for view in views])
+
+    def close(self):
+        self._maps = {}
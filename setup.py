@@ -47,15 +47,13 @@ setup(
 
         # Specify the Python versions you support here. In particular, ensure
         # that you indicate whether you support Python 2, Python 3 or both.
-        # 'Programming Language :: Python :: 2',
-        # 'Programming Language :: Python :: 2.6',
-        'Programming Language :: Python :: 2.7',
-        # 'Programming Language :: Python :: 3',
-        # 'Programming Language :: Python :: 3.2',
-        # 'Programming Language :: Python :: 3.3',
-        # 'Programming Language :: Python :: 3.4',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
     ],
 
+    # module __getattr__ and asyncio.get_running_loop need Python 3.7
+    python_requires='>=3.7',
+
     # What does your project relate to?
     keywords='mettler toledo serial device',
 
@@ -71,6 +69,15 @@ setup(
                       'serial_interface',
     ],
 
+    # List additional groups of dependencies here (e.g. development
+    # dependencies). You can install these using the following syntax,
+    # for example:
+    # $ pip install -e .[asyncio]
+    extras_require={
+        'asyncio': ['pyserial-asyncio'],
+        'numpy': ['numpy'],
+    },
+
     # If there are data files included in your packages that need to be
     # installed, specify them here.  If using Python 2.6 or less, then these
     # have to be included in MANIFEST.in as well.
@@ -87,9 +94,10 @@ setup(
     # To provide executable scripts, use entry points in preference to the
     # "scripts" keyword. Entry points provide cross-platform support and allow
     # pip to create the appropriate form of executable for the target platform.
-    # entry_points={
-    #     'console_scripts': [
-    #         'sample=sample:main',
-    #     ],
-    # },
+    entry_points={
+        'console_scripts': [
+            'mettler-toledo=mettler_toledo_device.cli:main',
+            'mettler-toledo-gateway=mettler_toledo_device.gateway:main',
+        ],
+    },
 )
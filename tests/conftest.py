@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from mettler_toledo_device import MettlerToledoDevice
+from mettler_toledo_device.simulator import MettlerToledoSimulator
+
+
+@pytest.fixture
+def make_simulator():
+    '''
+    Returns a function that starts a MettlerToledoSimulator with the
+    given keyword arguments, the simulators are stopped after the test.
+    '''
+    simulators = []
+    def make(**kwargs):
+        kwargs.setdefault('repeat_period',0.01)
+        sim = MettlerToledoSimulator(**kwargs)
+        sim.start()
+        simulators.append(sim)
+        return sim
+    yield make
+    for sim in simulators:
+        sim.stop()
+
+@pytest.fixture
+def make_device():
+    '''
+    Returns a function that opens a MettlerToledoDevice with the given
+    keyword arguments, the devices are closed after the test.
+    '''
+    devices = []
+    def make(**kwargs):
+        dev = MettlerToledoDevice(**kwargs)
+        devices.append(dev)
+        return dev
+    yield make
+    for dev in devices:
+        dev.close()
+
+@pytest.fixture
+def sim(make_simulator):
+    return make_simulator()
+
+@pytest.fixture
+def dev(sim,make_device):
+    return make_device(port=sim.port)
+
+@pytest.fixture
+def dead_port():
+    '''
+    Returns the path of a pseudo-terminal nothing answers on.
+    '''
+    master_fd, slave_fd = os.openpty()
+    yield os.ttyname(slave_fd)
+    os.close(slave_fd)
+    os.close(master_fd)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+pytest.importorskip('serial_asyncio')
+
+from mettler_toledo_device import MettlerToledoError
+from mettler_toledo_device.asyncio_device import AsyncMettlerToledoDevice
+
+
+def _run(sim,function):
+    async def run():
+        async with AsyncMettlerToledoDevice(port=sim.port,timeout=0.2,write_write_delay=0.0) as dev:
+            return await function(dev)
+    return asyncio.run(run())
+
+async def _get_weights(dev,count):
+    results = []
+    for i in range(count):
+        try:
+            results.append(await dev.get_weight())
+        except MettlerToledoError as e:
+            results.append(e)
+    return results
+
+def test_lost_reply_does_not_shift_later_replies(sim):
+    sim.set_load(1.5)
+    sim.drop_reply()
+    results = _run(sim,lambda dev: _get_weights(dev,6))
+    assert isinstance(results[0],MettlerToledoError)
+    assert results[1:] == [[1.5,'g','S']]*5
+
+def test_late_reply_does_not_shift_later_replies(sim):
+    sim.set_load(1.5)
+    async def run(dev):
+        sim.latency = 0.3
+        results = await _get_weights(dev,1)
+        sim.latency = 0.0
+        return results + await _get_weights(dev,3)
+    results = _run(sim,run)
+    assert isinstance(results[0],MettlerToledoError)
+    assert results[1:] == [[1.5,'g','S']]*3
+
+def test_lost_reply_does_not_affect_other_commands(sim):
+    sim.set_load(1.5)
+    sim.drop_reply()
+    async def run(dev):
+        await _get_weights(dev,1)
+        return await dev.get_serial_number(), await dev.get_weight()
+    assert _run(sim,run) == (sim.serial_number,[1.5,'g','S'])
+
+def test_error_reply_skips_abandoned_request(sim):
+    sim.set_load(1.5)
+    sim.drop_reply()
+    async def run(dev):
+        await _get_weights(dev,1)
+        sim.inject_error('ES')
+        with pytest.raises(MettlerToledoError) as info:
+            await dev.get_serial_number()
+        assert info.value.reply_id == 'ES'
+        return await dev.get_weight()
+    assert _run(sim,run) == [1.5,'g','S']
+
+def test_error_result(sim):
+    sim.inject_error('ES')
+    assert _run(sim,lambda dev: dev.zero_stable()) is False
+
+def test_reset_reads_reply(sim):
+    async def run(dev):
+        await dev.reset()
+        sim.drop_reply()
+        with pytest.raises(MettlerToledoError):
+            await dev.reset()
+        return await dev.get_serial_number()
+    assert _run(sim,run) == sim.serial_number
+    assert sim.command_counts['@'] == 2
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+import time
+
+
+def test_auto_baudrate_finds_balance(make_simulator,make_device):
+    sim = make_simulator(baudrate=19200)
+    dev = make_device(port=sim.port,baudrate='auto')
+    assert dev.ready_time is not None
+    assert dev.get_baudrate() == 19200
+
+def test_auto_baudrate_timeout_is_total(dead_port,make_device):
+    t_start = time.monotonic()
+    dev = make_device(port=dead_port,baudrate='auto',ready_timeout=0.3)
+    assert dev.ready_time is None
+    assert (time.monotonic() - t_start) < 1.0
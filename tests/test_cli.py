@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from mettler_toledo_device import benchmark
+from mettler_toledo_device.cli import main
+
+
+def test_discover(make_simulator,dead_port,capsys):
+    sims = [make_simulator(serial_number=serial_number) for serial_number in ('1001','1002')]
+    assert main(['discover','--use-ports',sims[1].port,dead_port,sims[0].port]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert sorted(lines) == sorted(['{0} 1001'.format(sims[0].port),'{0} 1002'.format(sims[1].port)])
+
+def test_discover_nothing_found(dead_port,capsys):
+    assert main(['discover','--use-ports',dead_port,'--format','csv']) == 1
+    assert capsys.readouterr().out.splitlines() == ['port,serial_number']
+
+def test_info(sim,capsys):
+    assert main(['info','--port',sim.port,'--format','jsonl']) == 0
+    info = json.loads(capsys.readouterr().out)
+    assert info['port'] == sim.port
+    assert info['serial_number'] == sim.serial_number
+
+def test_read(sim,capsys):
+    sim.set_load(1.5)
+    assert main(['read','--port',sim.port,'--count','2','--format','csv']) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == 'time,weight,unit,status'
+    assert len(lines) == 3
+    assert lines[1].split(',')[1:] == ['1.5','g','S']
+
+def test_read_stable(sim,capsys):
+    sim.set_load(2.5)
+    assert main(['read','--port',sim.port,'--stable','--format','jsonl']) == 0
+    row = json.loads(capsys.readouterr().out)
+    assert (row['weight'], row['unit'], row['status']) == (2.5,'g','S')
+
+def test_stream(sim,capsys):
+    sim.set_load(1.5)
+    assert main(['stream','--port',sim.port,'--count','5','--format','jsonl']) == 0
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert len(rows) == 5
+    assert all(row['weight'] == 1.5 for row in rows)
+    sequences = [row['sequence'] for row in rows]
+    assert sequences == sorted(sequences)
+
+def test_stream_rate(sim,capsys):
+    # the simulator repeats every 10 ms, 10 samples per second are kept
+    assert main(['stream','--port',sim.port,'--rate','10','--duration','0.5','--format','text']) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert 3 <= len(lines) <= 6
+
+def test_bench_passes_arguments(monkeypatch):
+    calls = []
+    monkeypatch.setattr(benchmark,'main',calls.append)
+    assert main(['bench','--number','10','--parse']) == 0
+    assert calls == [['--number','10','--parse']]
+
+def test_unrecognized_argument():
+    with pytest.raises(SystemExit):
+        main(['read','--number','10'])
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from mettler_toledo_device import MettlerToledoDevice, MettlerToledoError
+from mettler_toledo_device.commands import COMMANDS, get_command, _RAISE
+from mettler_toledo_device.pipeline import MettlerToledoPipeline
+from mettler_toledo_device.response import parse_response
+
+
+@pytest.mark.parametrize('cls',[MettlerToledoDevice,MettlerToledoPipeline])
+def test_methods_installed(cls):
+    for command in COMMANDS:
+        method = getattr(cls,command.method)
+        assert method.__name__ == command.method
+        assert method.__doc__
+
+def test_class_methods_take_precedence():
+    # get_weight is written out in MettlerToledoDevice for max_age and streaming
+    assert MettlerToledoDevice.get_weight.__qualname__ == 'MettlerToledoDevice.get_weight'
+    assert 'max_age' in MettlerToledoDevice.get_weight.__code__.co_varnames
+
+@pytest.mark.parametrize('command',COMMANDS,ids=lambda command: command.method)
+def test_status_errors(command):
+    for status, message in command.status_errors.items():
+        line = '{0} {1}\r\n'.format(command.reply_id,status).encode()
+        with pytest.raises(MettlerToledoError) as excinfo:
+            if command.multiline:
+                command.handle([parse_response(line)])
+            else:
+                command.handle_line(line)
+        assert excinfo.value.value == message
+        assert excinfo.value.reply_id == command.reply_id
+        assert excinfo.value.status == status
+
+def test_handle_line():
+    assert get_command('get_weight').handle_line(b'S D     1.5000 g\r\n') == [1.5,'g','D']
+    assert get_command('get_weight_stable').handle_line(b'S S     1.5000 g\r\n') == [1.5,'g']
+    assert get_command('get_serial_number').handle_line(b'I4 A "1001"\r\n') == '1001'
+    assert get_command('get_balance_data').handle_line(b'I2 A "XS204 Excellence 220.0090 g"\r\n') == ['XS204','Excellence','220.0090','g']
+    assert get_command('zero').handle_line(b'ZI D\r\n') == 'D'
+    assert get_command('clear_tare').handle_line(b'TAC A\r\n') is True
+
+def test_bind_and_format_request():
+    command = get_command('set_tare_weight')
+    assert command.bind((2.5,),{'unit': 'g'}) == (2.5,'g')
+    assert command.format_request((2.5,'g')) == 'TA 2.5 g\r\n'
+    with pytest.raises(TypeError):
+        command.bind((),{'weight': 2.5})
+    with pytest.raises(TypeError):
+        command.format_request((2.5,))
+    assert get_command('zero').format_request(()) == 'ZI\r\n'
+
+def test_error_results(sim,dev):
+    assert get_command('get_weight_stable').error_result is None
+    assert get_command('zero_stable').error_result is False
+    assert get_command('zero').error_result is _RAISE
+    sim.inject_error('S I')
+    assert dev.get_weight_stable() is None
+    sim.inject_error('Z I')
+    assert dev.zero_stable() is False
+    sim.inject_error('ZI +')
+    with pytest.raises(MettlerToledoError) as excinfo:
+        dev.zero()
+    assert excinfo.value.status == '+'
+    assert excinfo.value.value == get_command('zero').status_errors['+']
+
+def test_generated_methods(sim,dev):
+    sim.set_load(1.5)
+    assert dev.get_weight_stable() == [1.5,'g']
+    assert dev.set_tare_weight(0.5,unit='g') == [0.5,'g']
+    assert dev.get_tare_weight() == [0.5,'g']
+    assert dev.clear_tare() is True
+    assert dev.get_serial_number() == sim.serial_number
+    with pytest.raises(TypeError):
+        dev.set_tare_weight(0.5)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+
+def test_inquiries_cached(sim,dev):
+    assert dev.get_balance_data()[0] == sim.model
+    count = sim.command_counts['I2']
+    assert dev.get_balance_data()[0] == sim.model
+    assert sim.command_counts['I2'] == count
+
+def test_cached_result_is_a_copy(sim,dev):
+    balance_data = dev.get_balance_data()
+    balance_data.append('changed')
+    assert dev.get_balance_data()[-1] != 'changed'
+
+def test_reset_clears_cache(sim,dev):
+    dev.get_balance_data()
+    count = sim.command_counts['I2']
+    sim.model = 'XS205'
+    dev.reset()
+    assert dev.get_balance_data()[0] == 'XS205'
+    assert sim.command_counts['I2'] == count + 1
+    # the reply to @ was read, the next command gets its own reply
+    sim.set_load(1.5)
+    assert dev.get_weight()[0] == 1.5
+
+def test_reopen_clears_cache(sim,dev):
+    assert dev.get_serial_number() == sim.serial_number
+    dev.get_balance_data()
+    count = sim.command_counts['I2']
+    sim.serial_number = '1002'
+    sim.model = 'XS205'
+    assert dev.reopen() is not None
+    assert dev.get_serial_number() == '1002'
+    assert dev.get_balance_data()[0] == 'XS205'
+    assert sim.command_counts['I2'] == count + 1
+
+def test_reopen_clears_weight_cache(sim,dev):
+    sim.set_load(1.5)
+    assert dev.get_weight(max_age=10.0)[0] == 1.5
+    sim.set_load(2.5)
+    assert dev.get_weight(max_age=10.0)[0] == 1.5
+    dev.reopen()
+    assert dev.get_weight(max_age=10.0)[0] == 2.5
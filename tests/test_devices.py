@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from mettler_toledo_device import MettlerToledoDevices
+
+
+@pytest.fixture
+def sims(make_simulator):
+    return [make_simulator(serial_number=serial_number) for serial_number in ('1001','1002','1003')]
+
+@pytest.fixture
+def devs(sims):
+    devs = MettlerToledoDevices(use_ports=[sim.port for sim in sims])
+    yield devs
+    devs.close()
+
+def test_read_all_aligned(sims,devs):
+    for i, sim in enumerate(sims):
+        sim.set_load(i + 1.5)
+        sim.latency = 0.2
+    t_start = time.monotonic()
+    snapshot = devs.read_all()
+    duration = time.monotonic() - t_start
+    assert snapshot.cycle == 1
+    assert [reading.port for reading in snapshot.readings] == [sim.port for sim in sims]
+    assert [reading.weight for reading in snapshot.readings] == [1.5,2.5,3.5]
+    assert all(reading.error is None for reading in snapshot.readings)
+    # the barrier releases every request together
+    send_times = [reading.send_time for reading in snapshot.readings]
+    assert (max(send_times) - min(send_times)) < 0.05
+    # one round trip, not one per device
+    assert duration < 0.45
+
+def test_read_all_error(sims,devs):
+    sims[1].inject_error('ES')
+    snapshot = devs.read_all()
+    assert snapshot.readings[1].weight is None
+    assert snapshot.readings[1].error is not None
+    assert snapshot.readings[0].error is None
+    assert snapshot.readings[2].error is None
+
+def test_stream_all_period(devs):
+    t_start = time.monotonic()
+    snapshots = list(devs.stream_all(period=0.2,count=3))
+    duration = time.monotonic() - t_start
+    assert [snapshot.cycle for snapshot in snapshots] == [1,2,3]
+    assert all(len(snapshot.readings) == 3 for snapshot in snapshots)
+    intervals = [b.timestamp - a.timestamp for a, b in zip(snapshots,snapshots[1:])]
+    assert all(0.15 < interval < 0.3 for interval in intervals)
+    # no sleep after the last snapshot
+    assert duration < 0.8
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import time
+
+from mettler_toledo_device import find_mettler_toledo_device_ports
+
+
+def test_find_ports_concurrently(make_simulator,dead_port):
+    sims = [make_simulator(serial_number=serial_number,latency=0.3) for serial_number in ('1001','1002')]
+    t_start = time.monotonic()
+    ports = find_mettler_toledo_device_ports(use_ports=[sims[0].port,dead_port,sims[1].port],timeout=1.0)
+    duration = time.monotonic() - t_start
+    assert ports == {sims[0].port: '1001',sims[1].port: '1002'}
+    # the dead port is given up on at the deadline
+    assert duration < 1.5
+
+def test_find_ports_filters(make_simulator):
+    sims = [make_simulator(serial_number='1001',model='XS204'),
+            make_simulator(serial_number='1002',model='XS205')]
+    use_ports = [sim.port for sim in sims]
+    assert find_mettler_toledo_device_ports(use_ports=use_ports,serial_number=1002) == {sims[1].port: '1002'}
+    assert find_mettler_toledo_device_ports(use_ports=use_ports,model_number='XS204') == {sims[0].port: '1001'}
+    assert find_mettler_toledo_device_ports(use_ports=use_ports,serial_number='1003') == {}
+
+def test_find_ports_early_give_up(dead_port):
+    t_start = time.monotonic()
+    assert find_mettler_toledo_device_ports(use_ports=[dead_port],timeout=0.3) == {}
+    assert (time.monotonic() - t_start) < 0.8
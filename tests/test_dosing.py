@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from mettler_toledo_device import MettlerToledoDosingController, MettlerToledoError
+from mettler_toledo_device.stability import MettlerToledoStabilityError
+
+
+class _FlowDevice(object):
+    '''
+    Balance under a valve: the weight rises at flow units per second
+    while the valve is open and for in_flight_time seconds after it
+    was closed.
+    '''
+    def __init__(self,flow=10.0,in_flight_time=0.05,sample_period=0.005,status='D',settles=True):
+        self.flow = flow
+        self.in_flight_time = in_flight_time
+        self.sample_period = sample_period
+        self.status = status
+        self.settles = settles
+        self.cutoff_count = 0
+        self._lock = threading.Lock()
+        self._weight = 0.0
+        self._t_open = None
+        self._t_closed = None
+
+    def open(self):
+        with self._lock:
+            self._t_open = time.monotonic()
+            self._t_closed = None
+
+    def close(self):
+        with self._lock:
+            self.cutoff_count += 1
+            if (self._t_open is not None) and (self._t_closed is None):
+                self._t_closed = time.monotonic()
+
+    def _get_weight(self):
+        with self._lock:
+            if self._t_open is None:
+                return self._weight
+            t_end = time.monotonic()
+            if self._t_closed is not None:
+                t_end = min(t_end,self._t_closed + self.in_flight_time)
+            return self._weight + self.flow*(t_end - self._t_open)
+
+    def tare(self):
+        with self._lock:
+            self._t_open = None
+            self._t_closed = None
+
+    def is_streaming(self):
+        return False
+
+    def get_weight(self):
+        time.sleep(self.sample_period)
+        return [self._get_weight(),'g',self.status]
+
+    def wait_for_stable_weight(self,tolerance,window=0.3,timeout=5.0):
+        if not self.settles:
+            raise MettlerToledoStabilityError('Weight not stable.','timeout')
+        time.sleep(self.in_flight_time + 0.01)
+        return [self._get_weight(),'g']
+
+
+def _make_controller(balance,**kwargs):
+    kwargs.setdefault('use_stream',False)
+    return MettlerToledoDosingController(balance,cutoff=balance.close,start=balance.open,**kwargs)
+
+def test_dose_converges():
+    balance = _FlowDevice(flow=10.0,in_flight_time=0.05)
+    controller = _make_controller(balance)
+    results = []
+    for i in range(6):
+        balance.tare()
+        results.append(controller.dose(1.0))
+    # without a lead time the material in flight lands on top
+    assert results[0].overshoot == pytest.approx(0.5,abs=0.15)
+    assert abs(results[-1].overshoot) < abs(results[0].overshoot)/4
+    assert controller.get_in_flight_time() == pytest.approx(0.05,abs=0.015)
+    assert all(result.settled and not result.streamed for result in results)
+
+def test_overshoot_learning():
+    balance = _FlowDevice(flow=10.0,in_flight_time=0.05)
+    controller = _make_controller(balance,lead_time=0.02,learning_rate=0.5)
+    result = controller.dose(1.0)
+    assert result.in_flight_time == 0.02
+    assert result.overshoot > 0
+    expected = 0.02 + 0.5*result.overshoot/result.cutoff_flow
+    assert controller.get_in_flight_time() == pytest.approx(expected)
+    assert balance.cutoff_count == 1
+
+def test_no_learning_when_not_settled():
+    balance = _FlowDevice(settles=False)
+    controller = _make_controller(balance,lead_time=0.02)
+    result = controller.dose(1.0)
+    assert not result.settled
+    assert controller.get_in_flight_time() == 0.02
+
+def test_overload_cuts_off():
+    balance = _FlowDevice(status='+')
+    controller = _make_controller(balance)
+    with pytest.raises(MettlerToledoError):
+        controller.dose(1.0)
+    assert balance.cutoff_count == 1
+    assert controller.stats() is None
+
+def test_stats():
+    balance = _FlowDevice()
+    controller = _make_controller(balance,lead_time=0.05)
+    for i in range(3):
+        balance.tare()
+        controller.dose(0.5)
+    stats = controller.stats()
+    assert stats['count'] == 3
+    overshoots = [result.overshoot for result in controller.get_results()]
+    assert stats['overshoot_max'] == max(overshoots)
+    assert stats['overshoot_abs_mean'] == pytest.approx(sum(abs(o) for o in overshoots)/3)
+    assert stats['in_flight_time'] == controller.get_in_flight_time()
+    controller.reset_stats()
+    assert controller.stats() is None
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from mettler_toledo_device.events import MettlerToledoSubscription
+
+
+def _hold(sim,load,duration=0.15):
+    sim.set_load(load)
+    time.sleep(duration)
+
+def test_threshold_hysteresis(sim,dev):
+    events = []
+    dev.on_threshold(10.0,lambda event: events.append(event.kind),hysteresis=0.5)
+    dev.start_stream()
+    _hold(sim,0.0)
+    _hold(sim,10.2)
+    assert events == []
+    _hold(sim,11.0)
+    assert events == ['rising']
+    _hold(sim,9.8)
+    _hold(sim,10.4)
+    assert events == ['rising']
+    _hold(sim,9.0)
+    dev.stop_stream()
+    assert events == ['rising','falling']
+
+def test_threshold_debounce(sim,dev):
+    events = []
+    dev.on_threshold(10.0,lambda event: events.append((event.kind,event.sample.timestamp)),debounce=0.3)
+    dev.start_stream()
+    _hold(sim,0.0)
+    # a blip shorter than debounce is ignored
+    _hold(sim,11.0,0.03)
+    _hold(sim,0.0)
+    assert events == []
+    sim.set_load(11.0)
+    t_load = time.monotonic()
+    time.sleep(0.6)
+    dev.stop_stream()
+    assert [kind for kind, timestamp in events] == ['rising']
+    assert events[0][1] - t_load >= 0.3
+
+def test_subscription_requires_evaluate():
+    with pytest.raises(TypeError):
+        MettlerToledoSubscription(lambda event: None)
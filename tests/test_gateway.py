@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import json
+import socket
+
+import pytest
+
+from mettler_toledo_device.gateway import MettlerToledoGateway
+
+
+class _Client(object):
+    def __init__(self,address):
+        self.socket = socket.create_connection(address,timeout=2.0)
+        self.file = self.socket.makefile('rwb')
+
+    def send(self,line):
+        self.file.write((line + '\r\n').encode())
+        self.file.flush()
+
+    def readline(self):
+        return self.file.readline().decode().rstrip('\r\n')
+
+    def request(self,line):
+        self.send(line)
+        return self.readline()
+
+    def call(self,method,**params):
+        reply = json.loads(self.request(json.dumps({'id': 1,'method': method,'params': params})))
+        assert reply['id'] == 1
+        return reply
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+@pytest.fixture
+def gateway(dev):
+    gateway = MettlerToledoGateway(dev,port=0)
+    gateway.start()
+    yield gateway
+    gateway.stop()
+
+@pytest.fixture
+def make_client(gateway):
+    clients = []
+    def make():
+        client = _Client(gateway.address)
+        clients.append(client)
+        return client
+    yield make
+    for client in clients:
+        client.close()
+
+def test_raw_replies_pass_through(sim,make_client):
+    sim.set_load(1.5)
+    client = make_client()
+    assert client.request('SI') == 'S S     1.5000 g'
+    assert client.request('I2') == 'I2 A "{0} {1} 220.0000 g"'.format(sim.model,sim.balance_type)
+    assert client.request('I4') == 'I4 A "{0}"'.format(sim.serial_number)
+    sim.inject_error('ES')
+    assert client.request('SI') == 'ES'
+
+def test_raw_link_commands(sim,dev,make_client):
+    client = make_client()
+    assert client.request('COM') == 'EL'
+    assert 'COM' not in sim.command_counts
+    dev.get_balance_data()
+    assert client.request('@') == 'I4 A "{0}"'.format(sim.serial_number)
+    assert sim.command_counts['@'] == 1
+    # the cached inquiries were cleared by reset()
+    sim.command_counts.clear()
+    dev.get_balance_data()
+    assert sim.command_counts['I2'] == 1
+
+def test_json_requests(sim,make_client):
+    sim.set_load(1.5)
+    client = make_client()
+    assert client.call('get_weight') == {'id': 1,'result': [1.5,'g','S']}
+    assert client.call('get_serial_number') == {'id': 1,'result': sim.serial_number}
+    assert 'error' in client.call('no_such_method')
+
+def test_commands_served_while_subscribed(sim,dev,make_client):
+    sim.set_load(1.5)
+    subscriber = make_client()
+    client = make_client()
+    subscriber.send('SIR')
+    assert subscriber.readline() == 'S S     1.5000 g'
+    assert dev.is_streaming()
+    assert client.request('SI') == 'S S     1.5000 g'
+    assert client.request('I4') == 'I4 A "{0}"'.format(sim.serial_number)
+    assert client.call('get_weight') == {'id': 1,'result': [1.5,'g','S']}
+    assert client.call('get_weight_stable') == {'id': 1,'result': [1.5,'g']}
+    # the stream was resumed for the subscriber
+    assert dev.is_streaming()
+    subscriber.socket.settimeout(0.5)
+    sim.set_load(2.0)
+    while subscriber.readline() != 'S S     2.0000 g':
+        pass
+    subscriber.call('unsubscribe')
+    assert not dev.is_streaming()
+
+def test_json_subscribe(sim,make_client):
+    sim.set_load(1.5)
+    client = make_client()
+    client.send(json.dumps({'id': 1,'method': 'subscribe'}))
+    # samples may arrive before the reply
+    messages = [json.loads(client.readline()) for i in range(3)]
+    assert {'id': 1,'result': True} in messages
+    sample = [message for message in messages if 'sample' in message][0]['sample']
+    assert (sample['device'], sample['weight'], sample['unit'], sample['status']) == (0,1.5,'g','S')
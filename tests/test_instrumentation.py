@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from mettler_toledo_device import MettlerToledoError
+
+
+def test_stats_count_requests_and_errors(sim,dev):
+    sim.set_load(1.5)
+    assert dev.stats() is None
+    dev.enable_stats()
+    dev.get_weight()
+    dev.get_weight()
+    sim.inject_error('ES')
+    with pytest.raises(MettlerToledoError):
+        dev.get_weight()
+    stats = dev.stats()['SI']
+    assert stats['count'] == 3
+    assert stats['error_count'] == 1
+    assert stats['errors'] == {'MettlerToledoError': 1}
+    assert stats['bytes_out'] == 3*len('SI\r\n')
+    assert stats['latency_min'] <= stats['latency_mean'] <= stats['latency_max']
+    dev.reset_stats()
+    assert dev.stats() == {}
+    dev.disable_stats()
+    assert dev.stats() is None
+
+def test_stats_count_multiline_reply_bytes(dev):
+    dev.enable_stats()
+    commands = dev.get_commands()
+    stats = dev.stats()['I0']
+    assert stats['count'] == 1
+    # one 'I0 B <level> "<command>"' line per command
+    assert stats['bytes_in'] >= sum(len('I0 B 0 ""\r\n') + len(command) for command in commands)
+
+def test_request_hooks(sim,dev):
+    events = []
+    dev.add_request_hook(events.append)
+    dev.get_weight()
+    sim.inject_error('ET')
+    with pytest.raises(MettlerToledoError):
+        dev.get_weight()
+    assert [event.command for event in events] == ['SI','SI']
+    assert events[0].error is None
+    assert events[0].bytes_in > 0
+    assert events[1].error.reply_id == 'ET'
+    dev.remove_request_hook(events.append)
+    dev.get_weight()
+    assert len(events) == 2
+
+def test_write_write_delay_after_removing_hook(sim,make_device):
+    dev = make_device(port=sim.port,write_write_delay=0.3)
+    hook = lambda event: None
+    dev.add_request_hook(hook)
+    dev.get_weight()
+    t_start = time.monotonic()
+    dev.remove_request_hook(hook)
+    dev.get_weight()
+    assert (time.monotonic() - t_start) >= 0.25
+
+def test_write_write_delay_after_disabling_stats(sim,make_device):
+    dev = make_device(port=sim.port,write_write_delay=0.3)
+    dev.enable_stats()
+    dev.get_weight()
+    t_start = time.monotonic()
+    dev.disable_stats()
+    dev.get_weight()
+    assert (time.monotonic() - t_start) >= 0.25
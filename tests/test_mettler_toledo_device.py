@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import threading
+
+
+def _read_concurrently(function,thread_count,count):
+    results = []
+    def read():
+        for i in range(count):
+            results.append(function())
+    threads = [threading.Thread(target=read) for i in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_get_weight_shares_requests(sim,dev):
+    sim.set_load(1.5)
+    sim.latency = 0.02
+    sim.command_counts.clear()
+    results = _read_concurrently(lambda: dev.get_weight(max_age=0.0),8,5)
+    assert results == [[1.5,'g','S']]*40
+    assert sim.command_counts['SI'] < 40
+
+def test_get_weight_max_age_reuses_weight(sim,dev):
+    sim.set_load(1.5)
+    sim.command_counts.clear()
+    weights = [dev.get_weight(max_age=10.0) for i in range(5)]
+    assert weights == [[1.5,'g','S']]*5
+    assert sim.command_counts['SI'] == 1
+    weights[0][0] = 0.0
+    assert dev.get_weight(max_age=10.0) == [1.5,'g','S']
+
+def test_reopen_clears_shared_weight(sim,dev):
+    sim.set_load(1.5)
+    sim.latency = 0.01
+    assert dev.get_weight(max_age=10.0) == [1.5,'g','S']
+    sim.set_load(2.5)
+    errors = []
+    def reopen():
+        for i in range(5):
+            try:
+                dev.reopen()
+            except Exception as e:
+                errors.append(e)
+    thread = threading.Thread(target=reopen)
+    thread.start()
+    results = _read_concurrently(lambda: dev.get_weight(max_age=0.0),4,10)
+    thread.join()
+    assert errors == []
+    assert len(results) == 40
+    assert dev.get_weight(max_age=10.0) == [2.5,'g','S']
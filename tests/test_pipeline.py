@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from mettler_toledo_device import MettlerToledoError
+from mettler_toledo_device.pipeline import _PipelineResponseError
+
+
+def test_pipeline_aborts_after_unexpected_response(sim,dev):
+    sim.set_load(1.5)
+    sim.inject_error('I4 A "1126493049"')
+    results = dev.pipeline().get_weight().get_balance_data().get_weight().execute(raise_errors=False)
+    assert isinstance(results[0],_PipelineResponseError)
+    assert all(isinstance(result,MettlerToledoError) for result in results[1:])
+    assert dev.get_weight() == [1.5,'g','S']
+
+def test_pipeline_error_reply_does_not_abort(sim,dev):
+    sim.set_load(1.5)
+    sim.inject_error('ES')
+    results = dev.pipeline().get_weight().get_weight().execute(raise_errors=False)
+    assert isinstance(results[0],MettlerToledoError)
+    assert results[0].reply_id == 'ES'
+    assert results[1] == [1.5,'g','S']
+
+def test_pipeline_error_result_matches_method(sim,dev):
+    sim.inject_error('ES')
+    assert dev.pipeline().zero_stable().execute() == [False]
+
+def test_pipeline_uses_device_info_cache(sim,dev):
+    serial_number = dev.get_serial_number()
+    sim.command_counts.clear()
+    results = dev.pipeline().get_serial_number().get_weight().execute()
+    assert results[0] == serial_number
+    assert 'I4' not in sim.command_counts
+    assert sim.command_counts['SI'] == 1
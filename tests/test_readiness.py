@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import time
+
+
+def test_ready_time(sim,make_device):
+    t_start = time.monotonic()
+    dev = make_device(port=sim.port)
+    assert dev.ready_time is not None
+    assert dev.ready_time < 0.5
+    assert (time.monotonic() - t_start) < 1.0
+    # the readiness check cached the serial number
+    assert sim.command_counts['I4'] == 1
+    assert dev.get_serial_number() == sim.serial_number
+    assert sim.command_counts['I4'] == 1
+
+def test_ready_retries(sim,make_device):
+    sim.drop_reply()
+    sim.inject_error('ET')
+    dev = make_device(port=sim.port)
+    assert dev.ready_time is not None
+    assert sim.command_counts['I4'] == 3
+
+def test_ready_timeout(dead_port,make_device):
+    t_start = time.monotonic()
+    dev = make_device(port=dead_port,ready_timeout=0.3)
+    assert dev.ready_time is None
+    assert (time.monotonic() - t_start) < 0.8
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from mettler_toledo_device import MettlerToledoRecorder
+from mettler_toledo_device.stream import MettlerToledoSample
+
+
+def test_recorder_wraparound():
+    recorder = MettlerToledoRecorder(capacity=4)
+    for i in range(3):
+        recorder.append(float(i),10.0 + i,stable=(i % 2 == 0))
+    assert len(recorder) == 3
+    assert list(recorder.get_weights()) == [10.0,11.0,12.0]
+    for i in range(3,10):
+        recorder.append(float(i),10.0 + i,stable=(i % 2 == 0))
+    assert len(recorder) == 4
+    assert recorder.get_count() == 10
+    # the last capacity samples, oldest first, across the wrap
+    assert list(recorder.get_timestamps()) == [6.0,7.0,8.0,9.0]
+    assert list(recorder.get_weights()) == [16.0,17.0,18.0,19.0]
+    assert list(recorder.get_stable()) == [True,False,True,False]
+    assert list(recorder.get_weights(2)) == [18.0,19.0]
+    assert list(recorder.get_weights(100)) == [16.0,17.0,18.0,19.0]
+
+def test_recorder_views():
+    recorder = MettlerToledoRecorder(capacity=4)
+    for i in range(6):
+        recorder.append(float(i),float(i))
+    weights = recorder.get_weights()
+    # a view into the ring, not a copy
+    assert weights.base is not None
+    assert numpy.shares_memory(weights,recorder._weights)
+
+def test_recorder_statistics():
+    recorder = MettlerToledoRecorder(capacity=8)
+    for i in range(12):
+        recorder.append(0.1*i,5.0 + 0.2*i,stable=True)
+    statistics = recorder.get_statistics()
+    assert statistics.count == 8
+    assert statistics.min == pytest.approx(5.8)
+    assert statistics.max == pytest.approx(7.2)
+    assert statistics.slope == pytest.approx(2.0)
+    assert statistics.stable_count == 8
+    assert recorder.get_statistics(duration=0.25).count == 3
+    recorder.clear()
+    assert recorder.get_statistics().count == 0
+
+def test_recorder_skips_samples_without_weight():
+    recorder = MettlerToledoRecorder(capacity=4)
+    recorder.extend([MettlerToledoSample(1.0,'g','S',0.0,0),
+                     MettlerToledoSample(None,None,'+',0.1,1),
+                     MettlerToledoSample(2.0,'g','D',0.2,2)])
+    assert list(recorder.get_weights()) == [1.0,2.0]
+    assert list(recorder.get_stable()) == [True,False]
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from mettler_toledo_device import MettlerToledoError
+from mettler_toledo_device.commands import get_command
+from mettler_toledo_device.response import parse_response
+
+
+def test_parse_weight_reply():
+    response = parse_response(b'S D      99.9871 g\r\n')
+    assert (response.command, response.status, response.value, response.unit) == ('S','D',99.9871,'g')
+    assert not response.stable
+    response = parse_response(b'TA A      12.5000 g\r\n')
+    assert (response.command, response.status, response.value, response.unit) == ('TA','A',12.5,'g')
+
+def test_parse_other_replies():
+    response = parse_response(b'I2 A "XS204 Excellence 220.0090 g"\r\n')
+    assert (response.command, response.status, response.value) == ('I2','A',None)
+    assert response.get_field_strings() == ['XS204','Excellence','220.0090','g']
+    response = parse_response(b'S +\r\n')
+    assert (response.command, response.status, response.value) == ('S','+',None)
+
+@pytest.mark.parametrize('line',[b'ES\r\n',b'ET\r\n',b'EL\r\n'])
+def test_parse_error_replies(line):
+    with pytest.raises(MettlerToledoError) as info:
+        parse_response(line)
+    assert info.value.reply_id == line[:2].decode()
+
+def test_parse_invalid_weight_value():
+    with pytest.raises(MettlerToledoError):
+        parse_response(b'S S 1.2.3 g\r\n')
+
+def test_repeated_line_results_are_not_shared():
+    handle_line = get_command('get_weight').handle_line
+    line = b'S S     100.0012 g\r\n'
+    weight = handle_line(line)
+    weight[0] = None
+    assert handle_line(line) == [100.0012,'g','S']
+    with pytest.raises(MettlerToledoError) as info:
+        handle_line(b'S +\r\n')
+    assert (info.value.reply_id, info.value.status) == ('S','+')
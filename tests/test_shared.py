@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+pytest.importorskip('multiprocessing.shared_memory')
+
+from mettler_toledo_device.shared import MettlerToledoSharedPublisher, MettlerToledoSharedReader
+from mettler_toledo_device.stream import MettlerToledoSample
+
+
+@pytest.fixture
+def publisher():
+    publisher = MettlerToledoSharedPublisher('mettler_toledo_device_test_{0}'.format(os.getpid()))
+    yield publisher
+    publisher.close()
+
+def test_publish_read_round_trip(publisher):
+    reader = MettlerToledoSharedReader(publisher.name)
+    try:
+        assert reader.read() is None
+        publisher.publish(MettlerToledoSample(12.3456,'mg','D',1234.5,7))
+        assert reader.read() == MettlerToledoSample(12.3456,'mg','D',1234.5,1)
+        publisher.publish(MettlerToledoSample(None,None,'+',1234.6,8))
+        assert reader.read() == MettlerToledoSample(None,None,'+',1234.6,2)
+        assert reader.wait(sequence=2,timeout=0.05) is None
+    finally:
+        reader.close()
+
+def test_streamed_samples_are_published(sim,dev,publisher):
+    reader = MettlerToledoSharedReader(publisher.name)
+    try:
+        sim.set_load(2.5)
+        publisher.attach(dev)
+        dev.start_stream()
+        first = reader.wait(timeout=1.0)
+        second = reader.wait(sequence=first.sequence,timeout=1.0)
+        dev.stop_stream()
+        assert (first.weight, first.unit, first.status) == (2.5,'g','S')
+        assert second.sequence > first.sequence
+        assert second.timestamp > first.timestamp
+    finally:
+        reader.close()
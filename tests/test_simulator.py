@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+from serial_interface import ReadError
+
+from mettler_toledo_device.response import MettlerToledoError
+
+
+def test_weight_settles_to_load(make_simulator,make_device):
+    sim = make_simulator(settling_time=0.05,resolution=0.01)
+    dev = make_device(port=sim.port)
+    sim.set_load(10.0)
+    assert dev.get_weight()[2] == 'D'
+    time.sleep(0.5)
+    assert dev.get_weight() == [10.0,'g','S']
+
+def test_overload(sim,dev):
+    sim.set_load(sim.capacity + 1)
+    with pytest.raises(MettlerToledoError) as excinfo:
+        dev.get_weight()
+    assert excinfo.value.status == '+'
+
+def test_injected_error_answers_next_command(sim,dev):
+    sim.inject_error('ET')
+    with pytest.raises(MettlerToledoError) as excinfo:
+        dev.get_weight()
+    assert excinfo.value.reply_id == 'ET'
+    assert dev.get_weight() == [0.0,'g','S']
+    assert sim.command_counts['SI'] == 2
+
+def test_identity_replies(make_simulator,make_device):
+    sim = make_simulator(serial_number=1234,model='XP205',capacity=220.0,resolution=0.01)
+    dev = make_device(port=sim.port)
+    assert dev.get_serial_number() == '1234'
+    assert dev.get_balance_data() == ['XP205','Excellence','220.00','g']
+    assert 'SIR' in dev.get_commands()
+
+def test_answers_only_at_its_baudrate(make_simulator,make_device):
+    sim = make_simulator(baudrate=19200)
+    dev = make_device(port=sim.port,ready_timeout=0.3)
+    assert dev.ready_time is None
+    dev = make_device(port=sim.port,baudrate=19200)
+    assert dev.ready_time is not None
+
+def test_dropped_reply(sim,dev):
+    sim.set_load(1.5)
+    sim.drop_reply()
+    with pytest.raises((MettlerToledoError,ReadError)):
+        dev.get_weight()
+    assert dev.get_weight() == [1.5,'g','S']
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from mettler_toledo_device.stability import (MettlerToledoStabilityDetector,
+                                             MettlerToledoStabilityError,
+                                             _get_slope)
+from mettler_toledo_device.stream import MettlerToledoSample
+
+
+def _add(detector,weights,period=0.05,status='D',unit='g',t_start=0.0):
+    stable = []
+    for i, weight in enumerate(weights):
+        sample = MettlerToledoSample(weight,unit,status,t_start + i*period,i)
+        stable.append(detector.add(sample))
+    return stable
+
+def test_stable_after_full_window():
+    detector = MettlerToledoStabilityDetector(0.001,window=0.2)
+    stable = _add(detector,[10.0,10.0003,9.9998,10.0001,10.0,10.0002])
+    # 0.2 s of samples is only covered at the fifth sample
+    assert stable == [False,False,False,False,True,True]
+    assert detector.get_weight() == [10.0002,'g']
+    assert detector.std <= 0.001
+
+def test_noise_over_tolerance():
+    detector = MettlerToledoStabilityDetector(0.001,window=0.2)
+    assert not any(_add(detector,[10.0,10.005,9.995,10.005,9.995,10.005]))
+    assert detector.std > 0.001
+    assert detector.get_weight() is None
+
+def test_drift_over_slope_tolerance():
+    # std of the window is within tolerance, the weight keeps creeping
+    detector = MettlerToledoStabilityDetector(0.002,window=0.2,slope_tolerance=0.005)
+    assert not any(_add(detector,[10.0 + 0.0005*i for i in range(10)]))
+    assert detector.std <= 0.002
+    assert detector.slope == pytest.approx(0.01)
+    detector = MettlerToledoStabilityDetector(0.002,window=0.2,slope_tolerance=0.02)
+    assert _add(detector,[10.0 + 0.0005*i for i in range(10)])[-1]
+
+def test_balance_status():
+    detector = MettlerToledoStabilityDetector(0.001,window=0.2)
+    assert _add(detector,[10.0],status='S') == [True]
+    detector = MettlerToledoStabilityDetector(0.001,window=0.2,use_balance_status=False)
+    assert _add(detector,[10.0],status='S') == [False]
+
+def test_unit_change_and_missing_weight_restart_window():
+    detector = MettlerToledoStabilityDetector(0.001,window=0.2)
+    _add(detector,[10.0]*4)
+    assert not _add(detector,[10.0],unit='mg',t_start=0.2)[0]
+    _add(detector,[10.0]*4,t_start=0.25)
+    assert not detector.add(MettlerToledoSample(None,None,'+',0.45,0))
+    assert not detector.add(MettlerToledoSample(10.0,'mg','D',0.5,0))
+
+def test_check_status():
+    detector = MettlerToledoStabilityDetector(0.001)
+    with pytest.raises(MettlerToledoStabilityError) as excinfo:
+        detector.check_status(MettlerToledoSample(None,None,'+',0.0,0))
+    assert excinfo.value.reason == 'overload'
+    with pytest.raises(MettlerToledoStabilityError) as excinfo:
+        detector.check_status(MettlerToledoSample(None,None,'-',0.0,0))
+    assert excinfo.value.reason == 'underload'
+
+def test_get_slope():
+    assert _get_slope([0.0,1.0,2.0],[1.0,3.0,5.0]) == pytest.approx(2.0)
+    assert _get_slope([1.0,1.0],[1.0,2.0]) == 0.0
+
+def test_wait_for_stable_weight(sim,dev):
+    sim.set_load(5.0)
+    assert dev.wait_for_stable_weight(0.001,window=0.1,timeout=2.0,use_balance_status=False) == [5.0,'g']
+
+def test_wait_for_stable_weight_timeout(sim,dev):
+    sim.noise = 0.01
+    sim.set_load(5.0)
+    with pytest.raises(MettlerToledoStabilityError) as excinfo:
+        dev.wait_for_stable_weight(0.0001,window=0.1,timeout=0.3,use_balance_status=False)
+    assert excinfo.value.reason == 'timeout'
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import gc
+import time
+import weakref
+
+import pytest
+
+from mettler_toledo_device import MettlerToledoDevice
+from mettler_toledo_device import supervisor as supervisor_module
+from mettler_toledo_device.supervisor import MettlerToledoSupervisor
+
+
+def _wait_until(condition,timeout=5.0):
+    t_end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= t_end:
+            return False
+        time.sleep(0.01)
+    return True
+
+@pytest.fixture
+def make_supervisor():
+    supervisors = []
+    def make(dev,**kwargs):
+        supervisor = MettlerToledoSupervisor(dev,**kwargs)
+        supervisor.start()
+        supervisors.append(supervisor)
+        return supervisor
+    yield make
+    for supervisor in supervisors:
+        supervisor.stop()
+
+def test_reconnect_after_replug(make_simulator,make_device,make_supervisor):
+    sim = make_simulator(serial_number='1126493049')
+    sim.set_load(1.5)
+    dev = make_device(port=sim.port)
+    dev.start_stream()
+    reconnects = []
+    supervisor = make_supervisor(dev,backoff_min=0.05,backoff_max=0.2,check_period=0.05,
+                                 on_reconnect=reconnects.append)
+    sim.stop()
+    assert _wait_until(lambda: not supervisor.is_connected())
+    replugged = make_simulator(serial_number='1126493049')
+    replugged.set_load(2.5)
+    supervisor.try_ports = [replugged.port]
+    assert _wait_until(supervisor.is_connected)
+    assert supervisor.reconnect_count == 1
+    assert reconnects == [dev]
+    assert dev.get_port() == replugged.port
+    # the stream resumed on the same device
+    assert dev.is_streaming()
+    assert _wait_until(lambda: dev.latest().weight == 2.5)
+
+def test_reconnect_backoff(sim,dev,make_supervisor,dead_port,monkeypatch):
+    probed = []
+    find_ports = supervisor_module.find_mettler_toledo_device_ports
+    def find_ports_recorded(**kwargs):
+        probed.extend(kwargs['use_ports'])
+        return find_ports(**kwargs)
+    monkeypatch.setattr(supervisor_module,'find_mettler_toledo_device_ports',find_ports_recorded)
+    reopen_times = []
+    reopen = dev.reopen
+    def reopen_recorded(*args,**kwargs):
+        reopen_times.append(time.monotonic())
+        return reopen(*args,**kwargs)
+    monkeypatch.setattr(dev,'reopen',reopen_recorded)
+    supervisor = make_supervisor(dev,backoff_min=0.05,backoff_max=0.2,check_period=0.05)
+    supervisor.try_ports = [dead_port]
+    sim.stop()
+    # the first retry waits for the probe of dead_port to time out
+    assert _wait_until(lambda: len(reopen_times) >= 6,timeout=10.0)
+    assert not supervisor.is_connected()
+    # the port that never answered is probed once, not on every retry
+    assert probed == [dead_port]
+    intervals = [t1 - t0 for t0, t1 in zip(reopen_times,reopen_times[1:])]
+    # backoff doubles from 0.05 up to 0.2 seconds
+    assert 0.1 <= intervals[1] < 0.15
+    assert all(0.2 <= interval < 0.3 for interval in intervals[2:])
+
+def test_closed_device_is_released(sim):
+    dev = MettlerToledoDevice(port=sim.port)
+    dev.reopen()
+    dev.close()
+    reference = weakref.ref(dev)
+    del dev
+    gc.collect()
+    assert reference() is None
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from mettler_toledo_device.weight_log import MettlerToledoLogWriter, MettlerToledoLogReader, UNITS
+
+
+def test_write_read_round_trip(tmp_path):
+    directory = str(tmp_path)
+    writer = MettlerToledoLogWriter(directory,chunk_records=10,max_files=2)
+    for i in range(25):
+        weight = None if (i == 24) else 0.5*i
+        writer.append(100.0 + i,weight,'g','S',wall_time=1000.0 + i)
+    writer.flush()
+    reader = MettlerToledoLogReader(directory)
+    try:
+        # the oldest chunk was removed
+        assert len(reader.get_files()) == 2
+        records = numpy.concatenate(reader.get_range())
+        assert list(records['timestamp']) == [100.0 + i for i in range(10,25)]
+        assert list(records['weight'][:-1]) == [0.5*i for i in range(10,24)]
+        assert numpy.isnan(records['weight'][-1])
+        assert set(UNITS[unit] for unit in records['unit']) == set(['g'])
+        assert set(records['status']) == set([b'S'])
+        weights = reader.get_weights(t_start=1012.0,t_end=1015.0)
+        assert list(weights) == [6.0,6.5,7.0]
+    finally:
+        reader.close()
+        writer.close()
+
+def test_streamed_samples_are_logged(tmp_path,sim,dev):
+    directory = str(tmp_path)
+    writer = MettlerToledoLogWriter(directory)
+    try:
+        sim.set_load(3.25)
+        writer.attach(dev)
+        dev.start_stream()
+        samples = []
+        for sample in dev.iter_samples(timeout=1.0):
+            samples.append(sample)
+            if len(samples) >= 20:
+                break
+        writer.detach()
+        dev.stop_stream()
+        writer.flush()
+        reader = MettlerToledoLogReader(directory)
+        records = reader.get_range(field='timestamp')[0]
+        logged = dict(zip(records['timestamp'],records['weight']))
+        assert all(logged[sample.timestamp] == sample.weight for sample in samples)
+        reader.close()
+    finally:
+        writer.close()